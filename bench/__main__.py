@@ -0,0 +1,163 @@
+# bench/__main__.py
+"""
+python -m bench run     [options]          -> JSON results (stdout or --out)
+python -m bench compare BASE.json NEW.json  -> table; exit 1 on regression
+"""
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+from bench import compare as cmp
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _env_pairs(values: List[str]) -> Dict[str, str]:
+    out = {}
+    for v in values:
+        k, sep, val = v.partition("=")
+        if not sep:
+            raise SystemExit(f"--env expects KEY=VALUE, got {v!r}")
+        out[k] = val
+    return out
+
+
+async def _drive(args, base_url: str) -> Dict[str, Any]:
+    import httpx
+
+    from bench.load import closed_loop, open_loop
+    from bench.scenarios import SCENARIOS, Context, setup
+
+    limits = httpx.Limits(max_connections=max(args.concurrency, args.max_inflight),
+                          max_keepalive_connections=max(args.concurrency, 64))
+    results: Dict[str, Any] = {}
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        ctx = Context(client, seed=args.seed, unique_questions=args.unique_questions)
+        await setup(ctx, args.scenarios, users=args.users, sessions=args.sessions,
+                    claim_pool=args.claim_pool)
+        for name in args.scenarios:
+            op_fn = SCENARIOS[name]
+
+            def op(fn=op_fn):
+                return fn(ctx)
+
+            if args.mode == "closed":
+                rec = await closed_loop(op, args.concurrency, args.duration, warmup_s=args.warmup)
+            else:
+                rec = await open_loop(op, args.rate, args.duration, max_inflight=args.max_inflight,
+                                      poisson=args.poisson, seed=args.seed)
+            results[name] = rec.summary()
+            print(f"[bench] {name:<8} {json.dumps(results[name]['latency_ms'])} "
+                  f"rps={results[name]['throughput_rps']} err={results[name]['error_rate']}", file=sys.stderr)
+    return results
+
+
+def cmd_run(args) -> int:
+    from bench.server import BenchServer
+
+    overrides = {
+        "FAKE_PINECONE_EMBED_LATENCY": args.embed_latency,
+        "FAKE_PINECONE_QUERY_LATENCY": args.query_latency,
+        "FAKE_PINECONE_ERROR_RATE": str(args.error_rate),
+        "FAKE_PINECONE_SEED": str(args.seed),
+        **_env_pairs(args.env),
+    }
+    with BenchServer(env=overrides) as server:
+        t0 = time.time()
+        results = asyncio.run(_drive(args, server.base_url))
+    doc = {
+        "meta": {
+            "git_rev": _git_rev(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(t0)),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mode": args.mode,
+            "concurrency": args.concurrency if args.mode == "closed" else None,
+            "rate": args.rate if args.mode == "open" else None,
+            "duration_s": args.duration,
+            "unique_questions": args.unique_questions,
+            "env": overrides,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    text = json.dumps(doc, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+def cmd_compare(args) -> int:
+    thresholds = dict(cmp.DEFAULT_THRESHOLDS)
+    if args.threshold is not None:
+        thresholds = {k: args.threshold for k in thresholds}
+    rows, regressed = cmp.compare(cmp.load(args.baseline), cmp.load(args.candidate), thresholds,
+                                  error_rate_delta=args.error_rate_delta)
+    print(cmp.format_table(rows))
+    if args.json:
+        print(json.dumps({"regression": regressed, "rows": rows}, indent=2))
+    return 1 if regressed else 0
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(prog="python -m bench")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    r = sub.add_parser("run", help="start the app in-process and drive load against it")
+    r.add_argument("--scenarios", default="chat,history,login,claim",
+                   type=lambda s: [x.strip() for x in s.split(",") if x.strip()])
+    r.add_argument("--mode", choices=("closed", "open"), default="closed")
+    r.add_argument("--concurrency", type=int, default=16, help="closed loop: concurrent clients")
+    r.add_argument("--rate", type=float, default=50.0, help="open loop: arrivals per second")
+    r.add_argument("--poisson", action="store_true", help="open loop: exponential inter-arrival gaps")
+    r.add_argument("--max-inflight", type=int, default=1000, help="open loop: drop arrivals beyond this")
+    r.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    r.add_argument("--warmup", type=float, default=1.0, help="closed loop: unmeasured seconds first")
+    r.add_argument("--embed-latency", default="lognormal:30:0.3",
+                   help="fake Pinecone embed latency: const:MS, uniform:LO:HI, normal:MEAN:SD "
+                        "or lognormal:MEDIAN:SIGMA")
+    r.add_argument("--query-latency", default="lognormal:15:0.3", help="fake Pinecone query latency")
+    r.add_argument("--error-rate", type=float, default=0.0, help="fake Pinecone 503 probability per call")
+    r.add_argument("--unique-questions", action="store_true", help="defeat the answer cache/shortcuts")
+    r.add_argument("--users", type=int, default=4)
+    r.add_argument("--sessions", type=int, default=32)
+    r.add_argument("--claim-pool", type=int, default=2000, help="guest sessions created for claim")
+    r.add_argument("--timeout", type=float, default=30.0)
+    r.add_argument("--seed", type=int, default=0)
+    r.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                   help="app setting override (repeatable), e.g. --env SEARCH_MODE=hybrid")
+    r.add_argument("--out", help="write JSON here instead of stdout")
+    r.set_defaults(func=cmd_run)
+
+    c = sub.add_parser("compare", help="flag regressions between two result files")
+    c.add_argument("baseline")
+    c.add_argument("candidate")
+    c.add_argument("--threshold", type=float, help="one relative threshold for every metric")
+    c.add_argument("--error-rate-delta", type=float, default=cmp.DEFAULT_ERROR_RATE_DELTA)
+    c.add_argument("--json", action="store_true", help="also print the rows as JSON")
+    c.set_defaults(func=cmd_compare)
+
+    args = p.parse_args(argv)
+    if args.cmd == "run":
+        unknown = set(args.scenarios) - {"chat", "history", "login", "claim"}
+        if unknown:
+            p.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+# bench/compare.py
+"""Compare two result files (baseline vs candidate) and flag regressions."""
+import json
+from typing import Any, Dict, List, Tuple
+
+# relative growth that counts as a regression, per metric
+DEFAULT_THRESHOLDS = {"p50": 0.10, "p95": 0.15, "p99": 0.20, "throughput_rps": 0.10}
+# absolute error-rate increase (percentage points / 100)
+DEFAULT_ERROR_RATE_DELTA = 0.01
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _pct(old: float, new: float) -> float:
+    return (new - old) / old if old else 0.0
+
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any],
+            thresholds: Dict[str, float] = DEFAULT_THRESHOLDS,
+            error_rate_delta: float = DEFAULT_ERROR_RATE_DELTA) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Rows per (scenario, metric) present in both files; a row is a regression when
+    latency grows / throughput drops beyond its threshold or the error rate rises.
+    """
+    rows: List[Dict[str, Any]] = []
+    base_runs = baseline.get("results", {})
+    for scenario, cand in candidate.get("results", {}).items():
+        base = base_runs.get(scenario)
+        if base is None:
+            continue
+        for metric in ("p50", "p95", "p99"):
+            old, new = base["latency_ms"].get(metric), cand["latency_ms"].get(metric)
+            if old is None or new is None:
+                continue
+            change = _pct(old, new)
+            rows.append({"scenario": scenario, "metric": f"{metric}_ms", "baseline": old, "candidate": new,
+                         "change": round(change, 4), "regression": change > thresholds[metric]})
+        old, new = base["throughput_rps"], cand["throughput_rps"]
+        change = _pct(old, new)
+        rows.append({"scenario": scenario, "metric": "throughput_rps", "baseline": old, "candidate": new,
+                     "change": round(change, 4), "regression": -change > thresholds["throughput_rps"]})
+        old, new = base["error_rate"], cand["error_rate"]
+        rows.append({"scenario": scenario, "metric": "error_rate", "baseline": old, "candidate": new,
+                     "change": round(new - old, 4), "regression": new - old > error_rate_delta})
+    return rows, any(r["regression"] for r in rows)
+
+
+def format_table(rows: List[Dict[str, Any]]) -> str:
+    lines = [f"{'scenario':<12} {'metric':<15} {'baseline':>10} {'candidate':>10} {'change':>9}"]
+    for r in rows:
+        change = f"{r['change']:+.4f}" if r["metric"] == "error_rate" else f"{r['change'] * 100:+.1f}%"
+        flag = "  REGRESSION" if r["regression"] else ""
+        lines.append(f"{r['scenario']:<12} {r['metric']:<15} {r['baseline']:>10} {r['candidate']:>10} "
+                     f"{change:>9}{flag}")
+    return "\n".join(lines)
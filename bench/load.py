@@ -0,0 +1,129 @@
+# bench/load.py
+"""
+Load generators.
+- closed loop: N clients, each sends its next request when the previous one returns
+  (throughput is an output; latency hides queueing).
+- open loop: requests arrive at a fixed rate regardless of completions; latency is
+  measured from the *scheduled* send time, so a stalled server can't slow the
+  arrivals down and hide its own queueing (coordinated omission).
+"""
+import asyncio
+import math
+import random
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+Op = Callable[[], Awaitable[httpx.Response]]
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies_ms: List[float] = []
+        self.statuses: Counter = Counter()
+        self.errors = 0
+        self.dropped = 0
+        self.started = 0.0
+        self.finished = 0.0
+
+    def add(self, t0: float, status: Optional[int]) -> None:
+        self.latencies_ms.append((time.perf_counter() - t0) * 1000)
+        if status is None or status >= 400:
+            self.errors += 1
+        self.statuses[str(status) if status is not None else "exception"] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        lat = sorted(self.latencies_ms)
+        n = len(lat)
+        elapsed = max(self.finished - self.started, 1e-9)
+        attempted = n + self.dropped
+        return {
+            "requests": n,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "error_rate": round((self.errors + self.dropped) / attempted, 4) if attempted else 0.0,
+            "throughput_rps": round((n - self.errors) / elapsed, 2),
+            "duration_s": round(elapsed, 3),
+            "latency_ms": {
+                "mean": round(sum(lat) / n, 2) if n else None,
+                "p50": percentile(lat, 50),
+                "p95": percentile(lat, 95),
+                "p99": percentile(lat, 99),
+                "max": round(lat[-1], 2) if n else None,
+            },
+            "statuses": dict(self.statuses),
+        }
+
+
+def percentile(sorted_values: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    k = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return round(sorted_values[k], 2)
+
+
+async def _timed(op: Op, rec: Recorder, t0: float) -> None:
+    try:
+        r = await op()
+        status: Optional[int] = r.status_code
+    except httpx.HTTPError:
+        status = None
+    rec.add(t0, status)
+
+
+async def closed_loop(op: Op, concurrency: int, duration_s: float, warmup_s: float = 0.0) -> Recorder:
+    rec = Recorder()
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    measure_from = start + warmup_s
+    stop = measure_from + duration_s
+
+    async def client() -> None:
+        while loop.time() < stop:
+            t0 = time.perf_counter()
+            if loop.time() < measure_from:
+                try:
+                    await op()
+                except httpx.HTTPError:
+                    pass
+                continue
+            await _timed(op, rec, t0)
+
+    await asyncio.sleep(0)
+    rec.started = time.perf_counter() + warmup_s
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    rec.finished = time.perf_counter()
+    return rec
+
+
+async def open_loop(op: Op, rate: float, duration_s: float, max_inflight: int = 1000,
+                    poisson: bool = False, seed: int = 0) -> Recorder:
+    """
+    Fire `rate` requests/s for duration_s (evenly spaced, or exponential gaps when
+    poisson=True). Arrivals that find max_inflight requests outstanding are dropped
+    and counted as errors.
+    """
+    rec = Recorder()
+    rng = random.Random(seed)
+    inflight: set = set()
+    rec.started = time.perf_counter()
+    next_at = rec.started
+    end = rec.started + duration_s
+    while next_at < end:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(inflight) >= max_inflight:
+            rec.dropped += 1
+        else:
+            task = asyncio.create_task(_timed(op, rec, next_at))
+            inflight.add(task)
+            task.add_done_callback(inflight.discard)
+        next_at += rng.expovariate(rate) if poisson else 1.0 / rate
+    if inflight:
+        await asyncio.gather(*inflight)
+    rec.finished = time.perf_counter()
+    return rec
@@ -0,0 +1,117 @@
+# bench/scenarios.py
+"""
+Workloads. setup() runs once before the clock starts (users, tokens, sessions);
+each scenario's op() issues exactly one timed request and returns the response.
+"""
+import itertools
+import random
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+import httpx
+
+PASSWORD = "bench-password"
+
+# FAQ questions (shortcut/cache hits), rewordings (vector path) and off-topic (no_match)
+QUESTIONS = [
+    "How do I create a new account?",
+    "How do I delete my account?",
+    "Can I change my email after registering?",
+    "how can i remove my account permanently",
+    "what should I do if the verification email never arrived",
+    "is there a way to update the email on my profile",
+    "which payment methods do you accept",
+    "how do I reset my password",
+    "what is the weather in Lisbon tomorrow",
+    "recommend me a pizza place",
+]
+
+
+class Context:
+    def __init__(self, client: httpx.AsyncClient, seed: int = 0, unique_questions: bool = False):
+        self.client = client
+        self.rng = random.Random(seed)
+        self.unique_questions = unique_questions
+        self.users: List[Dict[str, str]] = []
+        self.tokens: List[str] = []
+        self.chat_sessions: List[str] = []
+        self.claim_pool: List[str] = []
+        self.claimed: List[Tuple[str, str]] = []    # (session id, token that owns it)
+        self._seq = itertools.count()
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        One retry when a pooled keep-alive connection turns out to be closed (uvicorn
+        drops the connection after an unhandled 500), like browsers do; anything
+        else propagates and is counted as a failed request.
+        """
+        try:
+            return await self.client.request(method, url, **kwargs)
+        except (httpx.ReadError, httpx.RemoteProtocolError):
+            return await self.client.request(method, url, **kwargs)
+
+    def question(self) -> str:
+        q = self.rng.choice(QUESTIONS)
+        # a per-request suffix defeats the answer cache (and the exact-match shortcut)
+        return f"{q} #{next(self._seq)}" if self.unique_questions else q
+
+
+async def _new_session(ctx: Context) -> str:
+    r = await ctx.request("POST", "/api/sessions", json={})
+    r.raise_for_status()
+    return r.json()["id"]
+
+
+async def setup(ctx: Context, scenarios: List[str], users: int = 4, sessions: int = 32,
+                claim_pool: int = 2000) -> None:
+    for i in range(users):
+        email = f"bench-user-{i}@example.com"
+        await ctx.request("POST", "/api/auth/register", json={"email": email, "password": PASSWORD})
+        r = await ctx.request("POST", "/api/auth/login", json={"email": email, "password": PASSWORD})
+        r.raise_for_status()
+        ctx.users.append({"email": email, "password": PASSWORD})
+        ctx.tokens.append(r.json()["access_token"])
+    if "chat" in scenarios or "history" in scenarios:
+        for _ in range(sessions):
+            sid = await _new_session(ctx)
+            ctx.chat_sessions.append(sid)
+            # history has something to page through (best effort: faults may be injected)
+            try:
+                await ctx.request("POST", "/api/chat", json={"sessionId": sid, "message": ctx.question()})
+            except httpx.HTTPError:
+                pass
+    if "claim" in scenarios:
+        ctx.claim_pool = [await _new_session(ctx) for _ in range(claim_pool)]
+
+
+async def op_chat(ctx: Context) -> httpx.Response:
+    sid = ctx.rng.choice(ctx.chat_sessions)
+    return await ctx.request("POST", "/api/chat", json={"sessionId": sid, "message": ctx.question()})
+
+
+async def op_history(ctx: Context) -> httpx.Response:
+    sid = ctx.rng.choice(ctx.chat_sessions)
+    return await ctx.request("GET", "/api/history", params={"sessionId": sid})
+
+
+async def op_login(ctx: Context) -> httpx.Response:
+    u = ctx.rng.choice(ctx.users)
+    return await ctx.request("POST", "/api/auth/login", json=u)
+
+
+async def op_claim(ctx: Context) -> httpx.Response:
+    # fresh guest sessions while the pool lasts, then re-claims by the owner (same lookup, no write)
+    if ctx.claim_pool:
+        sid, token = ctx.claim_pool.pop(), ctx.rng.choice(ctx.tokens)
+        ctx.claimed.append((sid, token))
+    else:
+        sid, token = ctx.rng.choice(ctx.claimed)
+    return await ctx.request("POST", "/api/sessions/claim", json={"sessionIds": [sid]},
+                             headers={"Authorization": f"Bearer {token}"})
+
+
+SCENARIOS: Dict[str, Callable[[Context], Awaitable[httpx.Response]]] = {
+    "chat": op_chat,
+    "history": op_history,
+    "login": op_login,
+    "claim": op_claim,
+}
@@ -0,0 +1,79 @@
+# bench/server.py
+"""
+Start the API in-process (uvicorn on a thread) with PINECONE_CLIENT=fake (offline
+Pinecone stand-in, injected latency via FAKE_PINECONE_*) and a temp SQLite DB.
+"""
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+
+def bench_env(workdir: str, overrides: Dict[str, str]) -> Dict[str, str]:
+    env = {
+        "PINECONE_CLIENT": "fake",
+        "PINECONE_HOST": "bench",
+        "VECTOR_BACKEND": "pinecone",
+        "DATABASE_URL": f"sqlite:///{workdir}/bench.db",
+        "INDEX_GENERATION_FILE": f"{workdir}/index_generation",
+        "ACTIVE_INDEX_FILE": f"{workdir}/active_index.json",
+        "LOCAL_INDEX_PATH": f"{workdir}/faq_index",
+        "FAQ_ALIASES_PATH": f"{workdir}/faq_aliases.json",
+        "ADMIN_EMAILS": "bench-admin@example.com",
+        "LOG_LEVEL": "WARNING",
+        "TRACE_SLOW_MS": "0",
+    }
+    env.update(overrides)
+    return env
+
+
+class BenchServer:
+    def __init__(self, env: Optional[Dict[str, str]] = None):
+        self.overrides = dict(env or {})
+        self._tmp = tempfile.TemporaryDirectory(prefix="rag-bench-")
+        self.env = bench_env(self._tmp.name, self.overrides)
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+        self.base_url = ""
+
+    def start(self, timeout: float = 30.0) -> "BenchServer":
+        # env first: the app reads its configuration at import time
+        os.environ.update(self.env)
+        if str(SRC) not in sys.path:
+            sys.path.insert(0, str(SRC))
+        import uvicorn
+        from app.main import app
+
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, name="bench-uvicorn", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if not self._thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("bench server failed to start")
+            time.sleep(0.05)
+        self.base_url = f"http://127.0.0.1:{port}"
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+        self._tmp.cleanup()
+
+    def __enter__(self) -> "BenchServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,21 @@
+# src/app/api/deps/pagination.py
+from typing import Optional
+from fastapi import HTTPException, Query, Response, status
+
+from app.core.pagination import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT, Page, PageParams
+
+def page_params(
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    after: Optional[str] = Query(None, description="Opaque cursor: items after this one"),
+    before: Optional[str] = Query(None, description="Opaque cursor: items before this one"),
+) -> PageParams:
+    if after and before:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Use either 'after' or 'before', not both")
+    return PageParams(limit=limit, after=after, before=before)
+
+def set_page_headers(response: Response, page: Page) -> None:
+    """List endpoints keep a plain JSON array body; cursors travel in headers."""
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    if page.prev_cursor:
+        response.headers["X-Prev-Cursor"] = page.prev_cursor
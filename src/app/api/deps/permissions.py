@@ -2,11 +2,12 @@
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.domain.schemas import ChatRequest
 
 from app.api.deps.auth import get_current_user, get_current_user_optional
-from app.db.dependencies import get_db
+from app.db.dependencies import get_db, get_async_db, get_async_read_db
 from app.domain.models import User, Session as SessionModel
 from app.core.config import settings
 
@@ -51,12 +52,7 @@ def ensure_session_access_owner_or_anon(
         return sess
     raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
 
-def verify_chat_access(
-    req: ChatRequest,                                # <-- lê o BODY (sessionId)
-    db: Session = Depends(get_db),
-    user: Optional[User] = Depends(get_current_user_optional),
-) -> SessionModel:
-    sess = db.get(SessionModel, req.sessionId)
+def _check_session_access(sess: Optional[SessionModel], user: Optional[User]) -> SessionModel:
     if not sess:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found.")
 
@@ -71,18 +67,16 @@ def verify_chat_access(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
     return sess
 
-def verify_session_access_by_query(
+async def verify_chat_access(
+    req: ChatRequest,                                # <-- lê o BODY (sessionId)
+    db: AsyncSession = Depends(get_async_db),
+    user: Optional[User] = Depends(get_current_user_optional),
+) -> SessionModel:
+    return _check_session_access(await db.get(SessionModel, req.sessionId), user)
+
+async def verify_session_access_by_query(
     sessionId: str,                                  # <-- lê QUERY param
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),   # rotas de leitura (mesma sessão do handler)
     user: Optional[User] = Depends(get_current_user_optional),
 ) -> SessionModel:
-    sess = db.get(SessionModel, sessionId)
-    if not sess:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found.")
-    if sess.user_id is None:
-        return sess
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Authentication required")
-    if user.id != sess.user_id and not _is_admin(user):
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
-    return sess
\ No newline at end of file
+    return _check_session_access(await db.get(SessionModel, sessionId), user)
\ No newline at end of file
@@ -1,17 +1,21 @@
 # src/app/api/routes/auth.py
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy import select
 from pydantic import BaseModel, EmailStr
 
-from app.db.dependencies import get_db
+from app.db.dependencies import get_async_db
 from app.domain.models import User
 from app.domain.schemas import UserPublic
 from app.core.jwt import create_access_token
-from app.core.security import hash_password, verify_password as verify_hash
+from app.core.logging import get_logger
+from app.core.password_pool import password_hasher
+from app.core.security import needs_rehash
 from app.api.deps.permissions import require_user
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
+log = get_logger("rag.auth")
 
 class RegisterRequest(BaseModel):
     email: EmailStr
@@ -27,19 +31,19 @@ class LoginResponse(BaseModel):
     user: UserPublic
 
 @router.post("/login", response_model=LoginResponse)
-def login(payload: LoginRequest, db: Session = Depends(get_db)):
-    user = db.scalars(select(User).where(User.email == payload.email)).first()
+async def login(payload: LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    user = (await db.scalars(select(User).where(User.email == payload.email))).first()
 
-    def _matches(plain, stored):
-        if not stored:
-            return False
-        if "$" in stored:
-            return verify_hash(plain, stored)
-        return plain == stored
-
-    if not user or not _matches(payload.password, user.password):
+    # PBKDF2 roda no pool de processos (503 se saturado), nunca no event loop / threadpool
+    if not user or not await password_hasher.verify(payload.password, user.password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password")
 
+    if needs_rehash(user.password):
+        # senha em texto puro ou com menos iterações: regrava com o formato atual
+        user.password = await password_hasher.hash(payload.password)
+        await db.commit()
+        log.info(f"password rehashed on login | user={user.id}")
+
     token = create_access_token({"sub": user.id})
     return LoginResponse(access_token=token, user=UserPublic(id=user.id, email=user.email))
 
@@ -48,12 +52,15 @@ def me(current_user: User = Depends(require_user)):
     return UserPublic(id=current_user.id, email=current_user.email)
 
 @router.post("/register", response_model=UserPublic, status_code=status.HTTP_201_CREATED)
-def register(payload: RegisterRequest, db: Session = Depends(get_db)):
-    existing = db.scalars(select(User).where(User.email == payload.email)).first()
+async def register(payload: RegisterRequest, db: AsyncSession = Depends(get_async_db)):
+    existing = (await db.scalars(select(User).where(User.email == payload.email))).first()
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered.")
-    user = User(email=payload.email, password=hash_password(payload.password))
+    user = User(email=payload.email, password=await password_hasher.hash(payload.password))
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    try:
+        await db.commit()
+    except IntegrityError:  # corrida entre dois registros do mesmo email
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Email already registered.")
     return UserPublic(id=user.id, email=user.email)
\ No newline at end of file
@@ -1,28 +1,157 @@
 # src/app/api/routes/chat.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import asyncio
+import json
+from typing import Any, AsyncIterator, List, Optional, Sequence, Set, Tuple
+from fastapi import APIRouter, Depends, Header, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.dependencies import get_db
-from app.repositories import db as repo
+from app.core.logging import get_logger
+from app.db.async_session import AsyncSessionLocal
+from app.db.dependencies import get_async_db, get_async_read_db
+from app.repositories import async_db as repo
+from app.repositories.write_behind import write_behind
+from app.domain.models import Session as SessionModel
 from app.domain.schemas import ChatRequest, ChatHistoryResponse, ChatMessage
 from app.services.chat_service import chat_service
 from app.api.deps.permissions import verify_chat_access, verify_session_access_by_query
+from app.api.deps.pagination import page_params
+from app.core.pagination import Page, PageParams
 
 router = APIRouter(prefix="/api")
+log = get_logger("rag.chat.stream")
+
+def _history(session_id: str, page: Page, version: Optional[int] = None) -> ChatHistoryResponse:
+    return ChatHistoryResponse(
+        sessionId=session_id,
+        messages=[ChatMessage(role=m.role, content=m.content) for m in page.items],
+        prevCursor=page.prev_cursor,
+        nextCursor=page.next_cursor,
+        version=version,
+    )
+
+def _etag(version: int) -> str:
+    return f'W/"v{version}"'
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = {t.strip() for t in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+async def _persist_turn(db: Optional[AsyncSession], session_id: str,
+                        items: Sequence[Tuple[str, str]]) -> List[Any]:
+    """User + assistant in one transaction; batched with other turns when write-behind is on."""
+    if write_behind is not None:
+        return await write_behind.asubmit_turn(session_id, items)
+    if db is not None:
+        return await repo.append_turn(db, session_id, items)
+    # sessão própria: a do request já foi fechada quando o stream roda
+    async with AsyncSessionLocal() as own:
+        return await repo.append_turn(own, session_id, items)
 
 @router.post("/chat", response_model=ChatHistoryResponse, dependencies=[Depends(verify_chat_access)])
-def chat(req: ChatRequest, db: Session = Depends(get_db)):
+async def chat(req: ChatRequest, db: AsyncSession = Depends(get_async_db)):
     # se chegou aqui, o acesso (dono/admin/anônimo) já foi validado
-    repo.append_message(db, session_id=req.sessionId, role="user", content=req.message)
-    reply_msg = chat_service.answer_with_rag(req.message)
-    repo.append_message(db, session_id=req.sessionId, role="assistant", content=reply_msg.content)
-
-    rows = repo.list_messages(db, session_id=req.sessionId)
-    history = [ChatMessage(role=m.role, content=m.content) for m in rows]
-    return ChatHistoryResponse(sessionId=req.sessionId, messages=history)
-
-@router.get("/history", response_model=ChatHistoryResponse, dependencies=[Depends(verify_session_access_by_query)])
-def get_history(sessionId: str, db: Session = Depends(get_db)):
-    rows = repo.list_messages(db, session_id=sessionId)
-    history = [ChatMessage(role=m.role, content=m.content) for m in rows]
-    return ChatHistoryResponse(sessionId=sessionId, messages=history)
+    reply_msg = await chat_service.aanswer_with_rag(req.message)
+    user_msg, bot_msg = await _persist_turn(
+        db, req.sessionId, [("user", req.message), ("assistant", reply_msg.content)]
+    )
+
+    if req.mode == "delta":
+        # só o que este turno acrescentou: sem releitura da conversa
+        return _history(req.sessionId, Page(items=[user_msg, bot_msg]), version=bot_msg.version)
+
+    # modo "full": conversa inteira, como sempre foi (clientes que paginam usam delta + /api/history)
+    rows = await repo.list_messages(db, req.sessionId)
+    return _history(req.sessionId, Page(items=rows), version=bot_msg.version)
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+# turns being answered/persisted for /chat/stream, detached from their connections
+_stream_tasks: Set["asyncio.Task[None]"] = set()
+
+async def _run_turn(req: ChatRequest, out: "asyncio.Queue[Optional[str]]") -> None:
+    """
+    Answer + persist one streamed turn. Runs in its own task: a client that goes
+    away mid-stream only stops reading `out`, the turn is still written.
+    """
+    parts = []
+    try:
+        async for event, data in chat_service.astream_answer(req.message):
+            if event == "chunk":
+                parts.append(data["text"])
+            out.put_nowait(_sse(event, data))
+        # the whole turn is written once, after the last chunk
+        _, bot_msg = await _persist_turn(
+            None, req.sessionId, [("user", req.message), ("assistant", "".join(parts))]
+        )
+        out.put_nowait(_sse("done", {"messageId": bot_msg.id, "version": bot_msg.version}))
+    except Exception:
+        # detalhes só no log; o cliente recebe uma mensagem genérica
+        log.exception(f"/api/chat/stream failed | session={req.sessionId}")
+        out.put_nowait(_sse("error", {"detail": "Chat turn failed"}))
+    finally:
+        out.put_nowait(None)
+
+async def _stream_turn(req: ChatRequest) -> AsyncIterator[str]:
+    out: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+    task = asyncio.create_task(_run_turn(req, out))
+    _stream_tasks.add(task)
+    task.add_done_callback(_stream_tasks.discard)
+    while (item := await out.get()) is not None:
+        yield item
+
+async def drain_stream_turns() -> None:
+    """Shutdown: let streamed turns whose clients already left finish persisting."""
+    if _stream_tasks:
+        await asyncio.gather(*list(_stream_tasks), return_exceptions=True)
+
+@router.post("/chat/stream", dependencies=[Depends(verify_chat_access)])
+async def chat_stream(req: ChatRequest):
+    """
+    Server-Sent Events version of /api/chat. Events, in order:
+    - matches: ids/scores that passed the confidence threshold
+    - chunk:   pieces of the answer (header, one per context block, footer); concatenate them
+    - done:    {"messageId", "version"} once the assistant message is persisted
+    - error:   {"detail"} if the turn failed
+    """
+    return StreamingResponse(
+        _stream_turn(req),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/history", response_model=ChatHistoryResponse)
+async def get_history(
+    sessionId: str,
+    response: Response,
+    since_version: Optional[int] = Query(None, ge=0, description="Only messages appended after this version"),
+    if_none_match: Optional[str] = Header(None),
+    params: PageParams = Depends(page_params),
+    sess: SessionModel = Depends(verify_session_access_by_query),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """
+    Conditional GET: the session row (already loaded by the access check) carries the
+    current version, so an unchanged conversation answers 304 without touching messages.
+    """
+    version = sess.version or 0
+    if write_behind is not None and write_behind.has_pending(sessionId):
+        # a turn of this session is still in the write-behind queue: wait for it
+        await write_behind.await_session(sessionId)
+        version = await repo.get_session_version(db, sessionId) or 0
+    etag = _etag(version)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(if_none_match, etag) or (since_version is not None and since_version >= version):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+
+    if since_version is not None:
+        rows = await repo.list_messages_since(db, sessionId, since_version, params.limit)
+        # se houver mais que `limit`, o cliente continua a partir da última versão recebida
+        return _history(sessionId, Page(items=rows), version=rows[-1].version if rows else version)
+
+    page = await repo.page_messages(db, sessionId, params)
+    return _history(sessionId, page, version=version)
@@ -1,12 +1,22 @@
 from fastapi import APIRouter, Query, HTTPException, Depends
 from app.services.vector_client import (
-    search, EMBED_MODEL, PINECONE_HOST, NAMESPACE, index, embed_query, pc,
-    INDEX_DIM, adjust_dim
+    search, EMBED_MODEL, PINECONE_HOST, PINECONE_CLIENT, NAMESPACE, get_index, embed_query,
+    active_target, embedding_cache
 )
+from app.services.vector_store import as_list, fit_dim
 from typing import Optional, Any
 from fastapi.responses import JSONResponse
 import traceback
 from app.api.deps.permissions import require_admin
+from app.services.chat_service import chat_service
+from app.services.question_shortcuts import synced_question_shortcuts
+from app.services.index_state import current_generation, bump_generation
+from app.core.config import settings
+from app.db.session import engine
+from app.db.async_session import async_engine
+from app.db.replica import read_engine, async_read_engine, recent_writes, replica_copier
+from app.db.engine import pool_status, sqlite_pragmas
+from sqlalchemy import text
 
 
 router = APIRouter(
@@ -16,13 +26,16 @@ router = APIRouter(
 
 
 @router.get("/pinecone")
-def debug_pinecone(q: str = Query(..., description="Query text")):
+def debug_pinecone(q: str = Query(..., description="Query text"),
+                   mode: Optional[str] = Query(None, pattern="^(vector|hybrid)$",
+                                               description="Override SEARCH_MODE")):
     """
     Returns raw matches so you can verify scores and metadata.
     """
-    matches = search(q, top_k=5)
+    matches = search(q, top_k=5, mode=mode)
     return {
-        "host": PINECONE_HOST,
+        "host": active_target().host,
+        "client": PINECONE_CLIENT,
         "model": EMBED_MODEL,
         "matches": matches
     }
@@ -35,14 +48,101 @@ def debug_embedding(q: str = Query(...)):
         "model": EMBED_MODEL,
         "len": len(vec),
         "sample": vec[:5],
-        "host": PINECONE_HOST,
+        "host": active_target().host,
         "namespace": NAMESPACE
     }
 
+@router.get("/cache")
+def debug_cache(clear: bool = Query(False, description="Drop all entries after reading stats")):
+    """
+    Hit/miss/eviction counters of the in-process caches.
+    """
+    stats = {
+        "index_generation": current_generation(),
+        "embeddings": embedding_cache.stats(),
+        "answers": chat_service.answer_cache.stats(),
+        "shortcuts": synced_question_shortcuts().stats(),
+    }
+    if clear:
+        embedding_cache.clear()
+        chat_service.answer_cache.clear()
+    return stats
+
+@router.get("/db")
+def debug_db():
+    """
+    Pool occupancy and counters (checkouts, waits on a saturated pool, overflow)
+    for the sync and async engines; for SQLite also the pragmas actually in effect.
+    """
+    out = {
+        "backend": engine.url.get_backend_name(),
+        "url": engine.url.render_as_string(hide_password=True),
+        "sync_pool": pool_status(engine),
+        "async_pool": pool_status(async_engine.sync_engine),
+    }
+    if read_engine is not engine:
+        out["replica"] = {
+            "url": read_engine.url.render_as_string(hide_password=True),
+            "sync_pool": pool_status(read_engine),
+            "async_pool": pool_status(async_read_engine.sync_engine),
+            "sticky_keys": len(recent_writes),
+            "copies": replica_copier.copies if replica_copier else None,
+        }
+    if out["backend"] == "sqlite":
+        with engine.connect() as conn:
+            out["pragmas"] = {
+                name: conn.execute(text(f"PRAGMA {name}")).scalar()
+                for name in sqlite_pragmas(settings)
+            }
+    return out
+
+@router.get("/breakers")
+def debug_breakers():
+    """Bulkhead occupancy and circuit-breaker state per remote vector dependency, plus search coalescing
+    and embedding micro-batching."""
+    from app.services import vector_client
+    from app.services.chat_service import CHAT_DEADLINE_MS, DEGRADED_MODE
+    return {
+        "deadline_ms": CHAT_DEADLINE_MS,
+        "degraded_mode": DEGRADED_MODE,
+        "dependencies": {name: dep.stats() for name, dep in vector_client.dependencies.items()},
+        "coalescing": vector_client.coalescing_stats(),
+        "embed_batching": vector_client.embed_batching_stats(),
+    }
+
+
+@router.post("/breakers/reset")
+def reset_breakers():
+    from app.services import vector_client
+    for dep in vector_client.dependencies.values():
+        dep.breaker.reset()
+    return debug_breakers()
+
+
+@router.get("/pinecone-fake")
+def debug_pinecone_fake():
+    """Injected latency/error settings and call counters of the offline stand-in."""
+    from app.services import vector_client
+    if vector_client.PINECONE_CLIENT != "fake":
+        return {"enabled": False}
+    vector_client.get_client()
+    return {"enabled": True, **vector_client._faults.stats()}
+
+
+@router.get("/local-index")
+def debug_local_index():
+    """Local vector snapshot: count, dim, storage dtype, bytes and whether it is memory-mapped."""
+    from app.services import vector_client
+    local = vector_client.synced_local_index()
+    if local is None:
+        return {"loaded": False, "path": vector_client.LOCAL_INDEX_PATH}
+    return {"loaded": True, "backend": vector_client.backend.name, **local.stats()}
+
+
 @router.get("/stats")
 def debug_stats():
     # sem namespace => retorna mapa por namespace
-    stats = index.describe_index_stats()
+    stats = get_index().describe_index_stats()
     return stats
 
 
@@ -58,8 +158,9 @@ def pinecone_raw(
     """
     try:
         # Generate embedding for the given query
-        vec_raw = embed_query(q)                       # usually 1024
-        vec = adjust_dim(vec_raw, INDEX_DIM)           # turn 1536
+        target = active_target()
+        vec_raw = embed_query(q)                                  # model output (1024)
+        vec = as_list(fit_dim(vec_raw, target.dimension))         # active index dimension
 
         # Build query parameters
         kwargs = {"vector": vec, "top_k": top_k, "include_metadata": True}
@@ -67,7 +168,7 @@ def pinecone_raw(
             kwargs["namespace"] = ns or NAMESPACE
 
         # Execute Pinecone query
-        res = index.query(**kwargs)
+        res = get_index(target.host).query(**kwargs)
 
         try:
             if hasattr(res, "model_dump") and callable(res.model_dump):
@@ -92,7 +193,7 @@ def pinecone_raw(
 
         return JSONResponse(
             content={
-                "host": PINECONE_HOST,
+                "host": target.host,
                 "model": EMBED_MODEL,
                 "namespace_used": kwargs.get("namespace", "(none)"),
                 "top_k": top_k,
@@ -109,7 +210,7 @@ def pinecone_raw(
 @router.get("/debug/pinecone-stats")
 def pinecone_stats():
     try:
-        idx = pc.Index(host=PINECONE_HOST)  # same host configured
+        idx = get_index()  # same host configured
         stats = idx.describe_index_stats()
         # Resumo amigável
         ns = stats.get("namespaces", {}) or {}
@@ -203,14 +304,14 @@ def pinecone_smoke():
     Smoke test do Pinecone: describe -> upsert 1 vetor -> query. 
     """
     try:
-        if not PINECONE_HOST:
+        if not PINECONE_HOST and PINECONE_CLIENT != "fake":
             return {
                 "ok": False,
                 "error": "PINECONE_HOST not configured.",
                 "hint": "Define PINECONE_HOST=URL from service at index (svc.ap-...pinecone.io)."
             }
 
-        idx = pc.Index(host=PINECONE_HOST)
+        idx = get_index()
 
         # 1) Stats (validate conection + dimension)
         stats_raw = idx.describe_index_stats()
@@ -233,6 +334,7 @@ def pinecone_smoke():
             vectors=[{"id": "smoke-vec", "values": vec, "metadata": {"src": "smoke"}}],
             namespace=ns,
         )
+        bump_generation("pinecone_smoke")
         up = _to_plain(up_raw)
         up_d = _coerce_dict(up)
         upserted_count = up_d.get("upserted_count")
@@ -259,7 +361,7 @@ def pinecone_smoke():
 
         return {
             "ok": True,
-            "host": PINECONE_HOST,
+            "host": active_target().host,
             "namespace_used": ns,
             "stats_before": stats,
             "upsert_result": {"upserted_count": upserted_count},
@@ -273,7 +375,7 @@ def pinecone_smoke():
             "error": str(e),
             "traceback": traceback.format_exc(),
             "context": {
-                "host": PINECONE_HOST,
+                "host": active_target().host,
                 "namespace": NAMESPACE or "default"
             }
         }
\ No newline at end of file
@@ -1,70 +1,170 @@
 # src/app/api/routes/ingest.py
-from fastapi import APIRouter, Query, Depends
+from fastapi import APIRouter, Query, Depends, HTTPException
+from sqlalchemy.orm import Session
 from typing import List
 import traceback
 from app.api.routes.debug import _to_plain, _coerce_dict
 
-from app.services.vector_client import pc, PINECONE_HOST, NAMESPACE, embed_query
+from app.db.dependencies import get_db
+from app.services import vector_client
+from app.services.vector_client import (
+    get_index, NAMESPACE, EMBED_MODEL, EMBED_DIM, embed_query, embed_documents
+)
+from app.services.ingest_pipeline import IngestDoc, IngestStats, run_ingest, EMBED_BATCH_SIZE, INGEST_WORKERS
+from app.services.ingest_manifest import IngestPlan, plan_ingest, record_upserted, record_removed
 from app.api.routes.debug import _to_plain, _coerce_dict, _safe_get_dimension
+from app.services.index_state import bump_generation, record_ingested
+from app.services import index_migration
+from app.services.vector_store import as_list, fit_dim
 from app.data.faq_seed import FAQ_ENTRIES
 from app.api.deps.permissions import require_admin, User
 
 router = APIRouter(prefix="/api/ingest", tags=["ingest"])
 
-def _adjust_to_dim(vec: List[float], target: int) -> List[float]:
-    """Pad (or cut) an embedding to 'target' dimensions."""
-    n = len(vec)
-    if n == target:
-        return vec
-    if n > target:
-        return vec[:target]
-    return vec + [0.0] * (target - n)
+def _faq_document(entry: dict) -> str:
+    return f"{entry['category']}\nQ: {entry['question']}\nA: {entry['answer']}"
+
+
+def _faq_docs() -> List[IngestDoc]:
+    return [
+        IngestDoc(
+            id=entry["id"],
+            text=_faq_document(entry),
+            metadata={
+                "category": entry["category"],
+                "question": entry["question"],
+                "answer": entry["answer"],
+            },
+        )
+        for entry in FAQ_ENTRIES
+    ]
+
+
+def _pipeline_kwargs(batch_size: int, embed_batch_size: int, workers: int) -> dict:
+    return {
+        "embed_fn": embed_documents,
+        "upsert_batch_size": batch_size,
+        "embed_batch_size": embed_batch_size,
+        "workers": workers,
+    }
+
+
+def _sync_delta(db: Session, ns: str, plan: IngestPlan, dimension: int, target: str,
+                upsert_fn, delete_fn, shape_fn=lambda v: v, persist_fn=None, **pipeline) -> IngestStats:
+    """
+    Applies a plan: embeds/upserts only new+changed entries, deletes removed ids from
+    the index each one was written to, then records what reached the index in the
+    manifest and the shared corpus file (every worker rebuilds its BM25 index and
+    question shortcuts from it on the generation bump). persist_fn (local snapshot
+    save) runs before the bump, so workers that reload on it read the new snapshot.
+    """
+    stats = run_ingest(plan.to_upsert, upsert_fn=upsert_fn, shape_fn=shape_fn, **pipeline)
+    record_upserted(db, ns, plan, stats.upserted_ids, EMBED_MODEL, dimension, target)
+    upserted = set(stats.upserted_ids)
+    written = [(d.id, d.metadata) for d in plan.to_upsert if d.id in upserted]
+    for written_to, ids in plan.removed_by_target().items():
+        # NULL = written before targets were tracked: assume the current one
+        if written_to is None or written_to == target:
+            delete_fn(ids)
+        else:
+            vector_client.delete_from_target(written_to, ids, ns)
+    record_removed(db, ns, plan.removed)
+    if stats.upserted or plan.removed:
+        if persist_fn is not None:
+            persist_fn()
+        record_ingested(written, plan.removed)
+        bump_generation("ingest_faq")
+    return stats
+
+
+def _ingest_local(db: Session, ns: str, dry_run: bool, full: bool, **pipeline) -> dict:
+    """Embeds FAQ_ENTRIES and writes them (native dimension) to the local backend snapshot."""
+    backend = vector_client.synced_local_index()  # another worker may have saved since
+    target = vector_client.ingest_target()
+    plan = plan_ingest(db, ns, _faq_docs(), EMBED_MODEL, EMBED_DIM, target, full=full)
+    if dry_run:
+        return {"ok": True, "dry_run": True, "backend": backend.name, "namespace_used": ns, "target": target,
+                "diff": plan.as_dict()}
+
+    def persist() -> None:
+        if backend.path:
+            backend.save(backend.path)
+
+    stats = _sync_delta(
+        db, ns, plan, EMBED_DIM, target,
+        upsert_fn=lambda chunk: backend.upsert(chunk, namespace=ns, persist=False),
+        delete_fn=lambda ids: backend.delete(ids, namespace=ns, persist=False),
+        persist_fn=persist,
+        **pipeline,
+    )
+    preview = vector_client.search("How do I create an account?", top_k=5)
+    return {
+        "ok": stats.failed_batches == 0,
+        "backend": backend.name,
+        "namespace_used": ns,
+        "index_dim": backend.dim,
+        "ingested_count": stats.upserted,
+        "diff": plan.as_dict(),
+        "throughput": stats.as_dict(),
+        "preview_matches_for_create_account": [
+            {"id": m["id"], "score": m["score"], "category": (m.get("metadata") or {}).get("category")}
+            for m in preview[:3]
+        ],
+    }
 
 
 @router.post("/faq")
 def ingest_faq(
     namespace: str | None = Query(None),
     batch_size: int = Query(32, ge=1, le=100),
+    embed_batch_size: int = Query(EMBED_BATCH_SIZE, ge=1, le=96),
+    workers: int = Query(INGEST_WORKERS, ge=1, le=32),
+    dry_run: bool = Query(False, description="Only report the diff against the ingest manifest"),
+    full: bool = Query(False, description="Re-embed every entry, ignoring the manifest"),
+    db: Session = Depends(get_db),
     _: User = Depends(require_admin),
 ):
     """
-    🚀 Ingests the synthetic FAQ dataset into Pinecone.
-    Detects index dimension (e.g., 1536) and pads embeddings automatically.
+    🚀 Ingests the synthetic FAQ dataset into the active Pinecone index.
+    Detects the index dimension and shapes embeddings to it (pads only on a
+    legacy 1536-d index; see /dimension and /migrate).
+    Only new/changed entries (per the ingest manifest) are embedded and upserted,
+    and vectors of removed entries are deleted; dry_run just reports the diff.
+    Documents are embedded in batches (input_type='passage') and upserted by a
+    bounded worker pool; the response reports throughput per stage.
+    With VECTOR_BACKEND=local the vectors go to the in-process index snapshot instead.
     """
     try:
         ns = namespace or NAMESPACE or "default"
-        idx = pc.Index(host=PINECONE_HOST)
+        pipeline = _pipeline_kwargs(batch_size, embed_batch_size, workers)
+        if vector_client.backend.name == "local":
+            return _ingest_local(db, ns, dry_run, full, **pipeline)
+        active = vector_client.active_target()
+        target = vector_client.ingest_target(active)
+        idx = get_index(active.host)
 
         # Detect index dimension
         stats_raw = idx.describe_index_stats()
         stats = _to_plain(stats_raw)
         target_dim = _safe_get_dimension(stats, default=1536)
 
-        # Build vectors
-        vectors = []
-        for entry in FAQ_ENTRIES:
-            doc = f"{entry['category']}\nQ: {entry['question']}\nA: {entry['answer']}"
-            emb = embed_query(doc)  # 1024 dims
-            emb_adj = _adjust_to_dim(emb, target_dim)
-            vectors.append({
-                "id": entry["id"],
-                "values": emb_adj,
-                "metadata": {
-                    "category": entry["category"],
-                    "question": entry["question"],
-                    "answer": entry["answer"]
-                }
-            })
-
-        # Upsert in batches
-        total = 0
-        for i in range(0, len(vectors), batch_size):
-            chunk = vectors[i:i+batch_size]
-            idx.upsert(vectors=chunk, namespace=ns)
-            total += len(chunk)
+        plan = plan_ingest(db, ns, _faq_docs(), EMBED_MODEL, target_dim, target, full=full)
+        if dry_run:
+            return {"ok": True, "dry_run": True, "namespace_used": ns, "index_dim": target_dim,
+                    "target": target, "diff": plan.as_dict()}
+
+        # Embed + upsert (batched, overlapped, retried) only what changed
+        ingest_stats = _sync_delta(
+            db, ns, plan, target_dim, target,
+            upsert_fn=lambda chunk: idx.upsert(vectors=chunk, namespace=ns),
+            delete_fn=lambda ids: idx.delete(ids=ids, namespace=ns),
+            shape_fn=lambda emb: as_list(fit_dim(emb, target_dim)),  # no-op on a native-dimension index
+            **pipeline,
+        )
+        total = ingest_stats.upserted
 
         # Sanity check: simple query
-        test_vec = _adjust_to_dim(embed_query("How do I create an account?"), target_dim)
+        test_vec = as_list(fit_dim(embed_query("How do I create an account?"), target_dim))
         qr = idx.query(vector=test_vec, top_k=5, include_metadata=True, namespace=ns)
 
         qr_plain = _to_plain(qr)
@@ -95,10 +195,12 @@ def ingest_faq(
                 })
 
         return {
-            "ok": True,
+            "ok": ingest_stats.failed_batches == 0,
             "namespace_used": ns,
             "index_dim": target_dim,
             "ingested_count": total,
+            "diff": plan.as_dict(),
+            "throughput": ingest_stats.as_dict(),
             "preview_matches_for_create_account": preview[:3],
         }
 
@@ -108,3 +210,52 @@ def ingest_faq(
             "error": str(e),
             "traceback": traceback.format_exc(),
         }
+
+
+@router.get("/dimension")
+def index_dimension(_: User = Depends(require_admin)):
+    """Model vs active index dimension (native / padded / truncated / misconfigured) and migration status."""
+    return index_migration.dimension_report()
+
+
+@router.post("/migrate", status_code=202)
+def migrate_index(
+    index_name: str | None = Query(None, description="Index to create (or reuse) at `dimension`"),
+    host: str | None = Query(None, description="Existing index host instead of index_name"),
+    dimension: int | None = Query(None, ge=1, description="Defaults to the model's native dimension"),
+    namespace: str | None = Query(None),
+    switch: bool = Query(True, description="Switch queries to the new index once verified"),
+    _: User = Depends(require_admin),
+):
+    """
+    Re-embeds the FAQ corpus into a native-dimension index in the background, verifies
+    the vector count and then switches every worker to it. Poll GET /migrate.
+    """
+    if not index_name and not host:
+        raise HTTPException(status_code=422, detail="index_name or host is required")
+    ns = namespace or NAMESPACE or "default"
+    try:
+        return index_migration.start_migration(_faq_docs(), ns, dimension=dimension,
+                                               index_name=index_name, host=host, switch=switch)
+    except index_migration.MigrationInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.get("/migrate")
+def migration_status(_: User = Depends(require_admin)):
+    return {"job": index_migration.current_job()}
+
+
+@router.post("/active-index")
+def switch_active_index(
+    host: str = Query(...),
+    dimension: int = Query(..., ge=1),
+    name: str | None = Query(None),
+    _: User = Depends(require_admin),
+):
+    """Point queries at another index, e.g. back to the previous one after a migration."""
+    try:
+        target = index_migration.switch_to(host, dimension, name=name)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"ok": True, "active_index": {"host": target.host, "dimension": target.dimension, "name": target.name}}
@@ -1,15 +1,19 @@
 # src/app/api/routes/messages.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import Optional
 
-from app.db.dependencies import get_db
+from app.db.dependencies import get_db, get_read_db
 from app.domain.models import Message, Session as SessionModel, User
 from app.domain.schemas import MessageCreate, MessageRead
 from app.api.deps.auth import get_current_user, get_current_user_optional
 from app.api.deps.permissions import require_admin
 from app.core.config import settings
+from app.core.pagination import PageParams
+from app.api.deps.pagination import page_params, set_page_headers
+from app.repositories import db as repo
+from app.repositories.write_behind import write_behind
 
 router = APIRouter(prefix="/api/messages", tags=["messages"])
 
@@ -21,15 +25,21 @@ def _is_admin(user: Optional[User]) -> bool:
 
 @router.get("", response_model=list[MessageRead])
 def list_messages(
-    db: Session = Depends(get_db),
+    response: Response,
+    params: PageParams = Depends(page_params),
+    db: Session = Depends(get_read_db),
     _: User = Depends(require_admin),   # admin-only (como definido na sua matriz)
 ) -> list[Message]:
-    return db.scalars(select(Message)).all()
+    page = repo.page_messages(db, params)
+    set_page_headers(response, page)
+    return page.items
 
 @router.get("/by-session/{session_id}", response_model=list[MessageRead])
 def list_messages_by_session(
     session_id: str,
-    db: Session = Depends(get_db),
+    response: Response,
+    params: PageParams = Depends(page_params),
+    db: Session = Depends(get_read_db),
     current_user: Optional[User] = Depends(get_current_user_optional),  # ✅ opcional (guest permitido)
 ) -> list[Message]:
     sess = db.get(SessionModel, session_id)
@@ -37,16 +47,18 @@ def list_messages_by_session(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found.")
 
     # Sessão anônima → libera por segredo (só saber o session_id)
-    if sess.user_id is None:
-        return db.scalars(select(Message).where(Message.session_id == session_id)).all()
-
     # Sessão com dono → exige dono ou admin
-    if current_user is None:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Authentication required")
-    if current_user.id != sess.user_id and not _is_admin(current_user):
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    if sess.user_id is not None:
+        if current_user is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Authentication required")
+        if current_user.id != sess.user_id and not _is_admin(current_user):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
 
-    return db.scalars(select(Message).where(Message.session_id == session_id)).all()
+    if write_behind is not None:
+        write_behind.wait_session(session_id)  # read-your-writes
+    page = repo.page_messages(db, params, session_id=session_id)
+    set_page_headers(response, page)
+    return page.items
 
 @router.post("", response_model=MessageRead, status_code=status.HTTP_201_CREATED)
 def create_message(
@@ -58,20 +70,11 @@ def create_message(
     if not sess:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found.")
 
-    if sess.user_id is None:
-        message = Message(session_id=payload.session_id, role=payload.role, content=payload.content)
-        db.add(message)
-        db.commit()
-        db.refresh(message)
-        return message
-
-    if current_user is None:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Authentication required")
-    if current_user.id != sess.user_id and not _is_admin(current_user):
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    if sess.user_id is not None:
+        if current_user is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Authentication required")
+        if current_user.id != sess.user_id and not _is_admin(current_user):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
 
-    message = Message(session_id=payload.session_id, role=payload.role, content=payload.content)
-    db.add(message)
-    db.commit()
-    db.refresh(message)
-    return message
\ No newline at end of file
+    # via repo: também incrementa sessions.version
+    return repo.append_message(db, session_id=payload.session_id, role=payload.role, content=payload.content)
\ No newline at end of file
@@ -1,14 +1,17 @@
 # src/app/api/routes/sessions.py
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Body
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import Optional
 
-from app.db.dependencies import get_db
+from app.db.dependencies import get_db, get_read_db
 from app.domain.models import Session as SessionModel, User
 from app.domain.schemas import SessionCreate, SessionRead, ClaimSessionsRequest, ClaimSessionsResponse
 from app.api.deps.auth import get_current_user, get_current_user_optional
 from app.core.config import settings
+from app.core.pagination import PageParams
+from app.api.deps.pagination import page_params, set_page_headers
+from app.repositories import db as repo
 
 router = APIRouter(prefix="/api/sessions", tags=["sessions"])
 
@@ -20,24 +23,32 @@ def _is_admin(user: Optional[User]) -> bool:
 
 @router.get("", response_model=list[SessionRead])
 def list_sessions(
-    db: Session = Depends(get_db),
+    response: Response,
+    params: PageParams = Depends(page_params),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),  # admin-only em outro lugar, se preferir troque por require_admin
 ) -> list[SessionModel]:
     # Se você já tem require_admin, use-o aqui:
     # from app.api.deps.permissions import require_admin
     # def list_sessions(db: Session = Depends(get_db), _: User = Depends(require_admin)) -> list[SessionModel]:
-    return db.scalars(select(SessionModel)).all()
+    page = repo.page_sessions(db, params)
+    set_page_headers(response, page)
+    return page.items
 
 @router.get("/by-user/{user_id}", response_model=list[SessionRead])
 def list_sessions_by_user(
     user_id: str,
-    db: Session = Depends(get_db),
+    response: Response,
+    params: PageParams = Depends(page_params),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ) -> list[SessionModel]:
     # dono ou admin
     if current_user.id != user_id and not _is_admin(current_user):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
-    return db.scalars(select(SessionModel).where(SessionModel.user_id == user_id)).all()
+    page = repo.page_sessions(db, params, user_id=user_id)
+    set_page_headers(response, page)
+    return page.items
 
 @router.post("", response_model=SessionRead, status_code=status.HTTP_201_CREATED)
 def create_session(
@@ -1,29 +1,40 @@
 # src/app/api/routes/users.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.security import hash_password
-from app.db.dependencies import get_db
+from app.core.password_pool import password_hasher
+from app.db.dependencies import get_db, get_async_db
 from app.domain.models import User
 from app.domain.schemas import UserCreate, UserRead
 from app.api.deps.permissions import require_admin
+from app.api.deps.pagination import page_params, set_page_headers
+from app.core.pagination import PageParams
+from app.repositories import db as repo
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
 @router.get("", response_model=list[UserRead])
-def list_users(db: Session = Depends(get_db), _: User = Depends(require_admin)) -> list[User]:
-    return db.scalars(select(User)).all()
+def list_users(
+    response: Response,
+    params: PageParams = Depends(page_params),
+    db: Session = Depends(get_db),
+    _: User = Depends(require_admin),
+) -> list[User]:
+    page = repo.page_users(db, params)
+    set_page_headers(response, page)
+    return page.items
 
 @router.post("", response_model=UserRead, status_code=status.HTTP_201_CREATED)
-def create_user(payload: UserCreate, db: Session = Depends(get_db)) -> User:
-    user = User(email=payload.email, password=hash_password(payload.password))
+async def create_user(payload: UserCreate, db: AsyncSession = Depends(get_async_db)) -> User:
+    user = User(email=payload.email, password=await password_hasher.hash(payload.password))
     db.add(user)
     try:
-        db.commit()
+        await db.commit()
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered.")
-    db.refresh(user)
+    await db.refresh(user)
     return user
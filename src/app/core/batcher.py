@@ -0,0 +1,193 @@
+# src/app/core/batcher.py
+import asyncio
+import contextvars
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Generic, List, Optional, Sequence, TypeVar
+
+from app.core.resilience import DependencyTimeout, current_deadline, deadline_at, remaining_ms
+
+I = TypeVar("I")
+R = TypeVar("R")
+
+# (batch size, trigger "window"|"full", call ms) after every flush
+OnFlush = Callable[[int, str, float], None]
+
+
+class _Batch:
+    __slots__ = ("items", "deadline", "full", "done", "results", "error", "future", "timer")
+
+    def __init__(self) -> None:
+        self.items: List[Any] = []
+        self.deadline: Optional[float] = None     # tightest caller deadline (monotonic)
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.results: Optional[Sequence[Any]] = None
+        self.error: Optional[BaseException] = None
+        self.future: Optional[asyncio.Future] = None
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class _Base:
+    def __init__(self, name: str, window_ms: float, max_size: int, on_flush: Optional[OnFlush]):
+        self.name = name
+        self.window_ms = window_ms
+        self.max_size = max(1, max_size)
+        self._on_flush = on_flush
+        self.batches = 0
+        self.items = 0
+        self.full_flushes = 0
+
+    def _flushed(self, size: int, trigger: str, ms: float) -> None:
+        self.batches += 1
+        self.items += size
+        self.full_flushes += trigger == "full"
+        if self._on_flush is not None:
+            self._on_flush(size, trigger, ms)
+
+    @staticmethod
+    def _join_deadline(batch: _Batch) -> None:
+        at = current_deadline()
+        if at is not None and (batch.deadline is None or at < batch.deadline):
+            batch.deadline = at
+
+    def _timeout(self) -> DependencyTimeout:
+        return DependencyTimeout(f"{self.name}: deadline passed waiting on a batch")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "window_ms": self.window_ms,
+            "max_size": self.max_size,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "full_flushes": self.full_flushes,
+        }
+
+
+class MicroBatcher(_Base, Generic[I, R]):
+    """
+    Thread version: submit() calls arriving within `window_ms` of the first one (or
+    until `max_size` items) are sent together as fn(items) -> results (same order).
+    The first caller of a batch waits out the window (cut short by its own deadline)
+    and makes the call; the others block until it is done. fn runs in an empty context
+    (the batch serves several requests, so no single request's trace applies to it)
+    under the tightest deadline among the callers. An exception from fn reaches every
+    caller of the batch.
+    """
+
+    def __init__(self, name: str, fn: Callable[[List[I]], Sequence[R]], window_ms: float, max_size: int,
+                 on_flush: Optional[OnFlush] = None):
+        super().__init__(name, window_ms, max_size, on_flush)
+        self._fn = fn
+        self._lock = threading.Lock()
+        self._open: Optional[_Batch] = None
+
+    def submit(self, item: I) -> R:
+        with self._lock:
+            batch = self._open
+            leader = batch is None
+            if leader:
+                batch = self._open = _Batch()
+            idx = len(batch.items)
+            batch.items.append(item)
+            self._join_deadline(batch)
+            if len(batch.items) >= self.max_size:
+                self._open = None
+                batch.full.set()
+
+        if leader:
+            left = remaining_ms()
+            window_ms = self.window_ms if left is None else min(self.window_ms, max(left, 0))
+            trigger = "full" if batch.full.wait(window_ms / 1000) else "window"
+            with self._lock:
+                if self._open is batch:
+                    self._open = None
+            t0 = time.perf_counter()
+            try:
+                batch.results = contextvars.Context().run(self._call, batch)
+            except BaseException as e:
+                batch.error = e
+            finally:
+                batch.done.set()
+                self._flushed(len(batch.items), trigger, (time.perf_counter() - t0) * 1000)
+        else:
+            left = remaining_ms()
+            if not batch.done.wait(None if left is None else max(left, 0) / 1000):
+                raise self._timeout()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.results[idx]
+
+    def _call(self, batch: _Batch) -> Sequence[R]:
+        with deadline_at(batch.deadline):
+            return self._fn(batch.items)
+
+
+class AsyncMicroBatcher(_Base, Generic[I, R]):
+    """
+    asyncio version: the batch is flushed by a loop timer (or when it fills up) into
+    its own task, so a cancelled caller never cancels the call the others wait on.
+    """
+
+    def __init__(self, name: str, fn: Callable[[List[I]], Awaitable[Sequence[R]]], window_ms: float,
+                 max_size: int, on_flush: Optional[OnFlush] = None):
+        super().__init__(name, window_ms, max_size, on_flush)
+        self._fn = fn
+        self._open: Optional[_Batch] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: set = set()
+
+    async def submit(self, item: I) -> R:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:     # a new event loop: never join a batch of the old one
+            self._loop, self._open = loop, None
+        batch = self._open
+        if batch is None:
+            batch = self._open = _Batch()
+            batch.future = loop.create_future()
+            batch.timer = loop.call_later(self.window_ms / 1000, self._flush, batch, "window")
+        idx = len(batch.items)
+        batch.items.append(item)
+        self._join_deadline(batch)
+        if len(batch.items) >= self.max_size:
+            self._flush(batch, "full")
+
+        left = remaining_ms()
+        try:
+            if left is None:
+                results = await asyncio.shield(batch.future)
+            else:
+                results = await asyncio.wait_for(asyncio.shield(batch.future), max(left, 0) / 1000)
+        except asyncio.TimeoutError as e:
+            raise self._timeout() from e
+        return results[idx]
+
+    def _flush(self, batch: _Batch, trigger: str) -> None:
+        if self._open is batch:
+            self._open = None
+        if batch.timer is not None:
+            batch.timer.cancel()
+            batch.timer = None
+        else:
+            return      # already flushed
+        # empty context and the tightest caller deadline, as in MicroBatcher
+        task = self._loop.create_task(self._run(batch, trigger), context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: _Batch, trigger: str) -> None:
+        t0 = time.perf_counter()
+        try:
+            with deadline_at(batch.deadline):
+                results = await self._fn(batch.items)
+            batch.future.set_result(results)
+        except asyncio.CancelledError:
+            batch.future.cancel()
+            raise
+        except BaseException as e:
+            batch.future.set_exception(e)
+            batch.future.exception()    # retrieved: waiters may all be gone
+        finally:
+            self._flushed(len(batch.items), trigger, (time.perf_counter() - t0) * 1000)
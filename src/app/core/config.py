@@ -13,6 +13,35 @@ class Settings(BaseModel):
     database_url: str = os.getenv("DATABASE_URL", "sqlite:///./data/app.db")
     database_echo: bool = os.getenv("DATABASE_ECHO", "false").lower() in {"1","true","yes"}
 
+    # --- CONFIG READ REPLICA ---
+    # empty = every read goes to the primary
+    database_read_url: str = os.getenv("DATABASE_READ_URL", "")
+    # reads for a session/user written in the last N ms stay on the primary (replica lag)
+    read_sticky_ms: float = float(os.getenv("READ_STICKY_MS", "2000"))
+    # local testing: copy the primary SQLite file onto the replica file every N seconds (0 = off)
+    sqlite_replica_sync_seconds: float = float(os.getenv("SQLITE_REPLICA_SYNC_SECONDS", "0"))
+
+    # --- CONFIG ENGINE PROFILES ---
+    # pool (server databases and file-based SQLite)
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    db_pool_timeout: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    db_pool_recycle: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))      # seconds, -1 disables
+    db_pool_pre_ping: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() in {"1","true","yes"}
+    # SQLite pragmas, applied on every new connection
+    sqlite_journal_mode: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    sqlite_synchronous: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    sqlite_mmap_size: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    sqlite_cache_size: int = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))  # negative = KiB (64 MiB)
+    sqlite_busy_timeout_ms: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    sqlite_temp_store: str = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
+
+    # --- CONFIG WRITE PATH ---
+    # group-commit queue for chat turns (one transaction per batch of concurrent turns)
+    write_behind_enabled: bool = os.getenv("WRITE_BEHIND_ENABLED", "false").lower() in {"1","true","yes"}
+    write_behind_max_batch: int = int(os.getenv("WRITE_BEHIND_MAX_BATCH", "64"))
+    write_behind_max_delay_ms: float = float(os.getenv("WRITE_BEHIND_MAX_DELAY_MS", "5"))
+
     # --- CONFIG ADMIN ---
     admin_emails: list[str] = os.getenv("ADMIN_EMAILS", "").split(",") if os.getenv("ADMIN_EMAILS") else []
 
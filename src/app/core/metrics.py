@@ -0,0 +1,322 @@
+# src/app/core/metrics.py
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from app.core.logging import get_logger
+
+try:
+    import fcntl
+except ImportError:     # Windows: no multi-worker servers, dead snapshots are just kept
+    fcntl = None
+
+log = get_logger("rag.metrics")
+
+# Multi-worker mode: every process snapshots its series into METRICS_MULTIPROC_DIR
+# (one JSON file per pid, atomic replace) and /metrics merges all files. Files of
+# workers that exited are folded into TOMBSTONE, so their counters are kept once
+# (and stay monotonic) instead of being re-summed from stale files forever.
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR", "")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "1.0"))
+
+# milliseconds; wide enough for a local cache hit and a cold Pinecone call
+LATENCY_MS_BUCKETS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+TOMBSTONE = "metrics_dead.json"
+_PID_FILE = re.compile(r"metrics_(\d+)\.json$")
+
+
+def _key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{v.replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                    for k, v in pairs)
+    return "{" + body + "}"
+
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True     # exists, owned by someone else
+    return True
+
+
+def _merge(snaps: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Sum snapshots series by series -> {name: {type, help, buckets, samples: {key: value}}}."""
+    merged: Dict[str, Any] = {}
+    for snap in snaps:
+        for name, m in snap.items():
+            dst = merged.setdefault(name, {"type": m["type"], "help": m["help"],
+                                           "buckets": m.get("buckets"), "samples": {}})
+            for sample in m["samples"]:
+                key = tuple(tuple(p) for p in sample[0])
+                if m["type"] == "histogram":
+                    counts, total = sample[1], sample[2]
+                    cur = dst["samples"].get(key)
+                    if cur is None:
+                        dst["samples"][key] = [list(counts), total]
+                    else:
+                        cur[0] = [a + b for a, b in zip(cur[0], counts)]
+                        cur[1] += total
+                else:
+                    dst["samples"][key] = dst["samples"].get(key, 0.0) + sample[1]
+    return merged
+
+
+def _as_snapshot(merged: Dict[str, Any]) -> Dict[str, Any]:
+    """Inverse of _merge: back to the per-process file format."""
+    out: Dict[str, Any] = {}
+    for name, m in merged.items():
+        entry: Dict[str, Any] = {"type": m["type"], "help": m["help"]}
+        if m["type"] == "histogram":
+            entry["buckets"] = m["buckets"]
+            entry["samples"] = [[list(map(list, k)), v[0], v[1]] for k, v in m["samples"].items()]
+        else:
+            entry["samples"] = [[list(map(list, k)), v] for k, v in m["samples"].items()]
+        out[name] = entry
+    return out
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        k = _key(labels)
+        with self._lock:
+            self._values[k] = self._values.get(k, 0.0) + amount
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"samples": [[list(map(list, k)), v] for k, v in self._values.items()]}
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = LATENCY_MS_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # per label set: [count per bucket (+Inf last), sum]
+        self._values: Dict[LabelKey, List[Any]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        k = _key(labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            slot = self._values.get(k)
+            if slot is None:
+                slot = self._values[k] = [[0] * (len(self.buckets) + 1), 0.0]
+            slot[0][i] += 1
+            slot[1] += value
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe((time.perf_counter() - t0) * 1000, **labels)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "buckets": list(self.buckets),
+                "samples": [[list(map(list, k)), list(v[0]), v[1]] for k, v in self._values.items()],
+            }
+
+
+class Registry:
+    def __init__(self, multiproc_dir: str = METRICS_MULTIPROC_DIR):
+        self._metrics: Dict[str, Any] = {}
+        # callbacks return counter samples computed on demand (e.g. TTLCache.stats())
+        self._callbacks: List[Tuple[str, str, Callable[[], Iterable[Tuple[Dict[str, Any], float]]]]] = []
+        self._lock = threading.Lock()
+        self.multiproc_dir = multiproc_dir
+        self._flusher: Optional[threading.Thread] = None
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+        self._ensure_flusher()
+        return metric
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._register(Counter(name, help))
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float] = LATENCY_MS_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, buckets))
+
+    def counter_callback(self, name: str, help: str,
+                         fn: Callable[[], Iterable[Tuple[Dict[str, Any], float]]]) -> None:
+        """fn() -> [(labels, cumulative value), ...], read at flush/scrape time."""
+        with self._lock:
+            self._callbacks.append((name, help, fn))
+
+    # ---- snapshots ----
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            callbacks = list(self._callbacks)
+        out = {m.name: {"type": m.type, "help": m.help, **m.snapshot()} for m in metrics}
+        for name, help, fn in callbacks:
+            entry = out.setdefault(name, {"type": "counter", "help": help, "samples": []})
+            try:
+                entry["samples"].extend([list(map(list, _key(labels))), float(v)] for labels, v in fn())
+            except Exception as e:  # a broken callback must not break the scrape
+                log.warning(f"metrics callback {name} failed: {e}")
+        return out
+
+    def _own_file(self) -> Path:
+        return Path(self.multiproc_dir) / f"metrics_{os.getpid()}.json"
+
+    def flush(self) -> None:
+        if not self.multiproc_dir:
+            return
+        path = self._own_file()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.snapshot()))
+        os.replace(tmp, path)
+
+    def _ensure_flusher(self) -> None:
+        if not self.multiproc_dir or (self._flusher is not None and self._flusher.is_alive()):
+            return
+
+        def run():
+            while True:
+                time.sleep(METRICS_FLUSH_SECONDS)
+                try:
+                    self.flush()
+                except OSError as e:
+                    log.warning(f"metrics flush failed: {e}")
+
+        self._flusher = threading.Thread(target=run, name="metrics-flush", daemon=True)
+        self._flusher.start()
+
+    def _retire_dead(self) -> None:
+        """Fold snapshot files of workers that exited into TOMBSTONE (once: under a lock)."""
+        root = Path(self.multiproc_dir)
+        dead = [f for f in root.glob("metrics_*.json")
+                if (m := _PID_FILE.match(f.name)) and not _pid_alive(int(m.group(1)))]
+        if not dead or fcntl is None:
+            return
+        with open(root / ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            tomb = root / TOMBSTONE
+            snaps = [json.loads(tomb.read_text())] if tomb.exists() else []
+            retired = []
+            for f in dead:
+                try:
+                    snaps.append(json.loads(f.read_text()))
+                    retired.append(f)
+                except FileNotFoundError:
+                    continue    # another worker retired it first
+            if not retired:
+                return
+            tmp = tomb.with_suffix(".tmp")
+            tmp.write_text(json.dumps(_as_snapshot(_merge(snaps))))
+            os.replace(tmp, tomb)
+            for f in retired:
+                f.unlink()
+        log.info(f"metrics: retired {len(retired)} snapshot(s) of exited workers")
+
+    def collect(self) -> Dict[str, Any]:
+        """This process' snapshot merged with every other worker's latest file."""
+        snaps = [self.snapshot()]
+        if self.multiproc_dir:
+            try:
+                self._retire_dead()
+            except (OSError, ValueError) as e:
+                log.warning(f"metrics: retiring dead snapshots failed: {e}")
+            own = self._own_file().name
+            for f in Path(self.multiproc_dir).glob("metrics_*.json"):
+                if f.name == own:
+                    continue
+                try:
+                    snaps.append(json.loads(f.read_text()))
+                except (OSError, ValueError):
+                    continue  # being replaced right now; next scrape gets it
+        return _merge(snaps)
+
+    # ---- exposition ----
+    def render(self) -> str:
+        """Prometheus text exposition format (0.0.4)."""
+        lines: List[str] = []
+        for name, m in sorted(self.collect().items()):
+            lines.append(f"# HELP {name} {m['help']}")
+            lines.append(f"# TYPE {name} {m['type']}")
+            for key, value in sorted(m["samples"].items()):
+                if m["type"] != "histogram":
+                    lines.append(f"{name}{_fmt_labels(key)} {_fmt_value(value)}")
+                    continue
+                counts, total = value
+                cumulative = 0
+                for bound, c in zip(list(m["buckets"]) + [float("inf")], counts):
+                    cumulative += c
+                    lines.append(f"{name}_bucket{_fmt_labels(key, [('le', _fmt_value(bound))])} {cumulative}")
+                lines.append(f"{name}_sum{_fmt_labels(key)} {_fmt_value(round(total, 3))}")
+                lines.append(f"{name}_count{_fmt_labels(key)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+# forked workers (e.g. gunicorn --preload) don't inherit the flush thread
+os.register_at_fork(after_in_child=lambda: setattr(registry, "_flusher", None) or registry._ensure_flusher())
+
+# ---- pipeline metrics (shared names; import from here) ----
+EMBED_MS = registry.histogram("rag_embed_ms", "Embedding call latency in ms (kind=query|passage).")
+EMBED_BATCH_SIZE = registry.histogram("rag_embed_batch_size", "Query texts per batched embedding call by trigger.",
+                                      buckets=(1, 2, 4, 8, 16, 32, 64, 96))
+VECTOR_QUERY_MS = registry.histogram("rag_vector_query_ms", "Vector backend query latency in ms.")
+SEARCH_PATH = registry.counter("rag_search_total", "search() calls by path (vector|hybrid|lexical_fastpath|degraded_*).")
+ANSWER_MS = registry.histogram("rag_answer_ms", "answer_with_rag latency in ms by outcome.")
+ANSWERS = registry.counter("rag_answers_total",
+                           "Answers by outcome (answered|no_match|cache_hit|shortcut|degraded).")
+MATCHES = registry.histogram("rag_matches", "Matches returned by retrieval per question.",
+                             buckets=(0, 1, 2, 3, 5, 10))
+MATCHES_BELOW_THRESHOLD = registry.counter("rag_matches_below_threshold_total",
+                                           "Retrieved matches dropped by RAG_CONFIDENCE_THRESHOLD.")
+DB_STATEMENT_MS = registry.histogram("db_statement_ms", "SQL statement latency in ms by engine and verb.")
+HTTP_REQUEST_MS = registry.histogram("http_request_ms", "HTTP request latency in ms by method, route, status.")
+
+
+def register_cache(cache) -> None:
+    """Expose a TTLCache's counters (hit ratio = hits / (hits + misses))."""
+    def samples():
+        st = cache.stats()
+        return [({"cache": cache.name, "event": e}, st[e]) for e in ("hits", "misses", "evictions", "expirations")]
+    registry.counter_callback("rag_cache_events_total", "TTLCache hits/misses/evictions/expirations by cache.",
+                              samples)
@@ -1,63 +1,70 @@
 # src/app/core/middleware/auth_context.py
-from typing import Optional
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
-from sqlalchemy.orm import Session
-from sqlalchemy import select
 import jwt
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Receive, Scope, Send
 
-from app.core.config import settings
-from app.db.session import SessionLocal
-from app.domain.models import User
 from app.core.jwt import decode_access_token
+from app.core.principal import load_principal, principal_cache
+from app.core.tracing import span
 
-class AuthContextMiddleware(BaseHTTPMiddleware):
+
+class AuthContextMiddleware:
     """
-    - If there is Authorization: Bearer <token>, validate and load the user.
+    Pure ASGI middleware (no BaseHTTPMiddleware task/stream wrapping).
+    - If there is Authorization: Bearer <token>, decode it once and resolve the principal.
     - Do NOT throw an error here. Authorization is handled by dependencies (route by route).
     - Leave in request.state:
-    - user: Optional[User]
+    - user: Optional[Principal] (immutable snapshot, served from a short-TTL cache)
     - jwt_payload: Optional[dict]
     - auth_error: Optional[str] (for observational logs)
+    - auth_checked: bool (a bearer token was seen, so dependencies don't decode it again)
     """
 
-    async def dispatch(self, request: Request, call_next) -> Response:
-        request.state.user = None
-        request.state.jwt_payload = None
-        request.state.auth_error = None
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = scope.setdefault("state", {})
+        state["user"] = None
+        state["jwt_payload"] = None
+        state["auth_error"] = None
+        state["auth_checked"] = False
+
+        auth_header = ""
+        for name, value in scope.get("headers", ()):
+            if name == b"authorization":
+                auth_header = value.decode("latin-1")
+                break
 
-        auth_header: str = request.headers.get("Authorization", "")
         if auth_header.startswith("Bearer "):
-            token = auth_header[7:].strip()
-            db: Optional[Session] = None
-            try:
-                payload = decode_access_token(
-                    token,
-                    secret=settings.jwt_secret,
-                    algorithms=[settings.jwt_algorithm],
-                )
-                user_id = payload.get("sub")
-                if user_id:
-                    # carrega usuário rapidamente
-                    db = SessionLocal()
-                    user = db.scalars(select(User).where(User.id == user_id)).first()
-                    if user:
-                        request.state.user = user
-                        request.state.jwt_payload = payload
+            with span("auth") as sp:
+                token = auth_header[7:].strip()
+                state["auth_checked"] = True
+                try:
+                    payload = decode_access_token(token)
+                    user_id = payload.get("sub")
+                    if user_id:
+                        # cache hit resolves inline; a miss does one SELECT off the event loop
+                        user = principal_cache.get(user_id) or await run_in_threadpool(load_principal, user_id)
+                        if user:
+                            state["user"] = user
+                            state["jwt_payload"] = payload
+                        else:
+                            state["auth_error"] = "user_not_found"
                     else:
-                        request.state.auth_error = "user_not_found"
-                else:
-                    request.state.auth_error = "missing_sub"
-            except jwt.ExpiredSignatureError:
-                request.state.auth_error = "token_expired"
-            except jwt.InvalidTokenError:
-                request.state.auth_error = "invalid_token"
-            except Exception as e:
-                request.state.auth_error = f"unexpected:{e}"
-            finally:
-                if db:
-                    db.close()
-
-        response = await call_next(request)
-        return response
+                        state["auth_error"] = "missing_sub"
+                except jwt.ExpiredSignatureError:
+                    state["auth_error"] = "token_expired"
+                except jwt.InvalidTokenError:
+                    state["auth_error"] = "invalid_token"
+                except Exception as e:
+                    state["auth_error"] = f"unexpected:{e}"
+
+                if sp is not None:
+                    sp.attrs["result"] = state["auth_error"] or "ok"
+
+        await self.app(scope, receive, send)
@@ -0,0 +1,42 @@
+# src/app/core/middleware/metrics.py
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import HTTP_REQUEST_MS
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI: observes http_request_ms{method, route, status} once the response
+    (including streamed bodies) is complete. `route` is the path template
+    ("/api/messages/by-session/{session_id}"), so ids don't explode cardinality.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        t0 = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_MS.observe(
+                (time.perf_counter() - t0) * 1000,
+                method=scope["method"],
+                route=getattr(route, "path", None) or "unmatched",
+                status=status,
+            )
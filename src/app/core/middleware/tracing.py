@@ -0,0 +1,51 @@
+# src/app/core/middleware/tracing.py
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.tracing import end_trace, log_if_slow, start_trace
+
+
+class TracingMiddleware:
+    """
+    Pure ASGI, outermost: opens the request trace (context var), adds a
+    Server-Timing header (auth, embed, vq, ctx, db, total) when the response starts,
+    and logs the whole span tree as JSON when the request exceeds TRACE_SLOW_MS.
+    Streamed responses only report what happened before the first byte in the
+    header; the slow-request log covers the full stream.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        # cross-origin pages only see Server-Timing when the origin is allowed to
+        self.timing_allow_origin = ", ".join(settings.cors_origins).encode("latin-1")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace, token = start_trace("request", method=scope["method"], path=scope["path"])
+        if trace is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                trace.root.attrs["status"] = message["status"]
+                headers = list(message.get("headers", ()))
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                if self.timing_allow_origin:
+                    headers.append((b"timing-allow-origin", self.timing_allow_origin))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            total_ms = trace.elapsed_ms()
+            trace.root.dur_ms = total_ms
+            route = scope.get("route")
+            if route is not None:
+                trace.root.attrs["route"] = getattr(route, "path", None)
+            end_trace(token)
+            log_if_slow(trace, total_ms)
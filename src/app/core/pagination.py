@@ -0,0 +1,103 @@
+# src/app/core/pagination.py
+import base64
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+from sqlalchemy import Select, tuple_
+
+T = TypeVar("T")
+
+DEFAULT_PAGE_LIMIT = int(os.getenv("PAGE_DEFAULT_LIMIT", "50"))
+MAX_PAGE_LIMIT = int(os.getenv("PAGE_MAX_LIMIT", "500"))
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque cursor: urlsafe base64 of the sort-key values of one row."""
+    packed = [{"dt": v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(packed, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, arity: int) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        packed = json.loads(raw)
+        if not isinstance(packed, list) or len(packed) != arity:
+            raise ValueError("wrong arity")
+        return [datetime.fromisoformat(v["dt"]) if isinstance(v, dict) and "dt" in v else v for v in packed]
+    except Exception as e:
+        raise InvalidCursor(f"Invalid cursor: {e}") from e
+
+
+@dataclass
+class PageParams:
+    limit: int = DEFAULT_PAGE_LIMIT
+    after: Optional[str] = None
+    before: Optional[str] = None
+
+
+@dataclass
+class Page(Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None   # rows after the last item
+    prev_cursor: Optional[str] = None   # rows before the first item
+
+
+def keyset(stmt: Select, keys: Sequence[Any], params: PageParams,
+           tail: bool = False) -> Tuple[Select, Callable[[Sequence[T]], Page[T]]]:
+    """
+    Adds keyset conditions/ordering to `stmt` and returns it with a finalizer
+    that turns the fetched rows into a Page. Works for sync and async sessions:
+
+        stmt, finish = keyset(select(Message)..., [Message.created_at, Message.id], params)
+        page = finish(db.scalars(stmt).all())
+
+    - after=<cursor>: rows strictly after the cursor, ascending;
+    - before=<cursor>: rows strictly before the cursor (returned ascending);
+    - neither: first page, or the last page when tail=True (e.g. latest messages).
+    The query fetches limit+1 rows to know whether another page exists, so the
+    cost depends on `limit`, not on table/conversation size (given an index on keys).
+    """
+    if params.after and params.before:
+        raise InvalidCursor("Use either 'after' or 'before', not both")
+    limit = params.limit
+    row_key = tuple_(*keys)
+
+    def values_of(row) -> List[Any]:
+        return [getattr(row, k.key) for k in keys]
+
+    if params.after:
+        stmt = stmt.where(row_key > tuple_(*decode_cursor(params.after, len(keys))))
+        backwards = False
+    elif params.before:
+        stmt = stmt.where(row_key < tuple_(*decode_cursor(params.before, len(keys))))
+        backwards = True
+    else:
+        backwards = tail
+
+    order = [k.desc() for k in keys] if backwards else [k.asc() for k in keys]
+    stmt = stmt.order_by(*order).limit(limit + 1)
+
+    def finish(rows: Sequence[T]) -> Page[T]:
+        rows = list(rows)
+        more = len(rows) > limit
+        rows = rows[:limit]
+        if backwards:
+            rows.reverse()
+            has_prev, has_next = more, bool(params.before)
+        else:
+            has_prev, has_next = bool(params.after), more
+        return Page(
+            items=rows,
+            next_cursor=encode_cursor(values_of(rows[-1])) if rows and has_next else None,
+            prev_cursor=encode_cursor(values_of(rows[0])) if rows and has_prev else None,
+        )
+
+    return stmt, finish
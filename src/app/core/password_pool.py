@@ -0,0 +1,90 @@
+# src/app/core/password_pool.py
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from app.core import security
+from app.core.logging import get_logger
+
+log = get_logger("rag.password_pool")
+
+# PBKDF2 runs in separate processes: it never holds the GIL of the API worker
+# nor a slot of the Starlette threadpool. 0 workers = run on a thread (tests/dev).
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(2, os.cpu_count() or 1))))
+# jobs allowed to wait for a free worker; beyond that requests fail fast with 503
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing queue is full (mapped to 503 by the app)."""
+
+
+class PasswordHasher:
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        self.workers = max(0, workers)
+        self.max_queue = max(0, max_queue)
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self._stats = {"submitted": 0, "rejected": 0}
+
+    @property
+    def capacity(self) -> int:
+        return max(1, self.workers) + self.max_queue
+
+    def _executor(self) -> Optional[Executor]:
+        if self.workers == 0:
+            return None
+        with self._lock:
+            if self._pool is None:
+                # spawn: never fork a process that already runs DB/writer threads
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+                log.info(f"password hashing pool started | workers={self.workers} | max_queue={self.max_queue}")
+            return self._pool
+
+    def start(self) -> None:
+        """Create the pool up front (app startup) so the first login doesn't pay for it."""
+        self._executor()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self._inflight >= self.capacity:
+                self._stats["rejected"] += 1
+                raise HashingBusy("Password hashing is saturated, retry shortly.")
+            self._inflight += 1
+            self._stats["submitted"] += 1
+        try:
+            pool = self._executor()
+            if pool is None:
+                return await asyncio.to_thread(fn, *args)
+            return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+        finally:
+            with self._lock:
+                self._inflight -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(security.hash_password, password)
+
+    async def verify(self, password: str, stored: str) -> bool:
+        if not security.is_hashed(stored):
+            return security.check_password(password, stored)  # plaintext: nothing to offload
+        return await self._run(security.verify_password, password, stored)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "inflight": self._inflight, "workers": self.workers,
+                    "max_queue": self.max_queue}
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,80 @@
+# src/app/core/principal.py
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.metrics import register_cache
+from app.db.replica import read_session_factory
+from app.domain.models import User
+
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "4096"))
+# short TTL: bounds staleness across workers, where local invalidation can't reach
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Detached, immutable snapshot of the authenticated user.
+    Exposes the same attributes the routes read from User (id, email).
+    """
+    id: str
+    email: str
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, email=user.email)
+
+
+principal_cache: TTLCache[Principal] = TTLCache(
+    maxsize=PRINCIPAL_CACHE_SIZE, ttl_seconds=PRINCIPAL_CACHE_TTL_SECONDS, name="principals"
+)
+register_cache(principal_cache)
+
+
+def load_principal(user_id: str) -> Optional[Principal]:
+    """Cached lookup; on a miss reads the user once and stores a snapshot."""
+    cached = principal_cache.get(user_id)
+    if cached is not None:
+        return cached
+    # replica read (e.g. /api/auth/me), unless this user was just written
+    with read_session_factory([f"user:{user_id}"])() as db:
+        user = db.scalars(select(User).where(User.id == user_id)).first()
+        if user is None:
+            return None
+        principal = Principal.from_user(user)
+    principal_cache.set(user_id, principal)
+    return principal
+
+
+def invalidate_principal(user_id: Optional[str]) -> None:
+    """
+    Drop a cached principal. ORM changes to User are handled by the hooks below;
+    bulk update()/delete() statements on users bypass them and must call this
+    (after their commit) for every affected id.
+    """
+    if user_id:
+        principal_cache.pop(user_id)
+
+
+# Invalidate on commit, not at flush: until the commit lands a concurrent request
+# still reads (and would re-cache) the old row. Same pattern as replica.written_keys.
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, _ctx):
+    ids = session.info.setdefault("principal_ids", set())
+    ids.update(obj.id for obj in (*session.dirty, *session.deleted) if isinstance(obj, User))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    for user_id in session.info.pop("principal_ids", ()):
+        invalidate_principal(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session):
+    session.info.pop("principal_ids", None)
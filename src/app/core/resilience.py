@@ -0,0 +1,286 @@
+# src/app/core/resilience.py
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, TypeVar
+
+from app.core.logging import get_logger
+from app.core.metrics import registry
+
+log = get_logger("rag.resilience")
+
+T = TypeVar("T")
+
+DEPENDENCY_CALLS = registry.counter(
+    "rag_dependency_calls_total",
+    "Remote dependency calls by result (ok|error|timeout|circuit_open|bulkhead_full|deadline).",
+)
+
+
+class DependencyUnavailable(Exception):
+    """The call was not made (or was abandoned); callers should degrade, not fail."""
+
+    reason = "unavailable"
+
+
+class CircuitOpen(DependencyUnavailable):
+    reason = "circuit_open"
+
+
+class BulkheadFull(DependencyUnavailable):
+    reason = "bulkhead_full"
+
+
+class DeadlineExceeded(DependencyUnavailable):
+    reason = "deadline"
+
+
+class DependencyTimeout(DependencyUnavailable):
+    reason = "timeout"
+
+
+# ---------- deadlines ----------
+_deadline: ContextVar[Optional[float]] = ContextVar("rag_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(ms: float) -> Iterator[None]:
+    """Request budget (monotonic); nested scopes can only shorten it. ms <= 0 = no deadline."""
+    if ms <= 0:
+        yield
+        return
+    at = time.monotonic() + ms / 1000
+    current = _deadline.get()
+    token = _deadline.set(at if current is None else min(at, current))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def deadline_at(at: Optional[float]) -> Iterator[None]:
+    """Run under an absolute deadline (time.monotonic() value) taken from current_deadline(); None = none."""
+    token = _deadline.set(at)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def current_deadline() -> Optional[float]:
+    """Absolute (monotonic) deadline of the current scope, or None."""
+    return _deadline.get()
+
+
+def remaining_ms() -> Optional[float]:
+    """Milliseconds left in the current deadline scope, or None when there is none."""
+    at = _deadline.get()
+    return None if at is None else (at - time.monotonic()) * 1000
+
+
+# ---------- bulkhead ----------
+class Bulkhead:
+    """Max in-flight calls; extra callers are rejected immediately instead of queueing."""
+
+    def __init__(self, max_inflight: int):
+        self.max_inflight = max(1, max_inflight)
+        self._lock = threading.Lock()
+        self.inflight = 0
+        self.rejected = 0
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.inflight >= self.max_inflight:
+                self.rejected += 1
+                return False
+            self.inflight += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self.inflight -= 1
+
+
+# ---------- circuit breaker ----------
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures;
+    open -> half_open once `reset_seconds` passed: up to `half_open_probes` calls go
+    through; a success closes the circuit, a failure re-opens it for another period.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 10.0, half_open_probes: int = 1,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.half_open_probes = max(1, half_open_probes)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self.opened_count = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state_locked()
+
+    def _state_locked(self) -> str:
+        if self._state == "open" and self._clock() - self._opened_at >= self.reset_seconds:
+            self._state = "half_open"
+            self._probes = 0
+        return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state_locked()
+            if state == "closed":
+                return True
+            if state == "half_open" and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            return False
+
+    def release_probe(self) -> None:
+        """An admitted call ended without a verdict (cancelled): give the probe slot back."""
+        with self._lock:
+            if self._state == "half_open" and self._probes > 0:
+                self._probes -= 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != "closed":
+                log.info("circuit closed")
+            self._state = "closed"
+            self._failures = 0
+
+    def record_failure(self, error: str = "") -> None:
+        with self._lock:
+            self.last_error = error or self.last_error
+            state = self._state_locked()
+            self._failures += 1
+            if state == "half_open" or (state == "closed" and self._failures >= self.failure_threshold):
+                self._state = "open"
+                self._opened_at = self._clock()
+                self.opened_count += 1
+                log.warning(f"circuit opened | failures={self._failures} | last_error={self.last_error}")
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = "closed"
+            self._failures = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._state_locked()
+            retry_in = max(0.0, self.reset_seconds - (self._clock() - self._opened_at)) if state == "open" else 0.0
+            return {"state": state, "consecutive_failures": self._failures, "opened_count": self.opened_count,
+                    "retry_in_s": round(retry_in, 2), "last_error": self.last_error}
+
+
+# ---------- one remote dependency ----------
+class Dependency:
+    """
+    Bulkhead + circuit breaker + per-call timeout bounded by the request deadline.
+    Pre-call rejections raise a DependencyUnavailable subclass without touching the
+    breaker; errors and timeouts of calls that ran count as breaker failures.
+    """
+
+    def __init__(self, name: str, timeout_ms: float, max_inflight: int, breaker: CircuitBreaker,
+                 min_budget_ms: float = 0.0):
+        self.name = name
+        self.timeout_ms = timeout_ms
+        self.min_budget_ms = min_budget_ms
+        self.bulkhead = Bulkhead(max_inflight)
+        self.breaker = breaker
+
+    def _result(self, result: str) -> None:
+        DEPENDENCY_CALLS.inc(dependency=self.name, result=result)
+
+    def budget_ms(self) -> float:
+        """Timeout for the next call: min(per-call timeout, what is left of the deadline)."""
+        left = remaining_ms()
+        if left is None:
+            return self.timeout_ms
+        if left < self.min_budget_ms:
+            self._result("deadline")
+            raise DeadlineExceeded(f"{self.name}: {max(left, 0):.0f}ms left of the request deadline")
+        return min(self.timeout_ms, left)
+
+    def _admit(self) -> float:
+        timeout = self.budget_ms()
+        if not self.bulkhead.try_acquire():
+            self._result("bulkhead_full")
+            raise BulkheadFull(f"{self.name}: {self.bulkhead.max_inflight} calls in flight")
+        if not self.breaker.allow():
+            self.bulkhead.release()
+            self._result("circuit_open")
+            raise CircuitOpen(f"{self.name}: circuit open")
+        return timeout
+
+    def _failed(self, result: str, e: BaseException) -> None:
+        self._result(result)
+        self.breaker.record_failure(f"{type(e).__name__}: {e}"[:200])
+
+    def call(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Sync calls can't be interrupted: the budget is checked up front and a call
+        that overruns it is counted as a timeout (breaker failure), but its result is kept.
+        """
+        timeout = self._admit()
+        t0 = time.perf_counter()
+        try:
+            out = fn(*args, **kwargs)
+        except Exception as e:
+            self._failed("error", e)
+            raise
+        except BaseException:
+            self.breaker.release_probe()     # interrupted: no verdict on the dependency
+            raise
+        finally:
+            self.bulkhead.release()
+        elapsed = (time.perf_counter() - t0) * 1000
+        if elapsed > timeout:
+            self._failed("timeout", DependencyTimeout(f"{elapsed:.0f}ms > {timeout:.0f}ms"))
+        else:
+            self._result("ok")
+            self.breaker.record_success()
+        return out
+
+    async def acall(self, fn: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+        """Async calls are cancelled when the budget runs out (DependencyTimeout)."""
+        timeout = self._admit()
+        try:
+            out = await asyncio.wait_for(fn(*args, **kwargs), timeout / 1000)
+        except asyncio.TimeoutError as e:
+            err = DependencyTimeout(f"{self.name}: no answer within {timeout:.0f}ms")
+            self._failed("timeout", err)
+            raise err from e
+        except Exception as e:
+            self._failed("error", e)
+            raise
+        except BaseException:
+            # cancelled (client gone, single-flight abandoned, outer wait_for): no verdict
+            # on the dependency, but a half-open probe slot must not stay taken forever
+            self.breaker.release_probe()
+            raise
+        finally:
+            self.bulkhead.release()
+        self._result("ok")
+        self.breaker.record_success()
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "timeout_ms": self.timeout_ms,
+            "inflight": self.bulkhead.inflight,
+            "max_inflight": self.bulkhead.max_inflight,
+            "bulkhead_rejected": self.bulkhead.rejected,
+            **self.breaker.stats(),
+        }
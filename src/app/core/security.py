@@ -26,4 +26,23 @@ def verify_password(password: str, stored: str) -> bool:
         candidate = _pbkdf2(password, salt, iters)
         return hmac.compare_digest(candidate, expected)
     except Exception:
-        return False
\ No newline at end of file
+        return False
+
+def is_hashed(stored: str) -> bool:
+    return "$" in (stored or "")
+
+def check_password(password: str, stored: str) -> bool:
+    """verify_password() that also accepts legacy plaintext rows (constant-time compare)."""
+    if not stored:
+        return False
+    if is_hashed(stored):
+        return verify_password(password, stored)
+    return hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8"))
+
+def needs_rehash(stored: str) -> bool:
+    """True for plaintext, foreign formats and hashes with fewer iterations than _ITER."""
+    try:
+        algo, iter_s, _, _ = stored.split("$", 3)
+        return algo != _ALGO or int(iter_s) < _ITER
+    except Exception:
+        return True
@@ -0,0 +1,129 @@
+# src/app/core/singleflight.py
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+from app.core.metrics import registry
+from app.core.resilience import DependencyTimeout, remaining_ms
+
+T = TypeVar("T")
+
+COALESCED = registry.counter(
+    "rag_singleflight_total", "Coalesced calls by path (sync|async) and role (leader|follower)."
+)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Thread version: the first caller for a key runs fn(); callers arriving while it
+    runs block on its result (or get its exception). Followers stop waiting when
+    their own request deadline runs out (DependencyTimeout); the leader keeps going.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.followers += 1
+        COALESCED.inc(path="sync", role="leader" if leader else "follower")
+
+        if not leader:
+            left = remaining_ms()
+            if not call.done.wait(None if left is None else max(left, 0) / 1000):
+                raise DependencyTimeout(f"{self.name}: deadline passed waiting on a coalesced call")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"inflight": len(self._calls), "leaders": self.leaders, "followers": self.followers}
+
+
+class AsyncSingleFlight:
+    """
+    asyncio version: the work runs in one shared task (created from the first
+    caller's context, so its deadline and trace apply); every caller awaits it
+    through asyncio.shield(). Cancelling one caller never cancels the others; the
+    task itself is cancelled only when every waiter has gone away. Exceptions
+    reach all waiters.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, Tuple[asyncio.AbstractEventLoop, "asyncio.Task[Any]", list]] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        loop = asyncio.get_running_loop()
+        entry = self._calls.get(key)
+        if entry is None or entry[0] is not loop or entry[1].done():
+            task = loop.create_task(fn())
+            waiters = [0]
+            self._calls[key] = entry = (loop, task, waiters)
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+            self.leaders += 1
+            role = "leader"
+        else:
+            self.followers += 1
+            role = "follower"
+        COALESCED.inc(path="async", role=role)
+
+        _, task, waiters = entry
+        waiters[0] += 1
+        try:
+            left = remaining_ms() if role == "follower" else None
+            if left is None:
+                return await asyncio.shield(task)
+            try:
+                return await asyncio.wait_for(asyncio.shield(task), max(left, 0) / 1000)
+            except asyncio.TimeoutError as e:
+                raise DependencyTimeout(f"{self.name}: deadline passed waiting on a coalesced call") from e
+        finally:
+            waiters[0] -= 1
+            if waiters[0] == 0 and not task.done():
+                # nobody is interested any more; later callers start a fresh call
+                self._forget(key, task, retrieve=False)
+                task.cancel()
+
+    def _forget(self, key: Hashable, task: "asyncio.Task[Any]", retrieve: bool = True) -> None:
+        entry = self._calls.get(key)
+        if entry is not None and entry[1] is task:
+            del self._calls[key]
+        if retrieve and not task.cancelled():
+            task.exception()    # retrieved: no "exception was never retrieved" warning
+
+    def stats(self) -> Dict[str, Any]:
+        return {"inflight": len(self._calls), "leaders": self.leaders, "followers": self.followers}
@@ -0,0 +1,16 @@
+# src/app/core/text.py
+import re
+import unicodedata
+
+_WS = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form used as a cache/lookup key:
+    NFKC, casefolded, punctuation removed, whitespace collapsed.
+    "How do I reset my password?" == "how do i  reset my password"
+    """
+    t = unicodedata.normalize("NFKC", text or "").casefold()
+    t = "".join(" " if unicodedata.category(ch).startswith("P") else ch for ch in t)
+    return _WS.sub(" ", t).strip()
@@ -0,0 +1,139 @@
+# src/app/core/tracing.py
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.core.logging import get_logger
+
+log = get_logger("rag.trace")
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+# requests slower than this log their span tree as one JSON line; 0 disables
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "500"))
+# cap per request so a chatty endpoint can't grow the tree without bound (totals keep counting)
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "200"))
+
+
+class Span:
+    __slots__ = ("name", "start", "dur_ms", "attrs", "children")
+
+    def __init__(self, name: str, start: float, attrs: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.start = start              # perf_counter()
+        self.dur_ms: Optional[float] = None
+        self.attrs = attrs or {}
+        self.children: List["Span"] = []
+
+    def as_dict(self, origin: float) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "name": self.name,
+            "at_ms": round((self.start - origin) * 1000, 2),
+            "dur_ms": None if self.dur_ms is None else round(self.dur_ms, 2),
+        }
+        if self.attrs:
+            out["attrs"] = self.attrs
+        if self.children:
+            out["children"] = [c.as_dict(origin) for c in self.children]
+        return out
+
+
+class Trace:
+    """
+    One per request. Spans may be closed from worker threads (run_in_threadpool copies
+    the context), so the tree and the per-name totals are guarded by a lock.
+    """
+
+    def __init__(self, name: str, **attrs: Any):
+        self.root = Span(name, time.perf_counter(), attrs)
+        self._lock = threading.Lock()
+        self._spans = 0
+        self.totals: Dict[str, List[float]] = {}   # name -> [ms, count]
+
+    def add(self, parent: Span, span: Span) -> None:
+        with self._lock:
+            t = self.totals.setdefault(span.name, [0.0, 0])
+            t[0] += span.dur_ms or 0.0
+            t[1] += 1
+            if self._spans < TRACE_MAX_SPANS:
+                self._spans += 1
+                parent.children.append(span)
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.root.start) * 1000
+
+    def server_timing(self) -> str:
+        """Server-Timing value: one entry per span name (summed), plus the total so far."""
+        with self._lock:
+            totals = sorted(self.totals.items())
+        parts = [f'{name};dur={ms:.1f}' + (f';desc="x{n}"' if n > 1 else "") for name, (ms, n) in totals]
+        parts.append(f"total;dur={self.elapsed_ms():.1f}")
+        return ", ".join(parts)
+
+    def to_json(self) -> str:
+        with self._lock:
+            tree = self.root.as_dict(self.root.start)
+            totals = {k: {"ms": round(v[0], 2), "n": v[1]} for k, v in self.totals.items()}
+        return json.dumps({"trace": tree, "totals": totals}, default=str)
+
+
+_trace: ContextVar[Optional[Trace]] = ContextVar("rag_trace", default=None)
+_parent: ContextVar[Optional[Span]] = ContextVar("rag_span", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _trace.get()
+
+
+def start_trace(name: str, **attrs: Any):
+    """Begin a request trace in the current context; returns (trace, reset token) or (None, None)."""
+    if not TRACING_ENABLED:
+        return None, None
+    trace = Trace(name, **attrs)
+    return trace, (_trace.set(trace), _parent.set(trace.root))
+
+
+def end_trace(token) -> None:
+    if token is not None:
+        _trace.reset(token[0])
+        _parent.reset(token[1])
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Optional[Span]]:
+    """
+    Time a block as a child of the current span. Outside a request (ingest CLI,
+    startup) this is a no-op yielding None.
+    """
+    trace = _trace.get()
+    parent = _parent.get()
+    if trace is None or parent is None:
+        yield None
+        return
+    s = Span(name, time.perf_counter(), attrs)
+    token = _parent.set(s)
+    try:
+        yield s
+    finally:
+        _parent.reset(token)
+        s.dur_ms = (time.perf_counter() - s.start) * 1000
+        trace.add(parent, s)
+
+
+def record(name: str, start: float, dur_ms: float, **attrs: Any) -> None:
+    """Attach an already-measured leaf span (e.g. from SQLAlchemy cursor events)."""
+    trace = _trace.get()
+    parent = _parent.get()
+    if trace is None or parent is None:
+        return
+    s = Span(name, start, attrs)
+    s.dur_ms = dur_ms
+    trace.add(parent, s)
+
+
+def log_if_slow(trace: Trace, total_ms: float) -> None:
+    if TRACE_SLOW_MS > 0 and total_ms >= TRACE_SLOW_MS:
+        log.warning(f"slow request | {trace.to_json()}")
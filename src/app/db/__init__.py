@@ -1,4 +1,10 @@
-from .dependencies import get_db
+from .dependencies import get_db, get_async_db, get_read_db, get_async_read_db
 from .session import SessionLocal, engine
+from .async_session import AsyncSessionLocal, async_engine
+from .replica import ReadSessionLocal, AsyncReadSessionLocal, read_engine, async_read_engine
 
-__all__ = ["SessionLocal", "engine", "get_db"]
+__all__ = [
+    "SessionLocal", "engine", "get_db", "AsyncSessionLocal", "async_engine", "get_async_db",
+    "ReadSessionLocal", "AsyncReadSessionLocal", "read_engine", "async_read_engine",
+    "get_read_db", "get_async_read_db",
+]
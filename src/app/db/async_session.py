@@ -0,0 +1,32 @@
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.db.engine import apply_profile, engine_options
+# importing the sync module guarantees the SQLite directory and tables exist
+from app.db import session as _sync_session  # noqa: F401
+
+# sync driver -> asyncio driver
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def _async_url(database_url: str):
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    driver = _ASYNC_DRIVERS.get(backend)
+    if driver is None:
+        raise RuntimeError(f"No async driver configured for database backend '{backend}'")
+    return url.set(drivername=driver)
+
+
+_url = _async_url(settings.database_url)
+async_engine = create_async_engine(_url, **engine_options(_url, settings, is_async=True))
+apply_profile(async_engine.sync_engine, settings)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
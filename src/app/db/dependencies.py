@@ -1,6 +1,11 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
+from typing import List
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.db.async_session import AsyncSessionLocal
 from app.db.session import SessionLocal
+from app.db.replica import async_read_session_factory, read_session_factory
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -12,3 +17,41 @@ def get_db() -> Generator[Session, None, None]:
         yield session
     finally:
         session.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async counterpart of get_db() for `async def` routes.
+    """
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+def _sticky_keys(request: Request) -> List[str]:
+    """Session/user ids a read request is about (path `session_id`, query `sessionId`, caller)."""
+    keys = []
+    sid = request.path_params.get("session_id") or request.query_params.get("sessionId")
+    if sid:
+        keys.append(f"sess:{sid}")
+    user = getattr(request.state, "user", None)
+    if user is not None:
+        keys.append(f"user:{user.id}")
+    return keys
+
+
+def get_read_db(request: Request) -> Generator[Session, None, None]:
+    """
+    Session for read-only routes: bound to the replica (DATABASE_READ_URL), except
+    when the session/user in the request was written recently (read-your-writes).
+    """
+    session = read_session_factory(_sticky_keys(request))()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+async def get_async_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Async counterpart of get_read_db()."""
+    async with async_read_session_factory(_sticky_keys(request))() as session:
+        yield session
@@ -0,0 +1,185 @@
+# src/app/db/engine.py
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import URL, Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from app.core.config import Settings
+from app.core.metrics import DB_STATEMENT_MS
+from app.core.tracing import record as record_span
+
+
+class _PoolCounters:
+    """Checkout/checkin/connect counters plus time spent waiting on a saturated pool."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.values: Dict[str, float] = {
+            "connects": 0, "checkouts": 0, "checkins": 0, "invalidations": 0,
+            "waits": 0, "wait_ms": 0.0, "max_wait_ms": 0.0, "timeouts": 0,
+        }
+
+    def add(self, key: str, n: float = 1) -> None:
+        with self._lock:
+            self.values[key] += n
+
+    def wait(self, ms: float) -> None:
+        with self._lock:
+            self.values["waits"] += 1
+            self.values["wait_ms"] += ms
+            self.values["max_wait_ms"] = max(self.values["max_wait_ms"], ms)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            out = dict(self.values)
+        out["wait_ms"] = round(out["wait_ms"], 1)
+        out["max_wait_ms"] = round(out["max_wait_ms"], 1)
+        return out
+
+
+class _WaitTrackingMixin:
+    """
+    Counts checkouts that found the pool at capacity (size + overflow all checked
+    out) and therefore had to wait for a checkin, and how long they waited.
+    """
+
+    counters: _PoolCounters
+
+    def _do_get(self):  # type: ignore[override]
+        saturated = self.checkedout() >= self.size() + max(self._max_overflow, 0)
+        if not saturated:
+            return super()._do_get()
+        t0 = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            self.counters.add("timeouts")
+            raise
+        finally:
+            self.counters.wait((time.perf_counter() - t0) * 1000)
+
+
+class InstrumentedQueuePool(_WaitTrackingMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_WaitTrackingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _is_sqlite_file(url: URL) -> bool:
+    db = url.database or ""
+    return url.get_backend_name() == "sqlite" and db not in ("", ":memory:") and "mode=memory" not in db
+
+
+def engine_options(url: URL, settings: Settings, is_async: bool = False) -> Dict[str, Any]:
+    """
+    create_engine()/create_async_engine() kwargs for the backend of `url`.
+    - SQLite file: queue pool (WAL lets readers run next to the writer); pragmas via apply_profile()
+    - SQLite memory: SQLAlchemy's default single-connection pool, nothing to tune
+    - server databases: sized pool with pre-ping and recycle
+    """
+    opts: Dict[str, Any] = {"echo": settings.database_echo}
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        opts["connect_args"] = {"check_same_thread": False}
+        if not _is_sqlite_file(url):
+            return opts
+        # busy_timeout pragma covers waits on locks; the driver timeout (seconds) must not undercut it
+        opts["connect_args"]["timeout"] = settings.sqlite_busy_timeout_ms / 1000
+    else:
+        opts["pool_pre_ping"] = settings.db_pool_pre_ping
+        opts["pool_recycle"] = settings.db_pool_recycle
+    opts.update(
+        poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+    )
+    return opts
+
+
+def sqlite_pragmas(settings: Settings) -> Dict[str, Any]:
+    return {
+        "journal_mode": settings.sqlite_journal_mode,
+        "synchronous": settings.sqlite_synchronous,
+        "mmap_size": settings.sqlite_mmap_size,
+        "cache_size": settings.sqlite_cache_size,
+        "busy_timeout": settings.sqlite_busy_timeout_ms,
+        "temp_store": settings.sqlite_temp_store,
+    }
+
+
+def apply_profile(engine: Engine, settings: Settings, role: str = "primary") -> Engine:
+    """
+    Attach pool counters and statement timing (db_statement_ms{engine=role} plus a
+    "db" span on the request trace) and, for SQLite files, run the pragmas on every
+    new DBAPI connection.
+    Pass `async_engine.sync_engine` for async engines.
+    """
+    pool: Pool = engine.pool
+    counters = getattr(pool, "counters", None)
+    if counters is None:
+        counters = _PoolCounters()
+        pool.counters = counters  # type: ignore[attr-defined]
+
+    event.listen(pool, "connect", lambda *a: counters.add("connects"))
+    event.listen(pool, "checkout", lambda *a: counters.add("checkouts"))
+    event.listen(pool, "checkin", lambda *a: counters.add("checkins"))
+    event.listen(pool, "invalidate", lambda *a: counters.add("invalidations"))
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _stmt_start(conn, _cursor, _statement, _params, _context, _executemany):
+        conn.info.setdefault("stmt_t0", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stmt_end(conn, _cursor, statement, _params, _context, _executemany):
+        stack = conn.info.get("stmt_t0")
+        if stack:
+            verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "?"
+            t0 = stack.pop()
+            ms = (time.perf_counter() - t0) * 1000
+            DB_STATEMENT_MS.observe(ms, engine=role, verb=verb)
+            record_span("db", t0, ms, engine=role, verb=verb)
+
+    @event.listens_for(engine, "handle_error")
+    def _stmt_failed(ctx):
+        stack = ctx.connection.info.get("stmt_t0") if ctx.connection is not None else None
+        if stack:
+            stack.pop()
+
+    if _is_sqlite_file(engine.url):
+        pragmas = sqlite_pragmas(settings)
+
+        @event.listens_for(engine, "connect")
+        def _set_pragmas(dbapi_conn, _record):
+            cur = dbapi_conn.cursor()
+            try:
+                for name, value in pragmas.items():
+                    cur.execute(f"PRAGMA {name}={value}")
+            finally:
+                cur.close()
+
+    return engine
+
+
+def pool_status(engine: Engine) -> Dict[str, Any]:
+    """Point-in-time pool occupancy plus the cumulative counters."""
+    pool = engine.pool
+    out: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        out.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+        )
+    counters = getattr(pool, "counters", None)
+    if counters is not None:
+        out.update(counters.snapshot())
+    return out
@@ -0,0 +1,71 @@
+# src/app/db/migrations.py
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from app.core.logging import get_logger
+
+log = get_logger("db.migrations")
+
+# Values used to backfill columns added to tables that already have rows
+_BACKFILL = {
+    ("messages", "created_at"): "'1970-01-01 00:00:00.000000'",
+}
+
+
+def ensure_schema(engine: Engine, metadata) -> None:
+    """
+    Additive, idempotent schema sync for databases created by older versions:
+    create_all() makes new tables and indexes but never alters existing tables,
+    so missing columns are added here (nullable, then backfilled) and indexes
+    are created if absent. Destructive changes are out of scope.
+    Message versions of pre-existing rows are numbered per session afterwards.
+    """
+    metadata.create_all(bind=engine)
+    insp = inspect(engine)
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            existing = {c["name"] for c in insp.get_columns(table.name)}
+            for col in table.columns:
+                if col.name in existing:
+                    continue
+                col_type = col.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {col.name} {col_type}'))
+                backfill = _BACKFILL.get((table.name, col.name))
+                if backfill is None and col.default is not None and col.default.is_scalar:
+                    backfill = repr(col.default.arg)
+                if backfill is not None:
+                    conn.execute(text(f"UPDATE {table.name} SET {col.name} = {backfill} WHERE {col.name} IS NULL"))
+                log.info(f"schema | added column {table.name}.{col.name}")
+            indexes = {ix["name"] for ix in insp.get_indexes(table.name)}
+            for ix in table.indexes:
+                if ix.name not in indexes:
+                    ix.create(bind=conn, checkfirst=True)
+                    log.info(f"schema | created index {ix.name}")
+        _number_message_versions(conn)
+
+
+def _number_message_versions(conn) -> None:
+    """
+    Messages written before versions existed were backfilled with version 0, which
+    since_version polling (version > n) can never return. Number them 1..n per session
+    in (created_at, id) order and raise sessions.version to the session's highest.
+    Sessions that already got new messages are renumbered as a whole (new ones shift up).
+    No-op once every message has a version.
+    """
+    if conn.execute(text("SELECT 1 FROM messages WHERE version = 0 LIMIT 1")).first() is None:
+        return
+    conn.execute(text(
+        "CREATE TEMPORARY TABLE _message_versions AS "
+        "SELECT id, ROW_NUMBER() OVER (PARTITION BY session_id ORDER BY created_at, id) AS version "
+        "FROM messages WHERE session_id IN (SELECT session_id FROM messages WHERE version = 0)"
+    ))
+    n = conn.execute(text(
+        "UPDATE messages SET version = (SELECT v.version FROM _message_versions v WHERE v.id = messages.id) "
+        "WHERE id IN (SELECT id FROM _message_versions)"
+    )).rowcount
+    conn.execute(text("DROP TABLE _message_versions"))
+    conn.execute(text(
+        "UPDATE sessions SET version = (SELECT MAX(m.version) FROM messages m WHERE m.session_id = sessions.id) "
+        "WHERE version < (SELECT COALESCE(MAX(m.version), 0) FROM messages m WHERE m.session_id = sessions.id)"
+    ))
+    log.info(f"schema | numbered versions of {n} pre-existing messages")
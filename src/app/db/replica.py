@@ -0,0 +1,157 @@
+# src/app/db/replica.py
+import sqlite3
+import threading
+from typing import Iterable, Optional, Set
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.async_session import AsyncSessionLocal, _async_url, async_engine
+from app.db.engine import apply_profile, engine_options
+from app.db.session import SessionLocal, _prepare_sqlite_directory, engine
+from app.domain.models import Message, User, Session as ChatSession
+
+log = get_logger("rag.db.replica")
+
+# ---------------------------------------------------------------------------
+# Read-after-write stickiness
+# Keys are "sess:<id>" / "user:<id>"; a key written in the last READ_STICKY_MS
+# routes the reads that mention it to the primary. Per process: with several
+# workers, a write seen by another worker is only covered by replica lag < TTL.
+# ---------------------------------------------------------------------------
+recent_writes: TTLCache[bool] = TTLCache(
+    maxsize=100_000, ttl_seconds=settings.read_sticky_ms / 1000, name="recent_writes"
+)
+
+
+def mark_written(*keys: str) -> None:
+    for k in keys:
+        recent_writes.set(k, True)
+
+
+def is_sticky(keys: Iterable[str]) -> bool:
+    return any(recent_writes.get(k) for k in keys)
+
+
+def _written_keys(obj) -> Set[str]:
+    if isinstance(obj, Message):
+        return {f"sess:{obj.session_id}"}
+    if isinstance(obj, ChatSession):
+        keys = {f"sess:{obj.id}"}
+        if obj.user_id:
+            keys.add(f"user:{obj.user_id}")
+        return keys
+    if isinstance(obj, User):
+        return {f"user:{obj.id}"}
+    return set()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_written(session, _ctx):
+    # after_flush: primary keys are assigned, new/dirty/deleted still hold the pre-flush state
+    keys = session.info.setdefault("written_keys", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        keys |= _written_keys(obj)
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_committed(session):
+    keys = session.info.pop("written_keys", None)
+    if keys:
+        mark_written(*keys)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session):
+    session.info.pop("written_keys", None)
+
+
+# ---------------------------------------------------------------------------
+# Read engines (fall back to the primary when DATABASE_READ_URL is unset)
+# ---------------------------------------------------------------------------
+class SqliteReplicaCopier:
+    """
+    Local stand-in for replication: copies the primary SQLite file onto the replica
+    file with the online backup API (a consistent snapshot) every `interval` seconds.
+    """
+
+    def __init__(self, primary_path: str, replica_path: str, interval: float):
+        self.primary_path = primary_path
+        self.replica_path = replica_path
+        self.interval = interval
+        self.copies = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sync_once(self) -> None:
+        src = sqlite3.connect(self.primary_path)
+        dst = sqlite3.connect(self.replica_path, timeout=settings.sqlite_busy_timeout_ms / 1000)
+        try:
+            src.backup(dst)
+            self.copies += 1
+        finally:
+            dst.close()
+            src.close()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.sync_once()
+            except sqlite3.Error as e:
+                log.warning(f"replica copy failed | err={e}")
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="sqlite-replica-copier", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.interval + 5)
+            self._thread = None
+
+
+replica_copier: Optional[SqliteReplicaCopier] = None
+
+if settings.database_read_url:
+    _read_url = make_url(settings.database_read_url)
+    if _read_url.get_backend_name() == "sqlite":
+        _prepare_sqlite_directory(_read_url.database or "")
+        if settings.sqlite_replica_sync_seconds > 0:
+            replica_copier = SqliteReplicaCopier(
+                engine.url.database, _read_url.database, settings.sqlite_replica_sync_seconds
+            )
+            replica_copier.sync_once()  # the replica must have the schema before the first read
+
+    read_engine = apply_profile(create_engine(_read_url, **engine_options(_read_url, settings)), settings,
+                                role="replica")
+    _aread_url = _async_url(settings.database_read_url)
+    async_read_engine = create_async_engine(_aread_url, **engine_options(_aread_url, settings, is_async=True))
+    apply_profile(async_read_engine.sync_engine, settings, role="replica")
+
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+    AsyncReadSessionLocal = async_sessionmaker(
+        bind=async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+    log.info(f"read replica enabled | url={read_engine.url.render_as_string(hide_password=True)} "
+             f"| sticky_ms={settings.read_sticky_ms}")
+else:
+    read_engine = engine
+    async_read_engine = async_engine
+    ReadSessionLocal = SessionLocal
+    AsyncReadSessionLocal = AsyncSessionLocal
+
+
+def read_session_factory(keys: Iterable[str] = ()) -> sessionmaker:
+    """Replica sessions unless one of `keys` was written recently."""
+    return SessionLocal if is_sticky(keys) else ReadSessionLocal
+
+
+def async_read_session_factory(keys: Iterable[str] = ()) -> async_sessionmaker:
+    return AsyncSessionLocal if is_sticky(keys) else AsyncReadSessionLocal
@@ -6,6 +6,8 @@ from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
 from app.domain.models import Base
+from app.db.engine import apply_profile, engine_options
+from app.db.migrations import ensure_schema
 
 
 def _prepare_sqlite_directory(database_path: str) -> None:
@@ -25,16 +27,12 @@ def _prepare_sqlite_directory(database_path: str) -> None:
 
 engine_url = make_url(settings.database_url)
 
-connect_args: dict[str, object] = {}
-
 if engine_url.get_backend_name() == "sqlite":
     _prepare_sqlite_directory(engine_url.database or "")
-    connect_args["check_same_thread"] = False
 
-engine = create_engine(
-    settings.database_url, connect_args=connect_args, echo=settings.database_echo
-)
+# per-backend profile (pool sizing, SQLite pragmas) from Settings, see app/db/engine.py
+engine = apply_profile(create_engine(engine_url, **engine_options(engine_url, settings)), settings)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base.metadata.create_all(bind=engine)
+ensure_schema(engine, Base.metadata)
@@ -1,4 +1,4 @@
 from .base import Base
-from .entities import Message, Session, User
+from .entities import IngestManifestEntry, Message, Session, User
 
-__all__ = ["Base", "User", "Session", "Message"]
+__all__ = ["Base", "User", "Session", "Message", "IngestManifestEntry"]
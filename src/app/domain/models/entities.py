@@ -1,7 +1,8 @@
 # app/domain/models/entities.py
 from __future__ import annotations
+from datetime import datetime, timezone
 from typing import List, Optional
-from sqlalchemy import ForeignKey, String, Text
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .base import Base
 
@@ -23,14 +24,24 @@ class Session(Base):
         index=True,
     )
     title: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    # bumped on every appended message; drives ETags and since_version polling
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
 
     user: Mapped[Optional[User]] = relationship(back_populates="sessions")
     messages: Mapped[List["Message"]] = relationship(
         back_populates="session", cascade="all, delete-orphan"
     )
 
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
 class Message(Base):
     __tablename__ = "messages"
+    # keyset pagination: WHERE session_id = ? AND (created_at, id) > (?, ?) ORDER BY created_at, id
+    __table_args__ = (
+        Index("ix_messages_session_created_id", "session_id", "created_at", "id"),
+        Index("ix_messages_session_version", "session_id", "version"),
+    )
     session_id: Mapped[str] = mapped_column(
         String(36),
         ForeignKey("sessions.id", ondelete="CASCADE"),
@@ -39,5 +50,22 @@ class Message(Base):
     )
     role: Mapped[str] = mapped_column(String(20), nullable=False, default="user")
     content: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), default=_utcnow)
+    # session.version right after this message was appended (1, 2, 3, ...)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
 
     session: Mapped[Session] = relationship(back_populates="messages")
+
+class IngestManifestEntry(Base):
+    """One row per vector written by /api/ingest: lets ingest skip unchanged entries."""
+    __tablename__ = "ingest_manifest"
+    __table_args__ = (UniqueConstraint("namespace", "entry_id", name="uq_ingest_manifest_ns_entry"),)
+
+    namespace: Mapped[str] = mapped_column(String(100), nullable=False)
+    entry_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    embed_model: Mapped[str] = mapped_column(String(100), nullable=False)
+    dimension: Mapped[int] = mapped_column(Integer, nullable=False)
+    # where the vector was written ("pinecone:<host>" | "local:<path>"); NULL = written before this was tracked
+    target: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    upserted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=_utcnow)
@@ -1,7 +1,7 @@
 # app/domain/schemas.py
 from __future__ import annotations
 from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 # ---------- USERS ----------
 class UserCreate(BaseModel):
@@ -49,10 +49,17 @@ class ChatMessage(BaseModel):
 class ChatHistoryResponse(BaseModel):
     sessionId: str
     messages: List[ChatMessage]
+    # keyset cursors for /api/history?before=... (older) and ?after=... (newer)
+    prevCursor: Optional[str] = None
+    nextCursor: Optional[str] = None
+    # session version after the last message (monotonic); use with since_version / ETag
+    version: Optional[int] = None
 
 class ChatRequest(BaseModel):
     sessionId: str
     message: str
+    # "full" → the whole conversation (unpaginated); "delta" → only the messages appended by this turn
+    mode: Literal["full", "delta"] = "full"
 
 # --- LOGIN ---
 class LoginRequest(BaseModel):
@@ -1,7 +1,15 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
 from app.core.middleware.auth_context import AuthContextMiddleware
+from app.core.middleware.metrics import MetricsMiddleware
+from app.core.middleware.tracing import TracingMiddleware
+from app.core.pagination import InvalidCursor
+from app.core.password_pool import HashingBusy, password_hasher
 from app.api.routes import (
     health,
     chat,
@@ -10,10 +18,33 @@ from app.api.routes import (
     users,
     sessions,
     messages,
+    metrics,
     auth
 )
 
-app = FastAPI(title=settings.api_name)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from app.db.replica import replica_copier, async_read_engine
+    if replica_copier is not None:
+        replica_copier.start()  # local stand-in for replication (SQLite)
+    password_hasher.start()
+    yield
+    # shutdown: release async network clients and pooled connections
+    from app.services.vector_client import aclose as close_vector_clients
+    from app.db.async_session import async_engine
+    from app.repositories.write_behind import write_behind
+    await chat.drain_stream_turns()  # streamed turns still being persisted
+    if write_behind is not None:
+        await run_in_threadpool(write_behind.stop)  # flush queued chat turns first
+    if replica_copier is not None:
+        await run_in_threadpool(replica_copier.stop)
+    await run_in_threadpool(password_hasher.shutdown)
+    await close_vector_clients()
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
+
+app = FastAPI(title=settings.api_name, lifespan=lifespan)
 
 # CORS to frontend
 app.add_middleware(
@@ -22,13 +53,31 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Prev-Cursor", "ETag", "Server-Timing"],
 )
 
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"detail": str(exc)})
+
+@app.exception_handler(HashingBusy)
+async def hashing_busy_handler(request: Request, exc: HashingBusy):
+    # fail fast: a login burst must not queue up behind (or in front of) chat traffic
+    return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"detail": str(exc)},
+                        headers={"Retry-After": "1"})
+
 # Auth Context Middleware
 app.add_middleware(AuthContextMiddleware)
 
+# Request latency histograms (outermost: includes auth)
+app.add_middleware(MetricsMiddleware)
+
+# Per-request spans -> Server-Timing header + slow-request log (outermost)
+app.add_middleware(TracingMiddleware)
+
 # Routes
 app.include_router(health.router)
+app.include_router(metrics.router)
 app.include_router(chat.router)
 app.include_router(users.router)
 app.include_router(sessions.router)
@@ -0,0 +1,52 @@
+# app/repositories/async_db.py
+from __future__ import annotations
+from typing import List, Optional, Sequence, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.domain.models import Message
+from app.core.pagination import Page, PageParams, keyset
+from app.repositories.db import MESSAGE_ORDER, build_turn, next_version_stmt
+from app.domain.models import Session as ChatSession
+
+# Async twins of app.repositories.db for the `async def` chat routes.
+
+# ---------- MESSAGES ----------
+async def list_messages(db: AsyncSession, session_id: str) -> List[Message]:
+    res = await db.scalars(select(Message).where(Message.session_id == session_id).order_by(*MESSAGE_ORDER))
+    return res.all()
+
+async def page_messages(db: AsyncSession, session_id: str, params: PageParams,
+                        tail: bool = True) -> Page[Message]:
+    """One page of a conversation; by default the most recent `limit` messages."""
+    stmt, finish = keyset(select(Message).where(Message.session_id == session_id), MESSAGE_ORDER, params, tail=tail)
+    res = await db.scalars(stmt)
+    return finish(res.all())
+
+async def get_session_version(db: AsyncSession, session_id: str) -> Optional[int]:
+    return await db.scalar(select(ChatSession.version).where(ChatSession.id == session_id))
+
+async def list_messages_since(db: AsyncSession, session_id: str, since_version: int, limit: int) -> List[Message]:
+    res = await db.scalars(
+        select(Message)
+        .where(Message.session_id == session_id, Message.version > since_version)
+        .order_by(Message.version)
+        .limit(limit)
+    )
+    return res.all()
+
+async def append_message(db: AsyncSession, session_id: str, role: str, content: str) -> Message:
+    version = (await db.execute(next_version_stmt(session_id))).scalar_one()
+    msg = Message(session_id=session_id, role=role, content=content, version=version)
+    db.add(msg)
+    await db.commit()
+    await db.refresh(msg)
+    return msg
+
+async def append_turn(db: AsyncSession, session_id: str, items: Sequence[Tuple[str, str]]) -> List[Message]:
+    """Persists all messages of a turn in a single transaction (one commit, no refresh)."""
+    top = (await db.execute(next_version_stmt(session_id, len(items)))).scalar_one()
+    msgs = build_turn(session_id, top, items)
+    db.add_all(msgs)
+    await db.commit()
+    return msgs
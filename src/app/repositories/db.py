@@ -1,10 +1,16 @@
 # app/repositories/db.py
 from __future__ import annotations
-from typing import List, Optional
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import select, update
 
 from app.domain.models import User, Session as ChatSession, Message
+from app.core.pagination import Page, PageParams, keyset
+
+# chronological order inside a conversation (matches ix_messages_session_created_id)
+MESSAGE_ORDER = (Message.created_at, Message.id)
 
 # ---------- USERS ----------
 def get_user(db: Session, user_id: str) -> Optional[User]:
@@ -20,13 +26,86 @@ def get_session(db: Session, session_id: str) -> Optional[ChatSession]:
 def list_sessions_by_user(db: Session, user_id: str) -> List[ChatSession]:
     return db.scalars(select(ChatSession).where(ChatSession.user_id == user_id)).all()
 
+def page_sessions(db: Session, params: PageParams, user_id: Optional[str] = None) -> Page[ChatSession]:
+    stmt = select(ChatSession)
+    if user_id is not None:
+        stmt = stmt.where(ChatSession.user_id == user_id)
+    stmt, finish = keyset(stmt, [ChatSession.id], params)
+    return finish(db.scalars(stmt).all())
+
+def page_users(db: Session, params: PageParams) -> Page[User]:
+    stmt, finish = keyset(select(User), [User.id], params)
+    return finish(db.scalars(stmt).all())
+
 # ---------- MESSAGES ----------
 def list_messages(db: Session, session_id: str) -> List[Message]:
-    return db.scalars(select(Message).where(Message.session_id == session_id).order_by(Message.id)).all()
+    return db.scalars(select(Message).where(Message.session_id == session_id).order_by(*MESSAGE_ORDER)).all()
+
+def page_messages(db: Session, params: PageParams, session_id: Optional[str] = None,
+                  tail: bool = False) -> Page[Message]:
+    """One page of messages; tail=True starts from the most recent ones."""
+    stmt = select(Message)
+    if session_id is not None:
+        stmt = stmt.where(Message.session_id == session_id)
+        stmt, finish = keyset(stmt, MESSAGE_ORDER, params, tail=tail)
+    else:
+        # admin listing across sessions: plain id order
+        stmt, finish = keyset(stmt, [Message.id], params, tail=tail)
+    return finish(db.scalars(stmt).all())
+
+def next_version_stmt(session_id: str, n: int = 1):
+    """Atomically bumps sessions.version by n and returns the new value."""
+    return (
+        update(ChatSession)
+        .where(ChatSession.id == session_id)
+        .values(version=ChatSession.version + n)
+        .returning(ChatSession.version)
+    )
+
+def get_session_version(db: Session, session_id: str) -> Optional[int]:
+    return db.scalar(select(ChatSession.version).where(ChatSession.id == session_id))
+
+def list_messages_since(db: Session, session_id: str, since_version: int, limit: int) -> List[Message]:
+    return db.scalars(
+        select(Message)
+        .where(Message.session_id == session_id, Message.version > since_version)
+        .order_by(Message.version)
+        .limit(limit)
+    ).all()
 
 def append_message(db: Session, session_id: str, role: str, content: str) -> Message:
-    msg = Message(session_id=session_id, role=role, content=content)
+    version = db.execute(next_version_stmt(session_id)).scalar_one()
+    msg = Message(session_id=session_id, role=role, content=content, version=version)
     db.add(msg)
     db.commit()
     db.refresh(msg)
     return msg
+
+def build_turn(session_id: str, top_version: int, items: Sequence[Tuple[str, str]],
+               now: Optional[datetime] = None) -> List[Message]:
+    """
+    Message rows for one turn, fully populated client-side (id, created_at, version)
+    so nothing has to be refreshed after commit. `top_version` is the session version
+    after the bump; created_at is strictly increasing to keep (created_at, id) order.
+    """
+    now = now or datetime.now(timezone.utc)
+    first = top_version - len(items) + 1
+    return [
+        Message(
+            id=str(uuid.uuid4()),
+            session_id=session_id,
+            role=role,
+            content=content,
+            created_at=now + timedelta(microseconds=i),
+            version=first + i,
+        )
+        for i, (role, content) in enumerate(items)
+    ]
+
+def append_turn(db: Session, session_id: str, items: Sequence[Tuple[str, str]]) -> List[Message]:
+    """Persists all messages of a turn in a single transaction (one commit, no refresh)."""
+    top = db.execute(next_version_stmt(session_id, len(items))).scalar_one()
+    msgs = build_turn(session_id, top, items)
+    db.add_all(msgs)
+    db.commit()
+    return msgs
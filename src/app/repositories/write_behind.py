@@ -0,0 +1,205 @@
+# src/app/repositories/write_behind.py
+import asyncio
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.replica import mark_written
+from app.domain.models import Message
+from app.repositories.db import build_turn, next_version_stmt
+
+log = get_logger("rag.write_behind")
+
+Turn = Sequence[Tuple[str, str]]  # [(role, content), ...]
+
+
+@dataclass
+class _Pending:
+    session_id: str
+    items: Turn
+    future: Future = field(default_factory=Future)
+
+
+class WriteBehindQueue:
+    """
+    Group commit for chat turns: a single writer thread drains the queue and
+    persists up to `max_batch` turns (or whatever arrived within `max_delay_ms`
+    of the first one) in ONE transaction, i.e. one fsync for many requests.
+
+    Read-your-writes: readers of a session call wait_session()/await_session()
+    first, which blocks only while that session still has turns in flight.
+    """
+
+    def __init__(self, session_factory: Callable[..., Session],
+                 max_batch: int = 64, max_delay_ms: float = 5.0):
+        self._session_factory = session_factory
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max(0.0, max_delay_ms) / 1000
+        self._q: "queue.Queue[Optional[_Pending]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, List[Future]] = defaultdict(list)
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"turns": 0, "batches": 0, "failed_batches": 0, "max_batch_seen": 0}
+
+    # ---- lifecycle ----
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Flush everything queued so far and stop the writer (app shutdown)."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._q.put(None)
+        thread.join(timeout)
+        log.info(f"write-behind stopped | {self.stats()}")
+
+    # ---- producers ----
+    def submit_turn(self, session_id: str, items: Turn) -> "Future[List[Message]]":
+        self.start()
+        mark_written(f"sess:{session_id}")  # reads of this session go to the primary from now on
+        p = _Pending(session_id=session_id, items=list(items))
+        with self._lock:
+            self._inflight[session_id].append(p.future)
+        p.future.add_done_callback(lambda f, sid=session_id: self._done(sid, f))
+        self._q.put(p)
+        return p.future
+
+    async def asubmit_turn(self, session_id: str, items: Turn) -> List[Message]:
+        return await asyncio.wrap_future(self.submit_turn(session_id, items))
+
+    # ---- read-your-writes ----
+    def _inflight_for(self, session_id: str) -> List[Future]:
+        with self._lock:
+            return list(self._inflight.get(session_id, ()))
+
+    def has_pending(self, session_id: str) -> bool:
+        with self._lock:
+            return bool(self._inflight.get(session_id))
+
+    def wait_session(self, session_id: str, timeout: Optional[float] = None) -> None:
+        for f in self._inflight_for(session_id):
+            f.exception(timeout)  # waits; errors are reported to the producer, not here
+
+    async def await_session(self, session_id: str) -> None:
+        pending = self._inflight_for(session_id)
+        if pending:
+            await asyncio.wait([asyncio.wrap_future(f) for f in pending])
+
+    def _done(self, session_id: str, fut: Future) -> None:
+        with self._lock:
+            lst = self._inflight.get(session_id)
+            if lst is not None:
+                try:
+                    lst.remove(fut)
+                except ValueError:
+                    pass
+                if not lst:
+                    del self._inflight[session_id]
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            inflight = sum(len(v) for v in self._inflight.values())
+        return {**self._stats, "queued": self._q.qsize(), "inflight": inflight,
+                "max_batch": self.max_batch, "max_delay_ms": self.max_delay * 1000}
+
+    # ---- writer ----
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._q.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    nxt = self._q.get(timeout=remaining) if remaining > 0 else self._q.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stopping = True
+                    break
+                batch.append(nxt)
+            self._write(batch)
+        # drain whatever is left after the stop sentinel
+        rest = []
+        while True:
+            try:
+                p = self._q.get_nowait()
+            except queue.Empty:
+                break
+            if p is not None:
+                rest.append(p)
+        for i in range(0, len(rest), self.max_batch):
+            self._write(rest[i:i + self.max_batch])
+
+    def _write(self, batch: List[_Pending]) -> None:
+        by_session: Dict[str, List[_Pending]] = defaultdict(list)
+        for p in batch:
+            by_session[p.session_id].append(p)
+
+        results: List[Tuple[_Pending, object]] = []
+        db = self._session_factory(expire_on_commit=False)
+        try:
+            for session_id, turns in by_session.items():
+                n = sum(len(p.items) for p in turns)
+                top = db.execute(next_version_stmt(session_id, n)).scalar_one_or_none()
+                if top is None:
+                    for p in turns:
+                        results.append((p, LookupError(f"session {session_id} not found")))
+                    continue
+                # one version range per session, split across its turns in arrival order
+                first, offset = top - n, 0
+                now = datetime.now(timezone.utc)
+                for p in turns:
+                    first += len(p.items)
+                    msgs = build_turn(session_id, first, p.items, now=now + timedelta(microseconds=offset))
+                    offset += len(p.items)
+                    db.add_all(msgs)
+                    results.append((p, msgs))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            self._stats["failed_batches"] += 1
+            log.exception(f"write-behind batch failed | turns={len(batch)}")
+            for p in batch:
+                p.future.set_exception(e)
+            return
+        finally:
+            db.close()
+
+        self._stats["batches"] += 1
+        self._stats["turns"] += len(batch)
+        self._stats["max_batch_seen"] = max(self._stats["max_batch_seen"], len(batch))
+        for p, res in results:
+            if isinstance(res, Exception):
+                p.future.set_exception(res)
+            else:
+                p.future.set_result(res)
+
+
+def _make_queue() -> Optional[WriteBehindQueue]:
+    if not settings.write_behind_enabled:
+        return None
+    from app.db.session import SessionLocal
+    return WriteBehindQueue(SessionLocal, max_batch=settings.write_behind_max_batch,
+                            max_delay_ms=settings.write_behind_max_delay_ms)
+
+
+# None when WRITE_BEHIND_ENABLED is off: callers use the per-request transaction instead
+write_behind: Optional[WriteBehindQueue] = _make_queue()
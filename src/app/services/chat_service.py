@@ -1,48 +1,203 @@
 import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
 from app.domain.schemas import ChatMessage
-from app.services.vector_client import search, build_context
+from app.services.vector_client import VECTOR_ERRORS, search, asearch, degraded_search, iter_context_blocks
+from app.services.index_state import current_generation
+from app.services.question_shortcuts import SHORTCUTS_ENABLED, synced_question_shortcuts
 from app.core.logging import get_logger
+from app.core.cache import TTLCache
+from app.core.metrics import ANSWERS, ANSWER_MS, MATCHES, MATCHES_BELOW_THRESHOLD, register_cache
+from app.core.text import normalize_text
+from app.core.tracing import span
+from app.core.resilience import DependencyUnavailable, deadline_scope
 import os
 CONFIDENCE_THRESHOLD = float(os.getenv("RAG_CONFIDENCE_THRESHOLD", "0.25"))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1024"))        # 0 disables
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "600"))
+# retrieval budget per chat request, passed down to every vector call (0 = none)
+CHAT_DEADLINE_MS = float(os.getenv("CHAT_DEADLINE_MS", "3000"))
+# when the vector service is unavailable (breaker open, bulkhead full, deadline, SDK/network error):
+# "lexical" (BM25) | "local" (cached embedding + local snapshot, else lexical) | "none" (canned reply)
+DEGRADED_MODE = os.getenv("DEGRADED_MODE", "lexical").lower()
 
 log = get_logger("rag.chat")
 
+NO_MATCH_REPLY = ("I couldn't find a sufficiently relevant answer in the FAQ. "
+                  "Try rephrasing or ask about account setup, payments, "
+                  "security, compliance, or technical support.")
+ANSWER_HEADER = "Here are the most relevant answers found in the FAQ:\n\n"
+ANSWER_FOOTER = "Let me know if you’d like me to expand on any of the points above."
+
 class ChatService:
+    def __init__(self) -> None:
+        # key = (normalized query, index generation): any index write makes old entries unreachable
+        self.answer_cache: TTLCache[ChatMessage] = TTLCache(
+            maxsize=ANSWER_CACHE_SIZE, ttl_seconds=ANSWER_CACHE_TTL_SECONDS, name="answers"
+        )
+        register_cache(self.answer_cache)
+
     def answer_with_rag(self, user_text: str) -> ChatMessage:
         """
         Retrieve relevant FAQ entries from Pinecone and build a grounded answer.
         Filters low-confidence matches based on similarity score.
+        Answers are cached per normalized query and index generation.
+        """
+        t0 = time.perf_counter()
+        log.info(f"/api/chat | q='{user_text[:120]}'")
+
+        key = (normalize_text(user_text), current_generation())
+        cached = self.answer_cache.get(key)
+        if cached is not None:
+            log.info(f"/api/chat | answer cache hit | gen={key[1]} | "
+                     f"total_ms={(time.perf_counter() - t0) * 1000:.2f}")
+            self._record("cache_hit", t0)
+            return cached.model_copy()
+
+        matches, degraded = self._retrieve(user_text)
+        reply = self._compose(matches, t0, degraded)
+        if not degraded:
+            self.answer_cache.set(key, reply)
+        return reply.model_copy()
+
+    async def aanswer_with_rag(self, user_text: str) -> ChatMessage:
+        """
+        Async twin of answer_with_rag(), backed by asearch(); shares the answer cache.
         """
         t0 = time.perf_counter()
         log.info(f"/api/chat | q='{user_text[:120]}'")
 
-        matches = search(user_text, top_k=5)
+        key = (normalize_text(user_text), current_generation())
+        cached = self.answer_cache.get(key)
+        if cached is not None:
+            log.info(f"/api/chat | answer cache hit | gen={key[1]} | "
+                     f"total_ms={(time.perf_counter() - t0) * 1000:.2f}")
+            self._record("cache_hit", t0)
+            return cached.model_copy()
+
+        matches, degraded = await self._aretrieve(user_text)
+        reply = self._compose(matches, t0, degraded)
+        if not degraded:
+            self.answer_cache.set(key, reply)
+        return reply.model_copy()
+
+    async def astream_answer(self, user_text: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Streaming variant: yields (event, data) as soon as each stage is ready:
+        ("matches", ...) after retrieval, then one ("chunk", {"kind", "text"}) per piece
+        of the answer (header, each context block, footer). Concatenating the chunk
+        texts gives exactly the content answer_with_rag() would return.
+        """
+        t0 = time.perf_counter()
+        log.info(f"/api/chat/stream | q='{user_text[:120]}'")
+
+        key = (normalize_text(user_text), current_generation())
+        cached = self.answer_cache.get(key)
+        if cached is not None:
+            self._record("cache_hit", t0)
+            yield "matches", {"cached": True, "matches": []}
+            yield "chunk", {"kind": "answer", "text": cached.content}
+            return
+
+        matches, degraded = await self._aretrieve(user_text)
+        strong_matches = self._strong_matches(matches, t0)
+        self._record(self._outcome(matches, strong_matches, degraded), t0)
+        yield "matches", {
+            "cached": False,
+            "degraded": degraded,
+            "matches": [{"id": m["id"], "score": round(m["score"], 4)} for m in strong_matches],
+        }
+        parts: List[str] = []
+        for kind, text in self._answer_chunks(strong_matches):
+            parts.append(text)
+            yield "chunk", {"kind": kind, "text": text}
+        if not degraded:
+            self.answer_cache.set(key, ChatMessage(role="assistant", content="".join(parts)))
+
+    def _shortcut(self, user_text: str) -> Optional[List[Dict[str, Any]]]:
+        """Known question (exact, alias or near-duplicate): answer from the local corpus, no search()."""
+        if not SHORTCUTS_ENABLED:
+            return None
+        hit = synced_question_shortcuts().lookup(user_text)
+        if hit is None:
+            return None
+        log.info(f"/api/chat | shortcut hit | path={hit.path} | id={hit.entry_id} | score={hit.score}")
+        return [hit.as_match()]
+
+    def _retrieve(self, user_text: str) -> Tuple[List[Dict[str, Any]], bool]:
+        """(matches, degraded): shortcut, else search() within the deadline, else degraded_search()."""
+        shortcut = self._shortcut(user_text)
+        if shortcut:
+            return shortcut, False
+        try:
+            with deadline_scope(CHAT_DEADLINE_MS):
+                return search(user_text, top_k=5), False
+        except VECTOR_ERRORS as e:
+            return self._degrade(user_text, e), True
+
+    async def _aretrieve(self, user_text: str) -> Tuple[List[Dict[str, Any]], bool]:
+        shortcut = self._shortcut(user_text)
+        if shortcut:
+            return shortcut, False
+        try:
+            with deadline_scope(CHAT_DEADLINE_MS):
+                return await asearch(user_text, top_k=5), False
+        except VECTOR_ERRORS as e:
+            return self._degrade(user_text, e), True
+
+    @staticmethod
+    def _degrade(user_text: str, error: BaseException) -> List[Dict[str, Any]]:
+        if isinstance(error, DependencyUnavailable):
+            log.warning(f"/api/chat | degraded ({DEGRADED_MODE}) | reason={error.reason} | {error}")
+        else:
+            log.warning(f"/api/chat | degraded ({DEGRADED_MODE}) | vector search failed: "
+                        f"{type(error).__name__}: {error}")
+        return degraded_search(user_text, top_k=5, mode=DEGRADED_MODE)
+
+    @staticmethod
+    def _outcome(matches, strong_matches, degraded: bool = False) -> str:
+        if degraded:
+            return "degraded"
+        if matches and matches[0].get("shortcut"):
+            return "shortcut"
+        return "answered" if strong_matches else "no_match"
+
+    @staticmethod
+    def _record(outcome: str, t0: float) -> None:
+        ANSWERS.inc(outcome=outcome)
+        ANSWER_MS.observe((time.perf_counter() - t0) * 1000, outcome=outcome)
+
+    def _strong_matches(self, matches, t0: float) -> List[Dict[str, Any]]:
         total_ms = (time.perf_counter() - t0) * 1000
 
         log.info(f"/api/chat | matches={len(matches)} | total_ms={total_ms:.1f}")
 
         # ✅ Confidence filter
-        strong_matches = [m for m in matches if m.get("score", 0) >= CONFIDENCE_THRESHOLD]
+        strong_matches = [m for m in matches if (m.get("score") or 0) >= CONFIDENCE_THRESHOLD]
+        MATCHES.observe(len(matches))
+        MATCHES_BELOW_THRESHOLD.inc(len(matches) - len(strong_matches))
 
         if not strong_matches:
             log.info(f"/api/chat | no strong matches (threshold={CONFIDENCE_THRESHOLD})")
-            return ChatMessage(
-                role="assistant",
-                content=("I couldn't find a sufficiently relevant answer in the FAQ. "
-                         "Try rephrasing or ask about account setup, payments, "
-                         "security, compliance, or technical support.")
-            )
-
-        # Small, structured summary for debugging (no PII)
-        summary = [{"id": m["id"], "score": round(m["score"], 4)} for m in strong_matches[:3]]
-        log.debug(f"/api/chat | top_matches={summary}")
-
-        context = build_context(strong_matches)
-        answer = (
-            "Here are the most relevant answers found in the FAQ:\n\n"
-            f"{context}\n\n"
-            "Let me know if you’d like me to expand on any of the points above."
-        )
+        else:
+            # Small, structured summary for debugging (no PII)
+            summary = [{"id": m["id"], "score": round(m["score"], 4)} for m in strong_matches[:3]]
+            log.debug(f"/api/chat | top_matches={summary}")
+        return strong_matches
+
+    def _answer_chunks(self, strong_matches) -> Iterator[Tuple[str, str]]:
+        if not strong_matches:
+            yield "answer", NO_MATCH_REPLY
+            return
+        yield "header", ANSWER_HEADER
+        for i, block in enumerate(iter_context_blocks(strong_matches)):
+            yield "context", block if i == 0 else f"\n\n{block}"
+        yield "footer", f"\n\n{ANSWER_FOOTER}"
+
+    def _compose(self, matches, t0: float, degraded: bool = False) -> ChatMessage:
+        strong_matches = self._strong_matches(matches, t0)
+        self._record(self._outcome(matches, strong_matches, degraded), t0)
+        with span("ctx", blocks=len(strong_matches)):
+            answer = "".join(text for _, text in self._answer_chunks(strong_matches))
         return ChatMessage(role="assistant", content=answer)
 
 
@@ -0,0 +1,410 @@
+# src/app/services/fake_pinecone.py
+import asyncio
+import hashlib
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.core.logging import get_logger
+from app.services.vector_store import as_list, fit_dim
+from app.core.text import normalize_text
+
+try:  # SDK error type, so callers' `except PineconeApiException` paths behave the same
+    from pinecone.exceptions import PineconeApiException as _SdkApiError
+except ImportError:  # pragma: no cover - very old SDKs
+    _SdkApiError = Exception
+
+log = get_logger("rag.fake_pinecone")
+
+# Offline stand-in for the part of the Pinecone SDK this app uses
+# (inference.embed, Index.query/upsert/delete/fetch/describe_index_stats, and the asyncio twins).
+# Selected with PINECONE_CLIENT=fake. Latency specs: "const:MS", "uniform:LO:HI",
+# "normal:MEAN:SD", "lognormal:MEDIAN:SIGMA" (milliseconds; empty = no delay).
+FAKE_EMBED_LATENCY = os.getenv("FAKE_PINECONE_EMBED_LATENCY", "")
+FAKE_QUERY_LATENCY = os.getenv("FAKE_PINECONE_QUERY_LATENCY", "")
+FAKE_WRITE_LATENCY = os.getenv("FAKE_PINECONE_WRITE_LATENCY", "")
+FAKE_ERROR_RATE = float(os.getenv("FAKE_PINECONE_ERROR_RATE", "0"))            # -> 503
+FAKE_RATE_LIMIT_RATE = float(os.getenv("FAKE_PINECONE_RATE_LIMIT_RATE", "0"))  # -> 429, random
+FAKE_MAX_QPS = float(os.getenv("FAKE_PINECONE_MAX_QPS", "0"))                 # -> 429 above this (0 = off)
+FAKE_SEED = int(os.getenv("FAKE_PINECONE_SEED", "0"))
+# load faq_seed.py into the queried namespace on first use, so chat works without ingest
+FAKE_PRELOAD_FAQ = os.getenv("FAKE_PINECONE_PRELOAD_FAQ", "true").lower() == "true"
+
+
+class FakeApiError(_SdkApiError):
+    """Shaped like the SDK's API exceptions (status / status_code / reason)."""
+
+    def __init__(self, status: int, reason: str):
+        Exception.__init__(self, f"({status}) {reason}")
+        self.status = self.status_code = status
+        self.reason = reason
+        self.body = {"error": {"code": status, "message": reason}}
+        self.headers = {"retry-after": "1"} if status == 429 else {}
+
+    def __str__(self) -> str:
+        return f"({self.status}) {self.reason}"
+
+
+class LatencyModel:
+    """Samples delays (seconds) from a spec string; see the module comment."""
+
+    def __init__(self, spec: str, rng: random.Random):
+        self.spec = spec.strip()
+        self.rng = rng
+        kind, *args = (self.spec or "const:0").split(":")
+        self.kind = kind.lower()
+        self.args = [float(a) for a in args]
+        if self.kind not in ("const", "uniform", "normal", "lognormal"):
+            raise ValueError(f"unknown latency distribution {spec!r}")
+
+    def sample(self) -> float:
+        a = self.args
+        if self.kind == "const":
+            ms = a[0] if a else 0.0
+        elif self.kind == "uniform":
+            ms = self.rng.uniform(a[0], a[1])
+        elif self.kind == "normal":
+            ms = self.rng.gauss(a[0], a[1])
+        else:
+            ms = a[0] * self.rng.lognormvariate(0.0, a[1])
+        return max(ms, 0.0) / 1000
+
+
+class Faults:
+    """Shared latency/error/rate-limit behaviour for one fake client."""
+
+    def __init__(self, embed: str = FAKE_EMBED_LATENCY, query: str = FAKE_QUERY_LATENCY,
+                 write: str = FAKE_WRITE_LATENCY, error_rate: float = FAKE_ERROR_RATE,
+                 rate_limit_rate: float = FAKE_RATE_LIMIT_RATE, max_qps: float = FAKE_MAX_QPS,
+                 seed: int = FAKE_SEED):
+        self._lock = threading.Lock()
+        self.rng = random.Random(seed)
+        self.latency = {k: LatencyModel(v, self.rng) for k, v in
+                        (("embed", embed), ("query", query), ("write", write))}
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.max_qps = max_qps
+        self._tokens = max_qps
+        self._refilled = time.monotonic()
+        self.counts = {"calls": 0, "errors": 0, "rate_limited": 0}
+
+    def admit(self, op: str) -> float:
+        """Raise the injected failure for this call, or return the delay to apply."""
+        with self._lock:
+            self.counts["calls"] += 1
+            if self.max_qps > 0:
+                now = time.monotonic()
+                self._tokens = min(self.max_qps, self._tokens + (now - self._refilled) * self.max_qps)
+                self._refilled = now
+                if self._tokens < 1:
+                    self.counts["rate_limited"] += 1
+                    raise FakeApiError(429, "Too Many Requests (fake: max qps)")
+                self._tokens -= 1
+            roll = self.rng.random()
+            if roll < self.rate_limit_rate:
+                self.counts["rate_limited"] += 1
+                raise FakeApiError(429, "Too Many Requests (fake)")
+            if roll < self.rate_limit_rate + self.error_rate:
+                self.counts["errors"] += 1
+                raise FakeApiError(503, "Service Unavailable (fake)")
+            return self.latency[op].sample()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.counts, **{f"{k}_latency": m.spec or "none" for k, m in self.latency.items()}}
+
+
+def fake_embedding(text: str, dim: int) -> List[float]:
+    """Deterministic, L2-normalized feature hashing of words: similar wording -> high cosine."""
+    v = np.zeros(dim, dtype=np.float32)
+    for tok in normalize_text(text).split():
+        h = int.from_bytes(hashlib.blake2b(tok.encode("utf-8"), digest_size=8).digest(), "big")
+        v[h % dim] += 1.0 if (h >> 32) & 1 else -1.0
+    n = float(np.linalg.norm(v))
+    return (v / n if n else v).tolist()
+
+
+class _Namespace:
+    def __init__(self, dim: int):
+        self.ids: List[str] = []
+        self.pos: Dict[str, int] = {}
+        self.metadata: List[Dict[str, Any]] = []
+        self.rows: List[np.ndarray] = []
+        self._matrix: Optional[np.ndarray] = None   # unit rows, rebuilt lazily after writes
+        self.dim = dim
+
+    def matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            m = np.stack(self.rows) if self.rows else np.zeros((0, self.dim), dtype=np.float32)
+            self._matrix = m / np.maximum(np.linalg.norm(m, axis=1, keepdims=True), 1e-12)
+        return self._matrix
+
+
+class FakeIndexStore:
+    """One index (per host): namespaces of exact vectors; cosine top-k by brute force."""
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+        self._lock = threading.Lock()
+        self._namespaces: Dict[str, _Namespace] = {}
+
+    def _check_dim(self, values: Sequence[float]) -> np.ndarray:
+        if len(values) != self.dimension:
+            raise FakeApiError(400, f"Vector dimension {len(values)} does not match the dimension "
+                                    f"of the index {self.dimension}")
+        return np.asarray(values, dtype=np.float32)
+
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: str = "") -> Dict[str, Any]:
+        rows = [(v["id"], self._check_dim(v["values"]), dict(v.get("metadata") or {})) for v in vectors]
+        with self._lock:
+            ns = self._namespaces.setdefault(namespace or "", _Namespace(self.dimension))
+            for vid, row, md in rows:
+                i = ns.pos.get(vid)
+                if i is None:
+                    ns.pos[vid] = len(ns.ids)
+                    ns.ids.append(vid)
+                    ns.rows.append(row)
+                    ns.metadata.append(md)
+                else:
+                    ns.rows[i], ns.metadata[i] = row, md
+            ns._matrix = None
+        return {"upserted_count": len(rows)}
+
+    def delete(self, ids: Sequence[str], namespace: str = "") -> Dict[str, Any]:
+        with self._lock:
+            ns = self._namespaces.get(namespace or "")
+            if ns is None:
+                return {}
+            drop = set(ids)
+            keep = [i for i, vid in enumerate(ns.ids) if vid not in drop]
+            ns.ids = [ns.ids[i] for i in keep]
+            ns.rows = [ns.rows[i] for i in keep]
+            ns.metadata = [ns.metadata[i] for i in keep]
+            ns.pos = {vid: i for i, vid in enumerate(ns.ids)}
+            ns._matrix = None
+        return {}
+
+    def fetch(self, ids: Sequence[str], namespace: str = "") -> Dict[str, Any]:
+        with self._lock:
+            ns = self._namespaces.get(namespace or "")
+            found = {} if ns is None else {vid: ns.pos[vid] for vid in ids if vid in ns.pos}
+            vectors = {vid: {"id": vid, "values": ns.rows[i].tolist(), "metadata": ns.metadata[i]}
+                       for vid, i in found.items()}
+        return {"vectors": vectors, "namespace": namespace or ""}
+
+    def query(self, vector: Sequence[float], top_k: int, namespace: str = "",
+              include_metadata: bool = False) -> Dict[str, Any]:
+        q = self._check_dim(vector)
+        with self._lock:
+            ns = self._namespaces.get(namespace or "")
+            if ns is None or not ns.ids:
+                return {"matches": [], "namespace": namespace or ""}
+            matrix, ids, metadata = ns.matrix(), list(ns.ids), list(ns.metadata)
+        scores = matrix @ (q / max(float(np.linalg.norm(q)), 1e-12))
+        order = np.argsort(-scores, kind="stable")[:top_k]     # exact top-k, ties by insertion
+        matches = []
+        for i in order:
+            m = {"id": ids[i], "score": float(scores[i]), "values": []}
+            if include_metadata:
+                m["metadata"] = metadata[i]
+            matches.append(m)
+        return {"matches": matches, "namespace": namespace or ""}
+
+    def describe_index_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            namespaces = {k: {"vector_count": len(v.ids)} for k, v in self._namespaces.items()}
+        return {"dimension": self.dimension, "index_fullness": 0.0, "metric": "cosine",
+                "namespaces": namespaces, "total_vector_count": sum(n["vector_count"] for n in namespaces.values())}
+
+
+# shared by the sync and async clients: one store per host, like the real service
+_stores: Dict[str, FakeIndexStore] = {}
+_stores_lock = threading.Lock()
+
+
+def _store(host: str, dimension: int, embed_dim: int, preload_namespace: Optional[str]) -> FakeIndexStore:
+    with _stores_lock:
+        store = _stores.get(host)
+        if store is None:
+            store = _stores[host] = FakeIndexStore(dimension)
+            if FAKE_PRELOAD_FAQ and preload_namespace is not None:
+                _preload_faq(store, embed_dim, preload_namespace)
+        return store
+
+
+def _preload_faq(store: FakeIndexStore, embed_dim: int, namespace: str) -> None:
+    from app.data.faq_seed import FAQ_ENTRIES
+    vectors = []
+    for e in FAQ_ENTRIES:
+        values = fake_embedding(f"{e['question']} {e['answer']}", embed_dim)
+        vectors.append({
+            "id": e["id"],
+            "values": as_list(fit_dim(values, store.dimension)),
+            "metadata": {"category": e["category"], "question": e["question"], "answer": e["answer"]},
+        })
+    store.upsert(vectors, namespace=namespace)
+    log.info(f"fake index preloaded | namespace={namespace or '(none)'} | vectors={len(vectors)}")
+
+
+def _fake_host(name: str) -> str:
+    return f"{name}.svc.fake"
+
+
+class _IndexDescription:
+    """describe_index() result: attribute and item access, like the SDK's IndexModel."""
+
+    def __init__(self, name: str, host: str, dimension: int):
+        self.name = name
+        self.host = host
+        self.dimension = dimension
+        self.metric = "cosine"
+        self.status = {"ready": True, "state": "Ready"}
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+
+class _Embeddings:
+    """inference.embed() result: .data[i].values (also indexable, like the SDK's EmbeddingsList)."""
+
+    class _Item:
+        def __init__(self, values: List[float]):
+            self.values = values
+
+        def __getitem__(self, key):
+            return getattr(self, key)
+
+    def __init__(self, model: str, vectors: List[List[float]]):
+        self.model = model
+        self.data = [self._Item(v) for v in vectors]
+        self.usage = {"total_tokens": 0}
+
+    def __getitem__(self, i):
+        return self.data[i]
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+class _FakeInference:
+    def __init__(self, faults: Faults, embed_dim: int):
+        self._faults = faults
+        self._dim = embed_dim
+
+    def _result(self, model: str, inputs: Sequence[str]) -> _Embeddings:
+        return _Embeddings(model, [fake_embedding(t, self._dim) for t in inputs])
+
+    def embed(self, model: str, inputs: Sequence[str], parameters: Optional[Dict[str, Any]] = None):
+        time.sleep(self._faults.admit("embed"))
+        return self._result(model, inputs)
+
+
+class _FakeAsyncInference(_FakeInference):
+    async def embed(self, model: str, inputs: Sequence[str], parameters: Optional[Dict[str, Any]] = None):
+        await asyncio.sleep(self._faults.admit("embed"))
+        return self._result(model, inputs)
+
+
+class FakeIndex:
+    def __init__(self, store: FakeIndexStore, faults: Faults):
+        self._store = store
+        self._faults = faults
+
+    def query(self, vector, top_k: int = 10, namespace: str = "", include_metadata: bool = False, **_):
+        time.sleep(self._faults.admit("query"))
+        return self._store.query(vector, top_k, namespace, include_metadata)
+
+    def upsert(self, vectors, namespace: str = "", **_):
+        time.sleep(self._faults.admit("write"))
+        return self._store.upsert(vectors, namespace)
+
+    def delete(self, ids=None, namespace: str = "", **_):
+        time.sleep(self._faults.admit("write"))
+        return self._store.delete(ids or [], namespace)
+
+    def fetch(self, ids, namespace: str = "", **_):
+        time.sleep(self._faults.admit("query"))
+        return self._store.fetch(ids, namespace)
+
+    def describe_index_stats(self, **_):
+        return self._store.describe_index_stats()
+
+
+class FakeIndexAsyncio(FakeIndex):
+    async def query(self, vector, top_k: int = 10, namespace: str = "", include_metadata: bool = False, **_):
+        await asyncio.sleep(self._faults.admit("query"))
+        return self._store.query(vector, top_k, namespace, include_metadata)
+
+    async def upsert(self, vectors, namespace: str = "", **_):
+        await asyncio.sleep(self._faults.admit("write"))
+        return self._store.upsert(vectors, namespace)
+
+    async def delete(self, ids=None, namespace: str = "", **_):
+        await asyncio.sleep(self._faults.admit("write"))
+        return self._store.delete(ids or [], namespace)
+
+    async def fetch(self, ids, namespace: str = "", **_):
+        await asyncio.sleep(self._faults.admit("query"))
+        return self._store.fetch(ids, namespace)
+
+    async def describe_index_stats(self, **_):
+        return self._store.describe_index_stats()
+
+    async def close(self) -> None:
+        pass
+
+
+class FakePinecone:
+    """Drop-in for pinecone.Pinecone (the calls this app makes)."""
+
+    def __init__(self, api_key: Optional[str] = None, *, index_dim: int = 1536, embed_dim: int = 1024,
+                 preload_namespace: Optional[str] = "", faults: Optional[Faults] = None, **_):
+        self.index_dim = index_dim
+        self.embed_dim = embed_dim
+        self.preload_namespace = preload_namespace
+        self.faults = faults or Faults()
+        self.inference = _FakeInference(self.faults, embed_dim)
+
+    def _store(self, host: Optional[str]) -> FakeIndexStore:
+        return _store(host or "fake", self.index_dim, self.embed_dim, self.preload_namespace)
+
+    def Index(self, host: Optional[str] = None, **_) -> FakeIndex:
+        return FakeIndex(self._store(host), self.faults)
+
+    # ---- control plane (index migrations); created indexes start empty ----
+    def has_index(self, name: str) -> bool:
+        with _stores_lock:
+            return _fake_host(name) in _stores
+
+    def create_index(self, name: str, dimension: int, metric: str = "cosine", spec: Any = None, **_) -> None:
+        time.sleep(self.faults.admit("write"))
+        with _stores_lock:
+            if _fake_host(name) in _stores:
+                raise FakeApiError(409, f"Resource {name} already exists")
+            _stores[_fake_host(name)] = FakeIndexStore(dimension)
+        log.info(f"fake index created | name={name} | dim={dimension}")
+
+    def describe_index(self, name: str) -> "_IndexDescription":
+        with _stores_lock:
+            store = _stores.get(_fake_host(name))
+        if store is None:
+            raise FakeApiError(404, f"Resource {name} not found")
+        return _IndexDescription(name=name, host=_fake_host(name), dimension=store.dimension)
+
+
+class FakePineconeAsyncio(FakePinecone):
+    """Drop-in for pinecone.PineconeAsyncio; shares index state with FakePinecone by host."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.inference = _FakeAsyncInference(self.faults, self.embed_dim)
+
+    def IndexAsyncio(self, host: Optional[str] = None, **_) -> FakeIndexAsyncio:
+        return FakeIndexAsyncio(self._store(host), self.faults)
+
+    async def close(self) -> None:
+        pass
@@ -0,0 +1,293 @@
+# src/app/services/index_migration.py
+"""
+Native-dimension index management.
+
+The query model (EMBED_MODEL, EMBED_DIM) and the Pinecone index may disagree on
+dimension: a 1536-d index fed 1024-d llama-text-embed-v2 vectors needs 512 zeros
+on every query, upsert and stored vector. A migration fixes that without downtime:
+
+1. create (or reuse) an index of the target dimension;
+2. re-embed the corpus into it in the background (same pipeline as ingest);
+3. verify that every corpus id is in it and nothing else is;
+4. switch the active index (index_state.set_active_index): every worker sends its
+   next query to the new index, already shaped to its dimension.
+
+The old index is left untouched, so switching back is one call (switch_to).
+"""
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.core.logging import get_logger
+from app.db.session import SessionLocal
+from app.services import vector_client
+from app.services.index_state import IndexTarget, set_active_index
+from app.services.ingest_manifest import plan_ingest, record_upserted
+from app.services.ingest_pipeline import IngestDoc, run_ingest
+from app.services.vector_store import as_list, fit_dim
+
+log = get_logger("rag.index_migration")
+
+MIGRATION_INDEX_CLOUD = os.getenv("MIGRATION_INDEX_CLOUD", "aws")
+MIGRATION_INDEX_REGION = os.getenv("MIGRATION_INDEX_REGION", "us-east-1")
+MIGRATION_INDEX_METRIC = os.getenv("MIGRATION_INDEX_METRIC", "cosine")
+MIGRATION_CHUNK_DOCS = int(os.getenv("MIGRATION_CHUNK_DOCS", "500"))            # progress granularity
+MIGRATION_READY_TIMEOUT_SECONDS = float(os.getenv("MIGRATION_READY_TIMEOUT_SECONDS", "300"))
+MIGRATION_VERIFY_TIMEOUT_SECONDS = float(os.getenv("MIGRATION_VERIFY_TIMEOUT_SECONDS", "60"))  # stats lag
+MIGRATION_FETCH_BATCH = int(os.getenv("MIGRATION_FETCH_BATCH", "100"))   # ids per fetch() when verifying
+
+
+class MigrationInProgress(RuntimeError):
+    pass
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _field(obj: Any, key: str, default: Any = None) -> Any:
+    """SDK models and plain dicts alike."""
+    if isinstance(obj, dict):
+        return obj.get(key, default)
+    return getattr(obj, key, default)
+
+
+def index_dimension(index) -> Optional[int]:
+    dim = _field(index.describe_index_stats(), "dimension")
+    return int(dim) if dim else None
+
+
+def dimension_report() -> Dict[str, Any]:
+    """Model vs active index dimension, and what the mismatch costs per vector."""
+    target = vector_client.active_target()
+    report: Dict[str, Any] = {
+        "model": vector_client.EMBED_MODEL,
+        "embed_dim": vector_client.EMBED_DIM,
+        "active_index": {"host": target.host, "name": target.name, "dimension": target.dimension},
+        "migration": current_job(),
+    }
+    try:
+        actual = index_dimension(vector_client.get_index(target.host))
+    except Exception as e:
+        report.update(status="unknown", error=str(e))
+        return report
+    embed_dim = vector_client.EMBED_DIM
+    report["index_dim"] = actual
+    if actual is not None and actual != target.dimension:
+        status = "misconfigured"     # queries are shaped to target.dimension and will be rejected
+    elif target.dimension == embed_dim:
+        status = "native"
+    else:
+        status = "padded" if target.dimension > embed_dim else "truncated"
+    report.update(
+        status=status,
+        padding_dims=max(0, target.dimension - embed_dim),
+        wasted_pct=round(100.0 * max(0, target.dimension - embed_dim) / target.dimension, 1),
+        query_payload_floats=target.dimension,
+    )
+    return report
+
+
+class MigrationJob:
+    def __init__(self, namespace: str, dimension: int, index_name: Optional[str], host: Optional[str],
+                 switch: bool, docs_total: int):
+        self.namespace = namespace
+        self.dimension = dimension
+        self.index_name = index_name
+        self.host = host
+        self.switch = switch
+        self.status = "pending"      # pending -> creating -> embedding -> verifying -> switched|ready | failed
+        self.docs_total = docs_total
+        self.docs_done = 0
+        self.upserted = 0
+        self.upserted_ids: List[str] = []
+        self.failed_batches = 0
+        self.embed_ms = 0.0
+        self.errors: List[str] = []
+        self.verify: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self.started_at = _now()
+        self.finished_at: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self.status not in ("switched", "ready", "failed")
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "index_name": self.index_name,
+            "host": self.host,
+            "dimension": self.dimension,
+            "namespace": self.namespace,
+            "switch": self.switch,
+            "docs_total": self.docs_total,
+            "docs_done": self.docs_done,
+            "upserted": self.upserted,
+            "failed_batches": self.failed_batches,
+            "embed_ms": round(self.embed_ms, 1),
+            "errors": self.errors[:5],
+            "verify": self.verify,
+            "error": self.error,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+_job: Optional[MigrationJob] = None
+_job_lock = threading.Lock()
+
+
+def current_job() -> Optional[Dict[str, Any]]:
+    return _job.as_dict() if _job is not None else None
+
+
+def start_migration(docs: Sequence[IngestDoc], namespace: str, *, dimension: Optional[int] = None,
+                    index_name: Optional[str] = None, host: Optional[str] = None,
+                    switch: bool = True) -> Dict[str, Any]:
+    """
+    Start a background migration into `host` (an existing index) or `index_name`
+    (created when missing) at `dimension` (default: the model's native EMBED_DIM).
+    Raises MigrationInProgress while another one runs.
+    """
+    global _job
+    if not host and not index_name:
+        raise ValueError("index_name or host is required")
+    with _job_lock:
+        if _job is not None and _job.running:
+            raise MigrationInProgress(f"migration to {_job.index_name or _job.host} is {_job.status}")
+        _job = job = MigrationJob(namespace, dimension or vector_client.EMBED_DIM, index_name, host,
+                                  switch, len(docs))
+    threading.Thread(target=_run, args=(job, list(docs)), name="index-migration", daemon=True).start()
+    return job.as_dict()
+
+
+def switch_to(host: str, dimension: int, name: Optional[str] = None, reason: str = "manual") -> IndexTarget:
+    """Point queries at another index (also how a migration is rolled back)."""
+    target = IndexTarget(host=host, dimension=dimension, name=name)
+    actual = index_dimension(vector_client.get_index(host))
+    if actual is not None and actual != dimension:
+        raise ValueError(f"index {host} has dimension {actual}, not {dimension}")
+    set_active_index(target, reason=reason)
+    return target
+
+
+# ---------- background steps ----------
+def _ensure_index(job: MigrationJob) -> IndexTarget:
+    if job.host:
+        actual = index_dimension(vector_client.get_index(job.host))
+        if actual is not None and actual != job.dimension:
+            raise ValueError(f"index {job.host} has dimension {actual}, not {job.dimension}")
+        return IndexTarget(host=job.host, dimension=job.dimension, name=job.index_name)
+    pc = vector_client.get_client()
+    if not pc.has_index(job.index_name):
+        spec = None
+        if vector_client.PINECONE_CLIENT == "sdk":
+            from pinecone import ServerlessSpec
+            spec = ServerlessSpec(cloud=MIGRATION_INDEX_CLOUD, region=MIGRATION_INDEX_REGION)
+        log.info(f"creating index | name={job.index_name} | dim={job.dimension}")
+        pc.create_index(name=job.index_name, dimension=job.dimension, metric=MIGRATION_INDEX_METRIC, spec=spec)
+    deadline = time.monotonic() + MIGRATION_READY_TIMEOUT_SECONDS
+    while True:
+        desc = pc.describe_index(job.index_name)
+        if _field(_field(desc, "status", {}), "ready", False):
+            break
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"index {job.index_name} not ready after {MIGRATION_READY_TIMEOUT_SECONDS:.0f}s")
+        time.sleep(2)
+    dim = int(_field(desc, "dimension"))
+    if dim != job.dimension:
+        raise ValueError(f"index {job.index_name} exists with dimension {dim}, not {job.dimension}")
+    job.host = _field(desc, "host")
+    return IndexTarget(host=job.host, dimension=job.dimension, name=job.index_name)
+
+
+def _embed(job: MigrationJob, target: IndexTarget, docs: List[IngestDoc]) -> None:
+    index = vector_client.get_index(target.host)
+    step = max(1, MIGRATION_CHUNK_DOCS)
+    for i in range(0, len(docs), step):
+        stats = run_ingest(
+            docs[i:i + step],
+            embed_fn=vector_client.embed_documents,
+            upsert_fn=lambda chunk: index.upsert(vectors=chunk, namespace=job.namespace),
+            shape_fn=lambda emb: as_list(fit_dim(emb, target.dimension)),   # native: passes through
+        )
+        job.docs_done += stats.docs
+        job.upserted += stats.upserted
+        job.upserted_ids.extend(stats.upserted_ids)
+        job.failed_batches += stats.failed_batches
+        job.embed_ms += stats.embed_ms
+        job.errors.extend(stats.errors)
+    if job.failed_batches:
+        raise RuntimeError(f"{job.failed_batches} batches failed; not switching")
+
+
+def _missing_ids(index, namespace: str, ids: List[str]) -> List[str]:
+    missing: List[str] = []
+    step = max(1, MIGRATION_FETCH_BATCH)
+    for i in range(0, len(ids), step):
+        chunk = ids[i:i + step]
+        found = _field(index.fetch(ids=chunk, namespace=namespace), "vectors", {}) or {}
+        missing.extend(vid for vid in chunk if vid not in found)
+    return missing
+
+
+def _verify(job: MigrationJob, target: IndexTarget, docs: List[IngestDoc]) -> None:
+    """
+    This job must have upserted every corpus id, the target must return each of them,
+    and the namespace must hold exactly that many vectors: a reused index with stale or
+    extra entries fails. Pinecone stats and reads lag writes by seconds, hence the polling.
+    """
+    expected = list(dict.fromkeys(d.id for d in docs))
+    not_upserted = sorted(set(expected) - set(job.upserted_ids))
+    index = vector_client.get_index(target.host)
+    deadline = time.monotonic() + MIGRATION_VERIFY_TIMEOUT_SECONDS
+    while True:
+        namespaces = _field(index.describe_index_stats(), "namespaces", {}) or {}
+        count = _field(namespaces.get(job.namespace) or {}, "vector_count", 0) or 0
+        missing = _missing_ids(index, job.namespace, expected) if not not_upserted else []
+        if (not missing and count == len(expected)) or not_upserted or time.monotonic() > deadline:
+            break
+        time.sleep(2)
+    ok = not not_upserted and not missing and count == len(expected)
+    job.verify = {"expected": len(expected), "upserted": len(job.upserted_ids), "vector_count": count,
+                  "not_upserted": not_upserted[:20], "missing": missing[:20],
+                  "extra": max(0, count - len(expected)), "ok": ok}
+    if not_upserted:
+        raise RuntimeError(f"{len(not_upserted)} corpus ids were not upserted by this migration")
+    if missing:
+        raise RuntimeError(f"{len(missing)} upserted ids are missing from {job.namespace!r}")
+    if count != len(expected):
+        raise RuntimeError(f"target has {count} vectors in {job.namespace!r}, expected {len(expected)} "
+                           f"(reused index with stale entries?)")
+
+
+def _run(job: MigrationJob, docs: List[IngestDoc]) -> None:
+    t0 = time.perf_counter()
+    try:
+        job.status = "creating"
+        target = _ensure_index(job)
+        job.status = "embedding"
+        _embed(job, target, docs)
+        job.status = "verifying"
+        _verify(job, target, docs)
+        if job.switch:
+            set_active_index(target, reason="migration")
+            # the manifest describes the active index: later ingests stay incremental
+            with SessionLocal() as db:
+                written_to = vector_client.ingest_target(target)
+                plan = plan_ingest(db, job.namespace, docs, vector_client.EMBED_MODEL, target.dimension,
+                                   written_to, full=True)
+                record_upserted(db, job.namespace, plan, [d.id for d in docs],
+                                vector_client.EMBED_MODEL, target.dimension, written_to)
+        job.status = "switched" if job.switch else "ready"
+    except Exception as e:
+        job.status = "failed"
+        job.error = f"{type(e).__name__}: {e}"
+        log.exception(f"index migration failed | target={job.index_name or job.host}")
+    finally:
+        job.finished_at = _now()
+        log.info(f"index migration {job.status} | target={job.host} | dim={job.dimension} "
+                 f"| upserted={job.upserted} | s={time.perf_counter() - t0:.1f}")
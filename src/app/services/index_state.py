@@ -0,0 +1,152 @@
+# src/app/services/index_state.py
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from app.core.logging import get_logger
+
+log = get_logger("rag.index_state")
+
+# Shared by every worker process: the generation lives in a tiny file, and readers
+# only re-read it when its mtime changes (one stat() per lookup).
+INDEX_GENERATION_FILE = os.getenv("INDEX_GENERATION_FILE", "./data/index_generation")
+
+_lock = threading.Lock()
+_cached_mtime: int = -1
+_cached_generation: int = 0
+
+
+def _read() -> int:
+    try:
+        return int(Path(INDEX_GENERATION_FILE).read_text().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def current_generation() -> int:
+    """
+    Monotonic counter bumped on every write to the vector index.
+    Anything derived from index contents should be keyed by it.
+    """
+    global _cached_mtime, _cached_generation
+    try:
+        mtime = os.stat(INDEX_GENERATION_FILE).st_mtime_ns
+    except FileNotFoundError:
+        return _cached_generation
+    if mtime != _cached_mtime:
+        with _lock:
+            _cached_generation = _read()
+            _cached_mtime = mtime
+    return _cached_generation
+
+
+def bump_generation(reason: str = "write") -> int:
+    """Call after any upsert/delete against the index."""
+    global _cached_mtime, _cached_generation
+    with _lock:
+        gen = max(_read(), _cached_generation) + 1
+        path = Path(INDEX_GENERATION_FILE)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(str(gen))
+        os.replace(tmp, path)
+        _cached_generation = gen
+        _cached_mtime = os.stat(path).st_mtime_ns
+    log.info(f"index generation bumped | gen={gen} | reason={reason}")
+    return gen
+
+
+# ---------- active vector index ----------
+# Which Pinecone index queries go to (host + dimension), switched by an index migration.
+# Same sharing scheme as the generation: a small JSON file re-read when its mtime
+# changes, replaced atomically, so every worker flips on its next query.
+ACTIVE_INDEX_FILE = os.getenv("ACTIVE_INDEX_FILE", "./data/active_index.json")
+
+
+@dataclass(frozen=True)
+class IndexTarget:
+    host: Optional[str]
+    dimension: int
+    name: Optional[str] = None
+
+
+_active_mtime: int = -1
+_active: Optional[IndexTarget] = None
+
+
+def active_index(default: IndexTarget) -> IndexTarget:
+    """The switched-to index, or `default` (PINECONE_HOST / PINECONE_INDEX_DIM) when none."""
+    global _active_mtime, _active
+    try:
+        mtime = os.stat(ACTIVE_INDEX_FILE).st_mtime_ns
+    except FileNotFoundError:
+        return default
+    if mtime != _active_mtime:
+        with _lock:
+            try:
+                raw = json.loads(Path(ACTIVE_INDEX_FILE).read_text())
+                _active = IndexTarget(raw["host"], int(raw["dimension"]), raw.get("name"))
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                log.warning(f"unreadable {ACTIVE_INDEX_FILE}: {e}; using the configured index")
+                _active = None
+            _active_mtime = mtime
+    return _active or default
+
+
+def set_active_index(target: IndexTarget, reason: str = "switch") -> None:
+    """Point every worker at `target`; matches change, so the generation is bumped too."""
+    global _active_mtime, _active
+    with _lock:
+        path = Path(ACTIVE_INDEX_FILE)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({**asdict(target), "switched_at": time.time(), "reason": reason}))
+        os.replace(tmp, path)
+        _active = target
+        _active_mtime = os.stat(path).st_mtime_ns
+    log.info(f"active index switched | host={target.host} | dim={target.dimension} | reason={reason}")
+    bump_generation(f"active_index:{reason}")
+
+
+# ---------- ingested corpus ----------
+# (id, metadata) of every entry ingest wrote to the index, so each worker can rebuild
+# what it derives locally from the corpus (BM25 index, ...) when the generation moves.
+# Written before the generation is bumped; faq_seed.py stands in until the first ingest.
+INGESTED_CORPUS_FILE = os.getenv("INGESTED_CORPUS_FILE", "./data/ingested_corpus.json")
+
+
+def _seed_corpus() -> Dict[str, Dict[str, Any]]:
+    from app.data.faq_seed import FAQ_ENTRIES
+    return {e["id"]: {"category": e["category"], "question": e["question"], "answer": e["answer"]}
+            for e in FAQ_ENTRIES}
+
+
+def ingested_corpus() -> List[Tuple[str, Dict[str, Any]]]:
+    try:
+        raw = json.loads(Path(INGESTED_CORPUS_FILE).read_text(encoding="utf-8"))
+        if not isinstance(raw, dict):
+            raise ValueError("expected a JSON object")
+    except FileNotFoundError:
+        raw = _seed_corpus()
+    except ValueError as e:
+        log.warning(f"unreadable {INGESTED_CORPUS_FILE}: {e}; using faq_seed.py")
+        raw = _seed_corpus()
+    return list(raw.items())
+
+
+def record_ingested(upserted: Iterable[Tuple[str, Mapping[str, Any]]], removed: Iterable[str]) -> None:
+    """Apply one ingest to the shared corpus file (call before bump_generation)."""
+    with _lock:
+        corpus = dict(ingested_corpus())
+        corpus.update((i, dict(md)) for i, md in upserted)
+        for i in removed:
+            corpus.pop(i, None)
+        path = Path(INGESTED_CORPUS_FILE)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(corpus, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
@@ -0,0 +1,115 @@
+# src/app/services/ingest_manifest.py
+import hashlib
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.domain.models import IngestManifestEntry
+from app.services.ingest_pipeline import IngestDoc
+
+
+def content_hash(doc: IngestDoc) -> str:
+    """Stable hash of what gets embedded plus what gets stored as metadata."""
+    payload = json.dumps({"text": doc.text, "metadata": doc.metadata}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class IngestPlan:
+    new: List[IngestDoc] = field(default_factory=list)
+    changed: List[IngestDoc] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    removed_targets: Dict[str, Optional[str]] = field(default_factory=dict)   # id -> target it was written to
+    hashes: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def to_upsert(self) -> List[IngestDoc]:
+        return self.new + self.changed
+
+    def removed_by_target(self) -> Dict[Optional[str], List[str]]:
+        """Removed ids grouped by the index the manifest says holds their vector."""
+        out: Dict[Optional[str], List[str]] = {}
+        for eid in self.removed:
+            out.setdefault(self.removed_targets.get(eid), []).append(eid)
+        return out
+
+    def as_dict(self, limit: int = 50) -> Dict[str, object]:
+        return {
+            "new": len(self.new),
+            "changed": len(self.changed),
+            "unchanged": len(self.unchanged),
+            "removed": len(self.removed),
+            "new_ids": [d.id for d in self.new][:limit],
+            "changed_ids": [d.id for d in self.changed][:limit],
+            "removed_ids": self.removed[:limit],
+        }
+
+
+def plan_ingest(db: Session, namespace: str, docs: Sequence[IngestDoc],
+                embed_model: str, dimension: int, target: Optional[str] = None, full: bool = False) -> IngestPlan:
+    """
+    Diff the corpus against the manifest.
+    An entry is "changed" when its content hash, embedding model, dimension or target
+    (vector backend + index, see vector_client.ingest_target) differ: another index of the
+    same dimension starts empty. full=True treats every entry as changed (forced rebuild).
+    Removed ids keep the target recorded on their row: their vector is deleted there,
+    not from the current target.
+    """
+    rows = db.scalars(select(IngestManifestEntry).where(IngestManifestEntry.namespace == namespace)).all()
+    known = {r.entry_id: r for r in rows}
+    plan = IngestPlan()
+    for doc in docs:
+        h = content_hash(doc)
+        plan.hashes[doc.id] = h
+        row = known.get(doc.id)
+        if row is None:
+            plan.new.append(doc)
+        elif (full or row.content_hash != h or row.embed_model != embed_model or row.dimension != dimension
+              or row.target != target):
+            plan.changed.append(doc)
+        else:
+            plan.unchanged.append(doc.id)
+    current = {d.id for d in docs}
+    plan.removed = sorted(eid for eid in known if eid not in current)
+    plan.removed_targets = {eid: known[eid].target for eid in plan.removed}
+    return plan
+
+
+def record_upserted(db: Session, namespace: str, plan: IngestPlan, upserted_ids: Iterable[str],
+                    embed_model: str, dimension: int, target: Optional[str] = None) -> None:
+    """Write manifest rows for the ids that actually reached the index (one transaction)."""
+    ids = set(upserted_ids)
+    if not ids:
+        return
+    now = datetime.now(timezone.utc)
+    rows = db.scalars(
+        select(IngestManifestEntry).where(
+            IngestManifestEntry.namespace == namespace, IngestManifestEntry.entry_id.in_(ids)
+        )
+    ).all()
+    by_id = {r.entry_id: r for r in rows}
+    for eid in ids:
+        row = by_id.get(eid) or IngestManifestEntry(namespace=namespace, entry_id=eid)
+        row.content_hash = plan.hashes[eid]
+        row.embed_model = embed_model
+        row.dimension = dimension
+        row.target = target
+        row.upserted_at = now
+        db.add(row)
+    db.commit()
+
+
+def record_removed(db: Session, namespace: str, entry_ids: Sequence[str]) -> None:
+    if not entry_ids:
+        return
+    db.execute(
+        delete(IngestManifestEntry).where(
+            IngestManifestEntry.namespace == namespace, IngestManifestEntry.entry_id.in_(list(entry_ids))
+        )
+    )
+    db.commit()
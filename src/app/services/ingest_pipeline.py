@@ -0,0 +1,132 @@
+# src/app/services/ingest_pipeline.py
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from app.core.logging import get_logger
+
+log = get_logger("rag.ingest")
+
+# llama-text-embed-v2 accepts up to 96 inputs per inference call
+EMBED_BATCH_SIZE = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "96"))
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "4"))
+INGEST_MAX_RETRIES = int(os.getenv("INGEST_MAX_RETRIES", "3"))
+INGEST_RETRY_BACKOFF_SECONDS = float(os.getenv("INGEST_RETRY_BACKOFF_SECONDS", "0.5"))
+
+
+@dataclass
+class IngestDoc:
+    id: str
+    text: str
+    metadata: Dict[str, Any]
+
+
+@dataclass
+class IngestStats:
+    docs: int = 0
+    upserted: int = 0
+    embed_calls: int = 0
+    upsert_calls: int = 0
+    retries: int = 0
+    failed_batches: int = 0
+    embed_ms: float = 0.0
+    upsert_ms: float = 0.0
+    wall_ms: float = 0.0
+    errors: List[str] = field(default_factory=list)
+    upserted_ids: List[str] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, **deltas: float) -> None:
+        with self._lock:
+            for k, v in deltas.items():
+                setattr(self, k, getattr(self, k) + v)
+
+    def as_dict(self) -> Dict[str, Any]:
+        secs = self.wall_ms / 1000 if self.wall_ms else 0.0
+        return {
+            "docs": self.docs,
+            "upserted": self.upserted,
+            "embed_calls": self.embed_calls,
+            "upsert_calls": self.upsert_calls,
+            "retries": self.retries,
+            "failed_batches": self.failed_batches,
+            "embed_ms": round(self.embed_ms, 1),        # summed across workers
+            "upsert_ms": round(self.upsert_ms, 1),      # summed across workers
+            "wall_ms": round(self.wall_ms, 1),
+            "docs_per_s": round(self.upserted / secs, 1) if secs else None,
+            "errors": self.errors[:5],
+        }
+
+
+def _with_retries(fn: Callable[[], Any], stats: IngestStats, what: str,
+                  max_retries: int, backoff: float) -> Any:
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= max_retries:
+                raise
+            attempt += 1
+            stats.add(retries=1)
+            delay = backoff * (2 ** (attempt - 1))
+            log.warning(f"ingest {what} failed (attempt {attempt}/{max_retries}) | retry_in={delay:.2f}s | err={e}")
+            time.sleep(delay)
+
+
+def run_ingest(
+    docs: Sequence[IngestDoc],
+    embed_fn: Callable[[List[str]], List[List[float]]],
+    upsert_fn: Callable[[List[Dict[str, Any]]], Any],
+    shape_fn: Callable[[List[float]], List[float]] = lambda v: v,
+    embed_batch_size: int = EMBED_BATCH_SIZE,
+    upsert_batch_size: int = 100,
+    workers: int = INGEST_WORKERS,
+    max_retries: int = INGEST_MAX_RETRIES,
+    backoff: float = INGEST_RETRY_BACKOFF_SECONDS,
+) -> IngestStats:
+    """
+    Embed-and-upsert pipeline:
+    - docs are split into embedding batches (one inference call per batch);
+    - each batch is embedded and then upserted by a worker of a bounded pool, so
+      embedding of batch N+1 overlaps with the upsert of batch N;
+    - every remote call is retried with exponential backoff; a batch that still
+      fails is counted in failed_batches and does not abort the others.
+    """
+    stats = IngestStats(docs=len(docs))
+    t0 = time.perf_counter()
+
+    def process(batch: Sequence[IngestDoc]) -> None:
+        te = time.perf_counter()
+        embeddings = _with_retries(lambda: embed_fn([d.text for d in batch]),
+                                   stats, "embed", max_retries, backoff)
+        stats.add(embed_calls=1, embed_ms=(time.perf_counter() - te) * 1000)
+
+        vectors = [
+            {"id": d.id, "values": shape_fn(emb), "metadata": d.metadata}
+            for d, emb in zip(batch, embeddings)
+        ]
+        for i in range(0, len(vectors), upsert_batch_size):
+            chunk = vectors[i:i + upsert_batch_size]
+            tu = time.perf_counter()
+            _with_retries(lambda: upsert_fn(chunk), stats, "upsert", max_retries, backoff)
+            stats.add(upsert_calls=1, upserted=len(chunk), upsert_ms=(time.perf_counter() - tu) * 1000)
+            with stats._lock:
+                stats.upserted_ids.extend(v["id"] for v in chunk)
+
+    batches = [docs[i:i + embed_batch_size] for i in range(0, len(docs), embed_batch_size)]
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="ingest") as pool:
+        futures = {pool.submit(process, b): b for b in batches}
+        for fut in as_completed(futures):
+            err: Optional[BaseException] = fut.exception()
+            if err is not None:
+                stats.add(failed_batches=1)
+                stats.errors.append(f"{futures[fut][0].id}..: {err}")
+                log.error(f"ingest batch failed | first_id={futures[fut][0].id} | err={err}")
+
+    stats.wall_ms = (time.perf_counter() - t0) * 1000
+    log.info(f"ingest done | {stats.as_dict()}")
+    return stats
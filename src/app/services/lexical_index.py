@@ -0,0 +1,156 @@
+# src/app/services/lexical_index.py
+import math
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from app.core.logging import get_logger
+from app.core.text import normalize_text
+from app.services.index_state import current_generation, ingested_corpus
+
+log = get_logger("rag.lexical")
+
+# question terms weigh more than answer/category terms (repeated tf)
+FIELD_WEIGHTS = {"question": 2, "answer": 1, "category": 1}
+
+# tiny English list: these would otherwise dominate every FAQ question
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i if in is it me my of on or "
+    "our so that the this to was we what when where which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in normalize_text(text).split() if t not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    In-process inverted index with Okapi BM25 scoring over FAQ-shaped metadata
+    (question/answer/category). Writes rebuild nothing: postings, doc lengths and
+    the average length are maintained incrementally under a lock.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75,
+                 field_weights: Mapping[str, int] = FIELD_WEIGHTS):
+        self.k1 = k1
+        self.b = b
+        self.field_weights = dict(field_weights)
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)  # term -> {doc_id: tf}
+        self._doc_terms: Dict[str, Counter] = {}
+        self._doc_len: Dict[str, int] = {}
+        self._metadata: Dict[str, Dict[str, Any]] = {}
+        self._total_len = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def _terms(self, metadata: Mapping[str, Any]) -> Counter:
+        tf: Counter = Counter()
+        for field, weight in self.field_weights.items():
+            for tok in tokenize(str(metadata.get(field) or "")):
+                tf[tok] += weight
+        return tf
+
+    def _remove_locked(self, doc_id: str) -> None:
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[term]
+        self._total_len -= self._doc_len.pop(doc_id)
+        self._metadata.pop(doc_id, None)
+
+    def upsert(self, docs: Iterable[Tuple[str, Mapping[str, Any]]]) -> int:
+        """docs: (id, metadata) pairs; metadata is returned as-is with every match."""
+        n = 0
+        with self._lock:
+            for doc_id, metadata in docs:
+                self._remove_locked(doc_id)
+                tf = self._terms(metadata)
+                self._doc_terms[doc_id] = tf
+                self._doc_len[doc_id] = sum(tf.values())
+                self._metadata[doc_id] = dict(metadata)
+                self._total_len += self._doc_len[doc_id]
+                for term, count in tf.items():
+                    self._postings[term][doc_id] = count
+                n += 1
+        return n
+
+    def remove(self, ids: Iterable[str]) -> None:
+        with self._lock:
+            for doc_id in ids:
+                self._remove_locked(doc_id)
+
+    def replace(self, docs: Iterable[Tuple[str, Mapping[str, Any]]]) -> int:
+        """Swap in a rebuilt index; searches see either the old docs or the new ones."""
+        fresh = BM25Index(self.k1, self.b, self.field_weights)
+        n = fresh.upsert(docs)
+        with self._lock:
+            self._postings, self._doc_terms = fresh._postings, fresh._doc_terms
+            self._doc_len, self._metadata, self._total_len = fresh._doc_len, fresh._metadata, fresh._total_len
+        return n
+
+    def search(self, text: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """Matches shaped like the vector backends' ({id, score, metadata}); score is raw BM25."""
+        terms = set(tokenize(text))
+        if not terms:
+            return []
+        with self._lock:
+            n_docs = len(self._doc_len)
+            if n_docs == 0:
+                return []
+            avgdl = self._total_len / n_docs or 1.0
+            scores: Dict[str, float] = defaultdict(float)
+            for term in terms:
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                for doc_id, tf in posting.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_len[doc_id] / avgdl)
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+            ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:top_k]
+            return [{"id": d, "score": s, "metadata": self._metadata[d]} for d, s in ranked]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Dict[str, Any]]], k: int = 60,
+                           top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Fuse ranked lists by sum(1 / (k + rank)). Each output match keeps the first
+    list's dict for its id (so the vector score wins when present) plus "rrf".
+    """
+    fused: Dict[str, float] = defaultdict(float)
+    first: Dict[str, Dict[str, Any]] = {}
+    for ranking in rankings:
+        for rank, m in enumerate(ranking, start=1):
+            fused[m["id"]] += 1.0 / (k + rank)
+            first.setdefault(m["id"], m)
+    order = sorted(fused, key=fused.get, reverse=True)[:top_k]
+    return [{**first[i], "rrf": round(fused[i], 6)} for i in order]
+
+
+# Built from the ingested corpus (faq_seed.py until the first ingest) and rebuilt whenever
+# the index generation moves, so an ingest handled by another worker reaches this one too.
+lexical_index = BM25Index()
+_synced_generation: Optional[int] = None
+_sync_lock = threading.Lock()
+
+
+def synced_lexical_index() -> BM25Index:
+    """lexical_index, rebuilt first if the index generation changed since the last build."""
+    global _synced_generation
+    gen = current_generation()
+    if gen != _synced_generation:
+        with _sync_lock:
+            if gen != _synced_generation:
+                lexical_index.replace(ingested_corpus())
+                _synced_generation = gen
+                log.info(f"lexical index built | gen={gen} | docs={len(lexical_index)} "
+                         f"| terms={len(lexical_index._postings)}")
+    return lexical_index
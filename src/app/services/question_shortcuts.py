@@ -0,0 +1,244 @@
+# src/app/services/question_shortcuts.py
+import hashlib
+import json
+import os
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from app.core.logging import get_logger
+from app.core.text import normalize_text
+from app.services.index_state import current_generation, ingested_corpus
+from app.services.lexical_index import tokenize
+
+log = get_logger("rag.shortcuts")
+
+SHORTCUTS_ENABLED = os.getenv("SHORTCUTS_ENABLED", "true").lower() == "true"
+# optional JSON {"<entry id>": ["paraphrase", ...]}; entries may also carry "aliases" in faq_seed.py
+FAQ_ALIASES_PATH = os.getenv("FAQ_ALIASES_PATH", "./data/faq_aliases.json")
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.7"))      # estimated Jaccard of char 4-grams
+MINHASH_PERMUTATIONS = int(os.getenv("MINHASH_PERMUTATIONS", "64"))
+MINHASH_BANDS = int(os.getenv("MINHASH_BANDS", "16"))                   # must divide permutations
+SHINGLE_SIZE = 4                                                        # character n-grams
+
+_PRIME = (1 << 61) - 1
+
+
+def _h64(s: str) -> int:
+    # stable across processes (unlike hash())
+    return int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def shingles(text: str, k: int = SHINGLE_SIZE) -> Set[str]:
+    t = normalize_text(text)
+    if len(t) <= k:
+        return {t} if t else set()
+    return {t[i:i + k] for i in range(len(t) - k + 1)}
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    if abs(len(a) - len(b)) > 1:
+        return False
+    i = 0
+    while i < min(len(a), len(b)) and a[i] == b[i]:
+        i += 1
+    # one substitution, insertion, deletion or swap of neighbours at the first difference
+    return (a[i + 1:] == b[i + 1:] or a[i:] == b[i + 1:] or a[i + 1:] == b[i:]
+            or (a[i:i + 2] == b[i:i + 2][::-1] and a[i + 2:] == b[i + 2:]))
+
+
+def same_content_words(a: str, b: str) -> bool:
+    """
+    True if both texts have the same content words (stopwords dropped), allowing one
+    typo per word. Shingle overlap alone can't tell "enable" from "disable" or notice
+    an added "not"; any added, removed or different word rejects the pair.
+    """
+    left, right = tokenize(a), tokenize(b)
+    if len(left) != len(right):
+        return False
+    rest = list(right)
+    unmatched = []
+    for w in left:
+        if w in rest:
+            rest.remove(w)
+        else:
+            unmatched.append(w)
+    for w in unmatched:
+        near = next((r for r in rest if _within_one_edit(w, r)), None)
+        if near is None:
+            return False
+        rest.remove(near)
+    return True
+
+
+@dataclass(frozen=True)
+class Shortcut:
+    entry_id: str
+    path: str           # "exact" | "alias" | "minhash"
+    score: float        # 1.0 for exact/alias, estimated Jaccard for minhash
+    metadata: Dict[str, Any]
+
+    def as_match(self) -> Dict[str, Any]:
+        """Shaped like a vector-backend match, so the normal answer rendering applies."""
+        return {"id": self.entry_id, "score": self.score, "metadata": self.metadata, "shortcut": self.path}
+
+
+class QuestionShortcuts:
+    """
+    O(1) answers for questions we already know:
+    - exact: normalized FAQ question / alias text -> entry id (dict lookup)
+    - near-duplicate: MinHash signatures of character shingles, LSH-banded so a
+      lookup only compares against entries that share at least one band; a
+      candidate must also have the same content words (same_content_words).
+    """
+
+    def __init__(self, permutations: int = MINHASH_PERMUTATIONS, bands: int = MINHASH_BANDS,
+                 threshold: float = NEAR_DUP_THRESHOLD):
+        if permutations % bands:
+            raise ValueError("MINHASH_PERMUTATIONS must be a multiple of MINHASH_BANDS")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = permutations // bands
+        # a_i * x + b_i mod p, derived deterministically so every worker agrees
+        self._perms = [(_h64(f"a{i}") % (_PRIME - 1) + 1, _h64(f"b{i}") % _PRIME) for i in range(permutations)]
+        self._lock = threading.Lock()
+        self._exact: Dict[str, Tuple[str, str]] = {}                   # text -> (entry id, "exact"|"alias")
+        self._signatures: Dict[Tuple[str, str], Tuple[int, ...]] = {}  # (entry id, text) -> signature
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[Tuple[str, str]]] = defaultdict(set)
+        self._metadata: Dict[str, Dict[str, Any]] = {}
+        self.hits = {"exact": 0, "alias": 0, "minhash": 0, "miss": 0}
+
+    def __len__(self) -> int:
+        return len(self._metadata)
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        base = [_h64(s) for s in shingles(text)]
+        if not base:
+            return ()
+        return tuple(min((a * x + b) % _PRIME for x in base) for a, b in self._perms)
+
+    def _band_keys(self, sig: Tuple[int, ...]) -> Iterable[Tuple[int, Tuple[int, ...]]]:
+        for band in range(self.bands):
+            yield band, sig[band * self.rows:(band + 1) * self.rows]
+
+    def _remove_locked(self, entry_id: str) -> None:
+        if self._metadata.pop(entry_id, None) is None:
+            return
+        for text in [t for t, (eid, _) in self._exact.items() if eid == entry_id]:
+            del self._exact[text]
+        for key in [k for k in self._signatures if k[0] == entry_id]:
+            for bk in self._band_keys(self._signatures.pop(key)):
+                bucket = self._buckets.get(bk)
+                if bucket is not None:
+                    bucket.discard(key)
+                    if not bucket:
+                        del self._buckets[bk]
+
+    def upsert(self, entries: Iterable[Tuple[str, Mapping[str, Any], Iterable[str]]]) -> None:
+        """entries: (id, metadata with "question", aliases)."""
+        with self._lock:
+            for entry_id, metadata, aliases in entries:
+                self._remove_locked(entry_id)
+                self._metadata[entry_id] = dict(metadata)
+                texts = [(metadata.get("question") or "", "exact")] + [(a, "alias") for a in aliases]
+                for raw, path in texts:
+                    text = normalize_text(raw)
+                    if not text:
+                        continue
+                    self._exact.setdefault(text, (entry_id, path))
+                    sig = self.signature(text)
+                    self._signatures[(entry_id, text)] = sig
+                    for bk in self._band_keys(sig):
+                        self._buckets[bk].add((entry_id, text))
+
+    def remove(self, ids: Iterable[str]) -> None:
+        with self._lock:
+            for entry_id in ids:
+                self._remove_locked(entry_id)
+
+    def replace(self, entries: Iterable[Tuple[str, Mapping[str, Any], Iterable[str]]]) -> None:
+        """Swap in a rebuilt table (hit counters are kept)."""
+        fresh = QuestionShortcuts(len(self._perms), self.bands, self.threshold)
+        fresh.upsert(entries)
+        with self._lock:
+            self._exact, self._signatures = fresh._exact, fresh._signatures
+            self._buckets, self._metadata = fresh._buckets, fresh._metadata
+
+    def lookup(self, user_text: str) -> Optional[Shortcut]:
+        text = normalize_text(user_text)
+        if not text:
+            return None
+        with self._lock:
+            hit = self._exact.get(text)
+            if hit is not None:
+                self.hits[hit[1]] += 1
+                return Shortcut(hit[0], hit[1], 1.0, self._metadata[hit[0]])
+
+            sig = self.signature(text)
+            candidates: Set[Tuple[str, str]] = set()
+            for bk in self._band_keys(sig):
+                candidates |= self._buckets.get(bk, set())
+            best, best_sim = None, 0.0
+            for key in candidates:
+                if not same_content_words(text, key[1]):
+                    continue
+                other = self._signatures[key]
+                sim = sum(1 for x, y in zip(sig, other) if x == y) / len(sig)
+                if sim > best_sim:
+                    best, best_sim = key, sim
+            if best is not None and best_sim >= self.threshold:
+                self.hits["minhash"] += 1
+                return Shortcut(best[0], "minhash", round(best_sim, 4), self._metadata[best[0]])
+            self.hits["miss"] += 1
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._metadata), "texts": len(self._exact),
+                    "threshold": self.threshold, **self.hits}
+
+
+def _load_aliases(path: str) -> Dict[str, List[str]]:
+    p = Path(path)
+    if not p.exists():
+        return {}
+    try:
+        data = json.loads(p.read_text(encoding="utf-8"))
+        return {str(k): [str(a) for a in v] for k, v in data.items()}
+    except (ValueError, AttributeError, TypeError) as e:
+        log.warning(f"ignoring aliases file {path}: {e}")
+        return {}
+
+
+def _seed_aliases() -> Dict[str, List[str]]:
+    from app.data.faq_seed import FAQ_ENTRIES
+    return {e["id"]: list(e["aliases"]) for e in FAQ_ENTRIES if e.get("aliases")}
+
+
+def corpus_entry_rows():
+    """The ingested corpus (faq_seed.py until the first ingest) with seed and file aliases."""
+    seed, extra = _seed_aliases(), _load_aliases(FAQ_ALIASES_PATH)
+    for entry_id, metadata in ingested_corpus():
+        yield entry_id, metadata, [*seed.get(entry_id, ()), *extra.get(entry_id, ())]
+
+
+# Keyed by the index generation: rebuilt from the ingested corpus whenever it moves, so
+# no worker short-circuits to an entry another worker's ingest changed or removed.
+question_shortcuts = QuestionShortcuts()
+_synced_generation: Optional[int] = None
+_sync_lock = threading.Lock()
+
+
+def synced_question_shortcuts() -> QuestionShortcuts:
+    """question_shortcuts, rebuilt first if the index generation changed since the last build."""
+    global _synced_generation
+    gen = current_generation()
+    if gen != _synced_generation:
+        with _sync_lock:
+            if gen != _synced_generation:
+                question_shortcuts.replace(corpus_entry_rows())
+                _synced_generation = gen
+                log.info(f"question shortcuts built | gen={gen} | {question_shortcuts.stats()}")
+    return question_shortcuts
@@ -0,0 +1,303 @@
+# src/app/services/vector_backends.py
+import asyncio
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Protocol, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.core.logging import get_logger
+from app.services.vector_store import (
+    DTYPES, VectorMatrix, as_list, fit_dim, load_snapshot, normalize_rows, save_snapshot, snapshot_exists
+)
+
+log = get_logger("rag.vector.backend")
+
+
+class VectorBackend(Protocol):
+    """
+    Minimal interface used by vector_client.search().
+    Matches are returned already normalized: {"id", "score", "metadata"}.
+    """
+    name: str
+
+    def query(self, vector: Sequence[float], top_k: int,
+              namespace: Optional[str] = None) -> List[Dict[str, Any]]: ...
+
+    async def aquery(self, vector: Sequence[float], top_k: int,
+                     namespace: Optional[str] = None) -> List[Dict[str, Any]]: ...
+
+    def upsert(self, vectors: List[Dict[str, Any]],
+               namespace: Optional[str] = None) -> int: ...
+
+
+class PineconeBackend:
+    """
+    Remote backend: delegates to a Pinecone Index.
+    resolve() returns (Index, dimension) of the active index, read once per call so a
+    switch to another index never pairs a vector of one dimension with the other
+    index; aresolve() does the same for the SDK's IndexAsyncio (created inside the
+    running event loop) and returns None when unavailable, in which case aquery()
+    falls back to a worker thread.
+    """
+    name = "pinecone"
+
+    def __init__(self, resolve: Callable[[], Tuple[Any, int]],
+                 aresolve: Optional[Callable[[], Optional[Tuple[Any, int]]]] = None) -> None:
+        self._resolve = resolve
+        self._aresolve = aresolve
+
+    @property
+    def index(self):
+        return self._resolve()[0]
+
+    @staticmethod
+    def _query_kwargs(vector, dim, top_k, namespace) -> Dict[str, Any]:
+        kwargs = {"vector": as_list(fit_dim(vector, dim)), "top_k": top_k, "include_metadata": True}
+        if namespace not in (None, ""):
+            kwargs["namespace"] = namespace
+        return kwargs
+
+    @staticmethod
+    def _normalize(res) -> List[Dict[str, Any]]:
+        raw = res.get("matches", []) or []
+        return [
+            {"id": m.get("id"), "score": m.get("score"), "metadata": m.get("metadata")}
+            for m in raw
+        ]
+
+    def query(self, vector, top_k, namespace=None):
+        index, dim = self._resolve()
+        return self._normalize(index.query(**self._query_kwargs(vector, dim, top_k, namespace)))
+
+    async def aquery(self, vector, top_k, namespace=None):
+        target = self._aresolve() if self._aresolve else None
+        if target is None:
+            return await asyncio.to_thread(self.query, vector, top_k, namespace)
+        aindex, dim = target
+        res = await aindex.query(**self._query_kwargs(vector, dim, top_k, namespace))
+        return self._normalize(res)
+
+    def upsert(self, vectors, namespace=None):
+        index, dim = self._resolve()
+        index.upsert(vectors=[{**v, "values": as_list(fit_dim(v["values"], dim))} for v in vectors],
+                     namespace=namespace or "default")
+        return len(vectors)
+
+
+class LocalVectorBackend:
+    """
+    In-process brute-force backend.
+    Keeps the corpus in one contiguous VectorMatrix (float32, float16 or int8 with
+    per-row scales) and answers top-k with a mat-vec + argpartition. Cosine rows
+    are L2-normalized before encoding so both metrics reduce to a dot product.
+
+    Snapshots are directories of .npy files (see vector_store.py) opened with mmap,
+    so workers share one page-cached copy; a path ending in .npz uses the older
+    single-file format (ids, float32 vectors, metadata JSON), read into memory.
+    The namespace argument is accepted for interface parity and ignored.
+    """
+    name = "local"
+
+    def __init__(self, ids: Sequence[str], vectors: Union[np.ndarray, VectorMatrix],
+                 metadata: Sequence[Dict[str, Any]], metric: str = "cosine",
+                 path: Optional[str] = None, dtype: str = "float32") -> None:
+        if metric not in ("cosine", "dot"):
+            raise ValueError(f"Unsupported metric: {metric}")
+        if dtype not in DTYPES:
+            raise ValueError(f"Unsupported dtype: {dtype}")
+        self.metric = metric
+        self.path = path
+        self.dtype = dtype
+        self._lock = threading.Lock()
+        # a VectorMatrix is taken as already prepared for the metric (e.g. from a snapshot)
+        matrix = vectors.astype(dtype) if isinstance(vectors, VectorMatrix) else self._encode(vectors)
+        self._set(list(ids), matrix, list(metadata))
+
+    def _encode(self, rows) -> VectorMatrix:
+        rows = np.asarray(rows, dtype=np.float32)
+        if rows.ndim != 2:
+            raise ValueError("vectors must be a 2-D array")
+        if self.metric == "cosine" and len(rows):
+            rows = normalize_rows(rows)
+        return VectorMatrix.encode(rows, self.dtype)
+
+    # ---------- state ----------
+    def _set(self, ids: List[str], matrix: VectorMatrix, metadata: List[Dict[str, Any]]) -> None:
+        if len(matrix) != len(ids) or len(ids) != len(metadata):
+            raise ValueError("ids, vectors and metadata must have matching lengths")
+        # swapped as one tuple so concurrent readers never see a torn state
+        self._state = (ids, matrix, metadata, {vid: i for i, vid in enumerate(ids)})
+
+    @property
+    def ids(self) -> List[str]:
+        return self._state[0]
+
+    @property
+    def matrix(self) -> VectorMatrix:
+        return self._state[1]
+
+    @property
+    def metadata(self) -> List[Dict[str, Any]]:
+        return self._state[2]
+
+    @property
+    def _pos(self) -> Dict[str, int]:
+        return self._state[3]
+
+    @property
+    def dim(self) -> int:
+        return self.matrix.dim
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def stats(self) -> Dict[str, Any]:
+        m = self.matrix
+        return {"count": len(m), "dim": m.dim, "dtype": m.dtype, "metric": self.metric,
+                "bytes": m.nbytes, "bytes_per_vector": round(m.nbytes / len(m), 1) if len(m) else 0,
+                "mmap": m.mmapped, "path": self.path}
+
+    # ---------- queries ----------
+    def _prepare(self, queries: np.ndarray, d: int) -> np.ndarray:
+        q = np.asarray(queries, dtype=np.float32)
+        if q.ndim == 1:
+            q = q[None, :]
+        q = fit_dim(q, d)   # e.g. a snapshot written at another dimension
+        if self.metric == "cosine":
+            q = q / np.maximum(np.linalg.norm(q, axis=1, keepdims=True), 1e-12)
+        return q
+
+    def query_many(self, queries, top_k: int) -> List[List[Dict[str, Any]]]:
+        """Batched top-k: one (B x D) @ (D x N) product for all queries."""
+        ids, matrix, metadata, _ = self._state
+        n = len(ids)
+        if n == 0:
+            q = np.atleast_2d(np.asarray(queries))
+            return [[] for _ in range(q.shape[0])]
+        q = self._prepare(queries, matrix.dim)
+        scores = matrix.scores(q)                               # (B, N)
+        k = max(1, min(top_k, n))
+        if k < n:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.tile(np.arange(n), (scores.shape[0], 1))
+        out: List[List[Dict[str, Any]]] = []
+        for row, cand in zip(scores, top):
+            order = cand[np.argsort(-row[cand], kind="stable")]
+            out.append([
+                {"id": ids[i], "score": float(row[i]), "metadata": metadata[i]}
+                for i in order
+            ])
+        return out
+
+    def query(self, vector, top_k, namespace=None):
+        return self.query_many(vector, top_k)[0]
+
+    async def aquery(self, vector, top_k, namespace=None):
+        # microseconds of NumPy work: cheaper inline than a thread hop
+        return self.query(vector, top_k, namespace)
+
+    # ---------- writes ----------
+    def upsert(self, vectors, namespace=None, persist: bool = True):
+        """persist=False skips the snapshot write (bulk loads call save() once at the end)."""
+        if not vectors:
+            return 0
+        with self._lock:
+            ids = list(self.ids)
+            metadata = list(self.metadata)
+            matrix = self.matrix if len(ids) else VectorMatrix.empty(len(vectors[0]["values"]), self.dtype)
+            dim, base = matrix.dim, len(ids)
+            pos_of = dict(self._pos)
+            replace: Dict[int, np.ndarray] = {}
+            append: List[np.ndarray] = []
+            for v in vectors:
+                row = fit_dim(np.asarray(v["values"], dtype=np.float32), dim)
+                if self.metric == "cosine":
+                    row = row / max(float(np.linalg.norm(row)), 1e-12)
+                pos = pos_of.get(v["id"])
+                if pos is None:
+                    pos_of[v["id"]] = len(ids)
+                    ids.append(v["id"])
+                    metadata.append(v.get("metadata") or {})
+                    append.append(row)
+                else:
+                    metadata[pos] = v.get("metadata") or {}
+                    if pos < base:
+                        replace[pos] = row
+                    else:
+                        append[pos - base] = row   # repeated id within this call
+            self._set(ids, matrix.updated(replace, append), metadata)
+            if persist and self.path:
+                self.save(self.path)
+        return len(vectors)
+
+    def delete(self, ids: Sequence[str], namespace=None, persist: bool = True) -> int:
+        drop = {i for i in ids if i in self._pos}
+        if not drop:
+            return 0
+        with self._lock:
+            keep = [i for i, vid in enumerate(self.ids) if vid not in drop]
+            self._set([self.ids[i] for i in keep], self.matrix.take(keep),
+                      [self.metadata[i] for i in keep])
+            if persist and self.path:
+                self.save(self.path)
+        return len(drop)
+
+    # ---------- persistence ----------
+    def save(self, path: str) -> None:
+        ids, matrix, metadata, _ = self._state
+        if not path.endswith(".npz"):
+            save_snapshot(path, ids, matrix, metadata, self.metric)
+            return
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_suffix(".tmp.npz")
+        np.savez(
+            tmp,
+            ids=np.asarray(ids, dtype=str),
+            vectors=matrix.rows(),
+            metadata=np.asarray(json.dumps(metadata)),
+        )
+        os.replace(tmp, p)
+
+    def reload(self, mmap: bool = True) -> None:
+        """Re-read the snapshot at self.path (e.g. saved by another worker) and swap it in."""
+        if not self.path:
+            return
+        fresh = type(self).load(self.path, metric=self.metric, dtype=self.dtype, mmap=mmap)
+        with self._lock:
+            self._set(fresh.ids, fresh.matrix, fresh.metadata)
+
+    @classmethod
+    def load(cls, path: str, metric: str = "cosine", dtype: str = "float32",
+             mmap: bool = True) -> "LocalVectorBackend":
+        """
+        Load a snapshot; a missing file yields an empty index (filled by ingest).
+        A directory snapshot stored in another dtype (or not normalized for cosine)
+        is converted in memory, so it is not shared until the next save.
+        """
+        t0 = time.perf_counter()
+        if not snapshot_exists(path):
+            log.warning(f"local index not found at {path}; starting empty")
+            return cls([], np.zeros((0, 0), dtype=np.float32), [], metric=metric, path=path, dtype=dtype)
+        if path.endswith(".npz"):
+            with np.load(path, allow_pickle=False) as data:
+                ids = [str(x) for x in data["ids"]]
+                vectors = data["vectors"]
+                metadata = json.loads(str(data["metadata"]))
+            backend = cls(ids, vectors, metadata, metric=metric, path=path, dtype=dtype)
+        else:
+            ids, matrix, metadata, stored_metric = load_snapshot(path, mmap=mmap)
+            if metric == "cosine" and stored_metric != "cosine":
+                matrix = VectorMatrix.encode(normalize_rows(matrix.rows()), dtype)
+            if matrix.dtype != dtype:
+                log.warning(f"local index stored as {matrix.dtype}, converting to {dtype} in memory")
+            backend = cls(ids, matrix, metadata, metric=metric, path=path, dtype=dtype)
+        dt = (time.perf_counter() - t0) * 1000
+        log.info(f"local index loaded | path={path} | n={len(backend)} | dim={backend.dim} "
+                 f"| dtype={backend.matrix.dtype} | mmap={backend.matrix.mmapped} | ms={dt:.1f}")
+        return backend
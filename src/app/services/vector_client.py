@@ -1,9 +1,23 @@
+import asyncio
 import os
+import threading
 import time
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from dotenv import load_dotenv
 from pinecone import Pinecone
+from pinecone.exceptions import PineconeException
 from app.core.logging import get_logger
+from app.core.cache import TTLCache
+from app.core.batcher import AsyncMicroBatcher, MicroBatcher
+from app.core.metrics import EMBED_BATCH_SIZE, EMBED_MS, SEARCH_PATH, VECTOR_QUERY_MS, register_cache
+from app.core.text import normalize_text
+from app.core.tracing import span
+from app.core.resilience import CircuitBreaker, Dependency, DependencyUnavailable
+from app.core.singleflight import AsyncSingleFlight, SingleFlight
+from app.services.vector_backends import VectorBackend, PineconeBackend, LocalVectorBackend
+from app.services.index_state import IndexTarget, active_index, current_generation
+from app.services.vector_store import snapshot_exists
+from app.services.lexical_index import reciprocal_rank_fusion, synced_lexical_index
 
 load_dotenv()
 log = get_logger("rag.vector")
@@ -15,97 +29,571 @@ TOP_K = int(os.getenv("PINECONE_TOP_K", "3"))
 NAMESPACE = os.getenv("PINECONE_NAMESPACE")  # may be None
 DEBUG_RAW_MATCHES = os.getenv("DEBUG_RAW_MATCHES", "false").lower() == "true"
 INDEX_DIM = int(os.getenv("PINECONE_INDEX_DIM", "1536"))
+EMBED_DIM = int(os.getenv("PINECONE_EMBED_DIM", "1024"))  # native output size of EMBED_MODEL
+# "pinecone" (remote index) | "local" (in-process NumPy matrix loaded from LOCAL_INDEX_PATH)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone").lower()
+# snapshot directory of .npy files (mmap-shared by workers); a *.npz path keeps the old single-file format
+LOCAL_INDEX_PATH = os.getenv("LOCAL_INDEX_PATH", "./data/faq_index")
+LOCAL_INDEX_METRIC = os.getenv("LOCAL_INDEX_METRIC", "cosine").lower()
+# float32 | float16 | int8 (per-row scales): 4 / 2 / 1 bytes per dimension
+LOCAL_INDEX_DTYPE = os.getenv("LOCAL_INDEX_DTYPE", "float32").lower()
+LOCAL_INDEX_MMAP = os.getenv("LOCAL_INDEX_MMAP", "true").lower() == "true"
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "2048"))        # 0 disables
+EMBED_CACHE_TTL_SECONDS = float(os.getenv("EMBED_CACHE_TTL_SECONDS", "3600"))
+# micro-batching of query embeddings: texts arriving within the window (or until the batch
+# is full) go in one inference call; 0 disables. llama-text-embed-v2 takes up to 96 inputs.
+EMBED_BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", "5"))
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "32"))
+# "vector" (default) | "hybrid" (vector + BM25 fused with reciprocal-rank fusion)
+SEARCH_MODE = os.getenv("SEARCH_MODE", "vector").lower()
+RRF_K = int(os.getenv("RRF_K", "60"))
+# skip embedding + vector query when the top BM25 hit clearly dominates
+LEXICAL_FASTPATH = os.getenv("LEXICAL_FASTPATH", "false").lower() == "true"
+LEXICAL_FASTPATH_MIN_SCORE = float(os.getenv("LEXICAL_FASTPATH_MIN_SCORE", "6.0"))   # raw BM25
+LEXICAL_FASTPATH_RATIO = float(os.getenv("LEXICAL_FASTPATH_RATIO", "2.0"))           # top1 / top2
+# hybrid: ids only BM25 found join the fusion from this raw BM25 score up; their relative
+# score is not a cosine and would clear RAG_CONFIDENCE_THRESHOLD for any keyword overlap
+HYBRID_LEXICAL_MIN_BM25 = float(os.getenv("HYBRID_LEXICAL_MIN_BM25", "4.0"))
+# remote calls (embed, index query): per-call timeout (capped by the request deadline),
+# max in-flight per dependency, circuit breaker (consecutive failures -> open for N s)
+VECTOR_TIMEOUT_MS = float(os.getenv("VECTOR_TIMEOUT_MS", "1500"))
+VECTOR_MAX_INFLIGHT = int(os.getenv("VECTOR_MAX_INFLIGHT", "32"))
+VECTOR_MIN_BUDGET_MS = float(os.getenv("VECTOR_MIN_BUDGET_MS", "100"))   # don't start a call with less left
+VECTOR_BREAKER_FAILURES = int(os.getenv("VECTOR_BREAKER_FAILURES", "5"))
+VECTOR_BREAKER_RESET_SECONDS = float(os.getenv("VECTOR_BREAKER_RESET_SECONDS", "10"))
+VECTOR_BREAKER_HALF_OPEN_PROBES = int(os.getenv("VECTOR_BREAKER_HALF_OPEN_PROBES", "1"))
+# degraded mode: lexical hits below this raw BM25 score are dropped (no confident answer)
+DEGRADED_LEXICAL_MIN_BM25 = float(os.getenv("DEGRADED_LEXICAL_MIN_BM25", "2.0"))
+# identical concurrent searches share one embed+query round trip (see core/singleflight.py)
+SEARCH_COALESCING = os.getenv("SEARCH_COALESCING", "true").lower() == "true"
 
-if not PINECONE_API_KEY or not PINECONE_HOST:
-    raise RuntimeError("Please configure PINECONE_API_KEY and PINECONE_HOST in .env")
+# failures that mean "the vector service is unavailable" (callers degrade); anything else
+# is a bug on our side and propagates. TimeoutError / ConnectionError are OSErrors.
+VECTOR_ERRORS = (DependencyUnavailable, PineconeException, OSError)
 
-# One-time connection (reuse client + index)
-pc = Pinecone(api_key=PINECONE_API_KEY)
-index = pc.Index(host=PINECONE_HOST)
+# "sdk" (real Pinecone) | "fake" (offline stand-in, see fake_pinecone.py: deterministic
+# embeddings, exact top-k, injectable latency/errors/429s; no key or network needed)
+PINECONE_CLIENT = os.getenv("PINECONE_CLIENT", "sdk").lower()
+if PINECONE_CLIENT not in ("sdk", "fake"):
+    raise RuntimeError(f"Unknown PINECONE_CLIENT={PINECONE_CLIENT!r} (expected 'sdk' or 'fake')")
 
-log.info(f"Pinecone connected | host={PINECONE_HOST} | model={EMBED_MODEL} | "
-         f"namespace={NAMESPACE or '(none)'} | top_k={TOP_K}")
+# Clients are created on first use, so the app boots (health, auth, local backend)
+# without credentials or network; a missing key surfaces on the first Pinecone call.
+_pc = None
+_indexes: Dict[Optional[str], Any] = {}    # host -> Index handle
+_faults = None
+_client_lock = threading.Lock()
 
 
-def adjust_dim(vec, target_dim: int):
-    """Ensures that the vector has the length required by the Pinecone index."""
-    if vec is None:
-        return None
-    v = list(map(float, vec))
-    n = len(v)
-    if n == target_dim:
-        return v
-    if n > target_dim:
-        return v[:target_dim]
-    return v + [0.0] * (target_dim - n)
+def _fake_kwargs() -> Dict[str, Any]:
+    global _faults
+    from app.services.fake_pinecone import Faults
+    if _faults is None:
+        _faults = Faults()  # shared by the sync and async fakes (one rate limiter)
+    return {"index_dim": INDEX_DIM, "embed_dim": EMBED_DIM, "preload_namespace": NAMESPACE or "",
+            "faults": _faults}
 
-def embed_query(text: str) -> List[float]:
+
+def _require_credentials() -> None:
+    if not PINECONE_API_KEY or not PINECONE_HOST:
+        raise RuntimeError("Please configure PINECONE_API_KEY and PINECONE_HOST in .env "
+                           "(or PINECONE_CLIENT=fake to run offline)")
+
+
+def get_client():
+    """The Pinecone client (inference + Index), created once."""
+    global _pc
+    if _pc is None:
+        with _client_lock:
+            if _pc is None:
+                if PINECONE_CLIENT == "fake":
+                    from app.services.fake_pinecone import FakePinecone
+                    _pc = FakePinecone(api_key=PINECONE_API_KEY, **_fake_kwargs())
+                else:
+                    _require_credentials()
+                    _pc = Pinecone(api_key=PINECONE_API_KEY)
+                log.info(f"Pinecone client ready | client={PINECONE_CLIENT} | host={PINECONE_HOST} | "
+                         f"model={EMBED_MODEL} | namespace={NAMESPACE or '(none)'} | top_k={TOP_K}")
+    return _pc
+
+
+# PINECONE_HOST / PINECONE_INDEX_DIM until an index migration switches to another index
+CONFIGURED_INDEX = IndexTarget(host=PINECONE_HOST, dimension=INDEX_DIM)
+
+
+def active_target() -> IndexTarget:
+    """The index queries go to right now (see index_state.active_index)."""
+    return active_index(CONFIGURED_INDEX)
+
+
+def ingest_target(target: Optional[IndexTarget] = None) -> str:
+    """Where ingest writes right now, as recorded in the ingest manifest."""
+    if backend.name == "local":
+        return f"local:{backend.path or 'memory'}"
+    return f"pinecone:{(target or active_target()).host}"
+
+
+def delete_from_target(target: str, ids: List[str], namespace: Optional[str]) -> None:
     """
-    Generate a query embedding using Pinecone Inference with input_type='query'.
-    Returns a 1024-dim vector for llama-text-embed-v2.
+    Delete vectors from an index recorded in the ingest manifest ("pinecone:<host>" or
+    "local:<path>"), which need not be the one ingest writes to now.
     """
-    t0 = time.perf_counter()
-    resp = pc.inference.embed(
+    kind, _, where = target.partition(":")
+    if kind == "pinecone":
+        get_index(where).delete(ids=list(ids), namespace=namespace)
+    elif kind == "local":
+        if where == "memory" or not snapshot_exists(where):
+            return      # never persisted: nothing left to clean up
+        local = LocalVectorBackend.load(where, metric=LOCAL_INDEX_METRIC, dtype=LOCAL_INDEX_DTYPE, mmap=False)
+        if local.delete(ids, namespace=namespace, persist=False):
+            local.save(where)
+    else:
+        raise ValueError(f"unknown ingest target {target!r}")
+
+
+def get_index(host: Optional[str] = None):
+    """Index handle for `host` (default: the active index), reused for every query."""
+    host = host or active_target().host
+    index = _indexes.get(host)
+    if index is None:
+        pc = get_client()
+        with _client_lock:
+            index = _indexes.get(host)
+            if index is None:
+                index = _indexes[host] = pc.Index(host=host)
+                target = active_target()
+                if target.host == host and target.dimension != EMBED_DIM:
+                    log.warning(f"index dimension {target.dimension} != {EMBED_MODEL} output {EMBED_DIM}: "
+                                f"vectors are {'zero-padded' if target.dimension > EMBED_DIM else 'cut'}; "
+                                f"see GET /api/ingest/dimension and POST /api/ingest/migrate")
+    return index
+
+
+def resolve_index() -> Tuple[Any, int]:
+    """(Index, dimension) of the active index, read together (PineconeBackend)."""
+    target = active_target()
+    return get_index(target.host), target.dimension
+
+
+# Async clients are created lazily, inside the running event loop (aiohttp sessions
+# are loop-bound), and closed by aclose() on application shutdown.
+_apc = None
+_aindexes: Dict[Optional[str], Any] = {}
+
+
+def _async_pc():
+    global _apc
+    if _apc is None:
+        if PINECONE_CLIENT == "fake":
+            from app.services.fake_pinecone import FakePineconeAsyncio
+            _apc = FakePineconeAsyncio(api_key=PINECONE_API_KEY, **_fake_kwargs())
+            return _apc
+        try:
+            from pinecone import PineconeAsyncio
+        except ImportError:  # older SDKs: callers fall back to a worker thread
+            return None
+        _require_credentials()
+        _apc = PineconeAsyncio(api_key=PINECONE_API_KEY)
+    return _apc
+
+
+def _async_index(host: Optional[str] = None):
+    host = host or active_target().host
+    aindex = _aindexes.get(host)
+    if aindex is None:
+        apc = _async_pc()
+        if apc is None:
+            return None
+        aindex = _aindexes[host] = apc.IndexAsyncio(host=host)
+    return aindex
+
+
+def _aresolve_index() -> Optional[Tuple[Any, int]]:
+    target = active_target()
+    aindex = _async_index(target.host)
+    return None if aindex is None else (aindex, target.dimension)
+
+
+async def aclose() -> None:
+    """Close the async Pinecone clients (call from the app shutdown hook)."""
+    global _apc
+    for aindex in list(_aindexes.values()):
+        await aindex.close()
+    _aindexes.clear()
+    if _apc is not None:
+        await _apc.close()
+    _apc = None
+
+
+def _load_local() -> LocalVectorBackend:
+    return LocalVectorBackend.load(LOCAL_INDEX_PATH, metric=LOCAL_INDEX_METRIC, dtype=LOCAL_INDEX_DTYPE,
+                                   mmap=LOCAL_INDEX_MMAP)
+
+
+def _make_backend(kind: str) -> VectorBackend:
+    if kind == "local":
+        return _load_local()
+    if kind == "pinecone":
+        return PineconeBackend(resolve_index, aresolve=_aresolve_index)
+    raise RuntimeError(f"Unknown VECTOR_BACKEND={kind!r} (expected 'pinecone' or 'local')")
+
+
+# Chosen once at startup; search() only talks to this object
+# (a local snapshot is read again whenever the index generation moves, see synced_local_index)
+_local_generation: Optional[int] = current_generation()
+backend: VectorBackend = _make_backend(VECTOR_BACKEND)
+log.info(f"vector backend | kind={backend.name}")
+
+
+def _dependency(name: str) -> Dependency:
+    breaker = CircuitBreaker(VECTOR_BREAKER_FAILURES, VECTOR_BREAKER_RESET_SECONDS, VECTOR_BREAKER_HALF_OPEN_PROBES)
+    return Dependency(name, VECTOR_TIMEOUT_MS, VECTOR_MAX_INFLIGHT, breaker, min_budget_ms=VECTOR_MIN_BUDGET_MS)
+
+
+# one bulkhead + breaker per remote call type (shown under /debug/breakers)
+dependencies: Dict[str, Dependency] = {"embed": _dependency("embed"), "vector_query": _dependency("vector_query")}
+
+
+# Shared by search(), /debug/emb and /debug/pinecone-raw (all go through embed_query)
+embedding_cache: TTLCache[List[float]] = TTLCache(
+    maxsize=EMBED_CACHE_SIZE, ttl_seconds=EMBED_CACHE_TTL_SECONDS, name="query_embeddings"
+)
+register_cache(embedding_cache)
+
+
+def _embed_call(texts: List[str]):
+    return get_client().inference.embed(
         model=EMBED_MODEL,
-        inputs=[text],
+        inputs=list(texts),
         parameters={"input_type": "query"}
     )
-    vec = resp.data[0].values
+
+
+def _embed_batch(texts: List[str]) -> List[List[float]]:
+    """One inference call for many query texts (duplicates sent once); vectors in input order."""
+    unique = list(dict.fromkeys(texts))
+    t0 = time.perf_counter()
+    resp = dependencies["embed"].call(_embed_call, unique)
+    by_text = {t: d.values for t, d in zip(unique, resp.data)}
+    dt = (time.perf_counter() - t0) * 1000
+    EMBED_MS.observe(dt, kind="query")
+    log.debug(f"embed_query ok | n={len(unique)} | ms={dt:.1f}")
+    return [by_text[t] for t in texts]
+
+
+async def _aembed_batch(texts: List[str]) -> List[List[float]]:
+    unique = list(dict.fromkeys(texts))
+    apc = _async_pc()
+    t0 = time.perf_counter()
+    if apc is None:
+        resp = await dependencies["embed"].acall(asyncio.to_thread, _embed_call, unique)
+    else:
+        resp = await dependencies["embed"].acall(
+            apc.inference.embed,
+            model=EMBED_MODEL,
+            inputs=unique,
+            parameters={"input_type": "query"}
+        )
+    by_text = {t: d.values for t, d in zip(unique, resp.data)}
     dt = (time.perf_counter() - t0) * 1000
-    log.debug(f"embed_query ok | dims={len(vec)} | ms={dt:.1f}")
-    return vec
+    EMBED_MS.observe(dt, kind="query")
+    log.debug(f"aembed_query ok | n={len(unique)} | ms={dt:.1f}")
+    return [by_text[t] for t in texts]
+
 
-def search(text: str, top_k: int = TOP_K) -> List[Dict[str, Any]]:
+def _batch_flushed(size: int, trigger: str, ms: float) -> None:
+    EMBED_BATCH_SIZE.observe(size, trigger=trigger)
+
+
+# Query texts arriving within EMBED_BATCH_WINDOW_MS share one inference call; a batch
+# is one call for the "embed" bulkhead/breaker. Threads and the event loop batch separately.
+_embed_batcher = MicroBatcher("embed", _embed_batch, EMBED_BATCH_WINDOW_MS, EMBED_BATCH_MAX_SIZE,
+                              on_flush=_batch_flushed)
+_aembed_batcher = AsyncMicroBatcher("embed", _aembed_batch, EMBED_BATCH_WINDOW_MS, EMBED_BATCH_MAX_SIZE,
+                                    on_flush=_batch_flushed)
+
+
+def _embed_remote(text: str) -> List[float]:
+    if EMBED_BATCH_WINDOW_MS <= 0:
+        return _embed_batch([text])[0]
+    dependencies["embed"].budget_ms()   # not enough deadline left: fail now, not after the window
+    return _embed_batcher.submit(text)
+
+
+async def _aembed_remote(text: str) -> List[float]:
+    if EMBED_BATCH_WINDOW_MS <= 0:
+        return (await _aembed_batch([text]))[0]
+    dependencies["embed"].budget_ms()
+    return await _aembed_batcher.submit(text)
+
+
+def embed_batching_stats() -> Dict[str, Any]:
+    return {"sync": _embed_batcher.stats(), "async": _aembed_batcher.stats()}
+
+
+def embed_documents(texts: List[str]) -> List[List[float]]:
     """
-    1) Embed the query (measures latency)
-    2) Query the Pinecone index (measures latency)
-    3) Return normalized matches (id/score/metadata)
+    Embed many passages in one Pinecone Inference call (input_type='passage').
+    Used by ingest; callers are responsible for respecting the model's batch limit.
     """
-    # 1) embed
-    qvec_raw = embed_query(text)
-    qvec = adjust_dim(qvec_raw, INDEX_DIM)
-
-    # 2) query
+    if not texts:
+        return []
     t0 = time.perf_counter()
-    kwargs = {
-        "vector": qvec,
-        "top_k": top_k,
-        "include_metadata": True,
-    }
-    if NAMESPACE not in (None, ""):
-        kwargs["namespace"] = NAMESPACE
-
-    res = index.query(**kwargs)
-    query_ms = (time.perf_counter() - t0) * 1000
-
-    raw = res.get("matches", []) or []
-    count = len(raw)
-    top_scores = [round(m.get("score", 0.0), 4) for m in raw[:3]]
-    log.info(f"pinecone.query | matches={count} | top_scores={top_scores} | ms={query_ms:.1f} "
+    resp = get_client().inference.embed(
+        model=EMBED_MODEL,
+        inputs=list(texts),
+        parameters={"input_type": "passage", "truncate": "END"}
+    )
+    vecs = [d.values for d in resp.data]
+    dt = (time.perf_counter() - t0) * 1000
+    EMBED_MS.observe(dt, kind="passage")
+    log.debug(f"embed_documents ok | n={len(vecs)} | ms={dt:.1f}")
+    return vecs
+
+
+def _cache_key(text: str):
+    return (EMBED_MODEL, normalize_text(text))
+
+
+def embed_query(text: str) -> List[float]:
+    """
+    Generate a query embedding using Pinecone Inference with input_type='query'.
+    Returns a 1024-dim vector for llama-text-embed-v2.
+    Results are cached per (model, normalized text); misses go through the
+    micro-batcher (EMBED_BATCH_WINDOW_MS).
+    """
+    with span("embed") as sp:
+        key = _cache_key(text)
+        cached = embedding_cache.get(key)
+        if sp is not None:
+            sp.attrs["cache"] = "hit" if cached is not None else "miss"
+        if cached is not None:
+            log.debug(f"embed_query cache hit | dims={len(cached)}")
+            return cached
+        vec = _embed_remote(text)
+        embedding_cache.set(key, vec)
+        return vec
+
+
+async def aembed_query(text: str) -> List[float]:
+    """Async twin of embed_query(); shares the same cache."""
+    with span("embed") as sp:
+        key = _cache_key(text)
+        cached = embedding_cache.get(key)
+        if sp is not None:
+            sp.attrs["cache"] = "hit" if cached is not None else "miss"
+        if cached is not None:
+            log.debug(f"aembed_query cache hit | dims={len(cached)}")
+            return cached
+        vec = await _aembed_remote(text)
+        embedding_cache.set(key, vec)
+        return vec
+
+
+def _log_matches(out: List[Dict[str, Any]], query_ms: float, source: str = "") -> None:
+    if not source:
+        VECTOR_QUERY_MS.observe(query_ms, backend=backend.name)
+    count = len(out)
+    top_scores = [round(m.get("score") or 0.0, 4) for m in out[:3]]
+    log.info(f"{source or backend.name}.query | matches={count} | top_scores={top_scores} | ms={query_ms:.1f} "
              f"| ns={NAMESPACE or '(none)'}")
 
     if DEBUG_RAW_MATCHES:
-        log.debug(f"raw_matches={raw}")
-
-    # 3) normalize
-    out: List[Dict[str, Any]] = []
-    for m in raw:
-        out.append({
-            "id": m.get("id"),
-            "score": m.get("score"),
-            "metadata": m.get("metadata"),
-        })
+        log.debug(f"raw_matches={out}")
+
+
+def _lexical(text: str, top_k: int) -> List[Dict[str, Any]]:
+    """
+    BM25 matches with score = bm25 / top bm25 (top hit = 1.0), raw value kept in "bm25".
+    The relative score only ranks hits of one query; confidence gates use "bm25".
+    """
+    hits = synced_lexical_index().search(text, top_k=top_k)
+    if not hits:
+        return []
+    top = hits[0]["score"]
+    return [{**h, "score": h["score"] / top, "bm25": round(h["score"], 4)} for h in hits]
+
+
+def _lexical_fastpath(lex: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """The dominant lexical hits when the top one clearly wins, else []."""
+    if not LEXICAL_FASTPATH or not lex or lex[0]["bm25"] < LEXICAL_FASTPATH_MIN_SCORE:
+        return []
+    if len(lex) > 1 and lex[1]["score"] * LEXICAL_FASTPATH_RATIO > 1.0:
+        return []
+    return [m for m in lex if m["score"] * LEXICAL_FASTPATH_RATIO >= 1.0]
+
+
+def _plan(text: str, top_k: int, mode: str):
+    """Lexical side of a search: (lexical matches, fast-path result or [])."""
+    if mode != "hybrid" and not LEXICAL_FASTPATH:
+        return [], []
+    t0 = time.perf_counter()
+    with span("bm25"):
+        lex = _lexical(text, top_k)
+    fast = _lexical_fastpath(lex)
+    if fast:
+        _log_matches(fast, (time.perf_counter() - t0) * 1000, source="lexical_fastpath")
+        SEARCH_PATH.inc(path="lexical_fastpath")
+    return lex, fast
+
+
+def _fuse(vec: List[Dict[str, Any]], lex: List[Dict[str, Any]], top_k: int, mode: str):
+    SEARCH_PATH.inc(path="hybrid" if mode == "hybrid" else "vector")
+    if mode != "hybrid":
+        return vec
+    # vector dict wins for ids found by both, so "score" stays a cosine where one exists;
+    # lexical-only ids must clear the raw BM25 gate (a top hit always has relative score 1.0)
+    seen = {m["id"] for m in vec}
+    lex = [m for m in lex if m["id"] in seen or m["bm25"] >= HYBRID_LEXICAL_MIN_BM25]
+    return reciprocal_rank_fusion([vec, lex], k=RRF_K, top_k=top_k)
+
+
+def _round_trip(text: str, top_k: int) -> List[Dict[str, Any]]:
+    """Embed the query and query the configured vector backend (measures latency)."""
+    # native model output; each backend shapes it to its own dimension (fit_dim)
+    qvec = embed_query(text)
+
+    t0 = time.perf_counter()
+    with span("vq", backend=backend.name):
+        if backend.name == "local":
+            out = synced_local_index().query(qvec, top_k=top_k, namespace=NAMESPACE)
+        else:
+            out = dependencies["vector_query"].call(backend.query, qvec, top_k=top_k, namespace=NAMESPACE)
+    _log_matches(out, (time.perf_counter() - t0) * 1000)
     return out
 
-def build_context(matches: List[Dict[str, Any]]) -> str:
+
+async def _around_trip(text: str, top_k: int) -> List[Dict[str, Any]]:
+    qvec = await aembed_query(text)
+
+    t0 = time.perf_counter()
+    with span("vq", backend=backend.name):
+        if backend.name == "local":
+            out = await synced_local_index().aquery(qvec, top_k=top_k, namespace=NAMESPACE)
+        else:
+            out = await dependencies["vector_query"].acall(backend.aquery, qvec, top_k=top_k,
+                                                           namespace=NAMESPACE)
+    _log_matches(out, (time.perf_counter() - t0) * 1000)
+    return out
+
+
+# One flight per (model, normalized query, top_k, namespace): the first caller does the
+# round trip, concurrent duplicates wait for its matches (or its exception). Threads
+# (search) and the event loop (asearch) coalesce separately.
+_flights = SingleFlight("search")
+_aflights = AsyncSingleFlight("search")
+
+
+def _flight_key(text: str, top_k: int):
+    return (EMBED_MODEL, normalize_text(text), top_k, NAMESPACE)
+
+
+def _coalesced(text: str, top_k: int) -> List[Dict[str, Any]]:
+    if not SEARCH_COALESCING:
+        return _round_trip(text, top_k)
+    # each caller gets its own list; the match dicts are shared read-only
+    return list(_flights.do(_flight_key(text, top_k), lambda: _round_trip(text, top_k)))
+
+
+async def _acoalesced(text: str, top_k: int) -> List[Dict[str, Any]]:
+    if not SEARCH_COALESCING:
+        return await _around_trip(text, top_k)
+    return list(await _aflights.do(_flight_key(text, top_k), lambda: _around_trip(text, top_k)))
+
+
+def coalescing_stats() -> Dict[str, Any]:
+    return {"enabled": SEARCH_COALESCING, "sync": _flights.stats(), "async": _aflights.stats()}
+
+
+def search(text: str, top_k: int = TOP_K, mode: str = None) -> List[Dict[str, Any]]:
     """
-    Format retrieved entries into a readable context block.
+    1) Lexical fast path / BM25 side (hybrid mode or LEXICAL_FASTPATH)
+    2) Embed the query and query the configured vector backend, coalesced with
+       identical concurrent searches (SEARCH_COALESCING)
+    3) Return normalized matches (id/score/metadata), RRF-fused in hybrid mode
+    """
+    mode = (mode or SEARCH_MODE).lower()
+    lex, fast = _plan(text, top_k, mode)
+    if fast:
+        return fast
+
+    return _fuse(_coalesced(text, top_k), lex, top_k, mode)
+
+
+async def asearch(text: str, top_k: int = TOP_K, mode: str = None) -> List[Dict[str, Any]]:
+    """Async twin of search(): no worker thread is held while waiting on the network."""
+    mode = (mode or SEARCH_MODE).lower()
+    lex, fast = _plan(text, top_k, mode)
+    if fast:
+        return fast
+
+    return _fuse(await _acoalesced(text, top_k), lex, top_k, mode)
+
+
+_local_fallback: Optional[LocalVectorBackend] = None
+_local_lock = threading.Lock()
+
+
+def synced_local_index() -> Optional[LocalVectorBackend]:
+    """
+    The local snapshot: the backend itself with VECTOR_BACKEND=local, otherwise the
+    LOCAL_INDEX_PATH copy used in degraded mode (None until one exists). Re-read when
+    the index generation changed, so an ingest saved by another worker is seen here.
+    """
+    global _local_fallback, _local_generation
+    gen = current_generation()
+    local = backend if isinstance(backend, LocalVectorBackend) else _local_fallback
+    if local is not None and gen == _local_generation:
+        return local
+    with _local_lock:
+        local = backend if isinstance(backend, LocalVectorBackend) else _local_fallback
+        if local is None:
+            if snapshot_exists(LOCAL_INDEX_PATH):
+                _local_fallback = _load_local()
+                _local_generation = gen
+            return _local_fallback
+        if gen != _local_generation:
+            local.reload(mmap=LOCAL_INDEX_MMAP)
+            _local_generation = gen
+    return local
+
+
+def degraded_search(text: str, top_k: int = TOP_K, mode: str = "lexical") -> List[Dict[str, Any]]:
+    """
+    Retrieval without the remote vector service:
+    - "local": cached query embedding against the local snapshot, else lexical
+    - "lexical": BM25 hits with a raw score >= DEGRADED_LEXICAL_MIN_BM25
+    - "none": [] (the caller answers with the canned reply)
+    """
+    if mode == "none":
+        return []
+    if mode == "local":
+        vec = embedding_cache.get(_cache_key(text))
+        local = synced_local_index() if vec is not None else None
+        if local is not None and len(local):
+            out = local.query(vec, top_k=top_k)
+            SEARCH_PATH.inc(path="degraded_local")
+            return out
+    with span("bm25"):
+        hits = [h for h in _lexical(text, top_k) if h["bm25"] >= DEGRADED_LEXICAL_MIN_BM25]
+    SEARCH_PATH.inc(path="degraded_lexical")
+    return hits
+
+
+def iter_context_blocks(matches: List[Dict[str, Any]]) -> Iterator[str]:
+    """
+    Yield one formatted block per retrieved entry (used for streaming).
     """
-    parts = []
     for i, m in enumerate(matches, start=1):
         md = m.get("metadata") or {}
         cat = md.get("category", "Unknown")
         q = md.get("question", "")
         a = md.get("answer", "")
-        parts.append(f"[{i}] Category: {cat}\nQ: {q}\nA: {a}")
-    return "\n\n".join(parts)
+        yield f"[{i}] Category: {cat}\nQ: {q}\nA: {a}"
+
+def build_context(matches: List[Dict[str, Any]]) -> str:
+    """
+    Format retrieved entries into a readable context block.
+    """
+    with span("ctx", blocks=len(matches)):
+        return "\n\n".join(iter_context_blocks(matches))
@@ -0,0 +1,236 @@
+# src/app/services/vector_store.py
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.logging import get_logger
+
+log = get_logger("rag.vector.store")
+
+DTYPES = ("float32", "float16", "int8")
+
+# rows dequantized per block while scoring float16/int8: bounds the float32 scratch
+# to SCORE_BLOCK_ROWS x D (16k x 1024 -> 64 MB) whatever the corpus size
+SCORE_BLOCK_ROWS = int(os.getenv("VECTOR_SCORE_BLOCK_ROWS", "16384"))
+
+MANIFEST = "index.json"
+
+
+def normalize_rows(m: np.ndarray) -> np.ndarray:
+    return m / np.maximum(np.linalg.norm(m, axis=1, keepdims=True), 1e-12)
+
+
+def fit_dim(vec, dim: int):
+    """
+    Shape a vector (list or array; arrays may be 2-D, shaped along the last axis) to
+    `dim` components. The only place vectors are padded or cut:
+    - already `dim` long: returned as is (same object, no copy)
+    - longer: a view of the first `dim` components (lists are converted once)
+    - shorter: one zero-padded float32 copy (only while a padded index is in use)
+    """
+    if vec is None:
+        return None
+    n = vec.shape[-1] if isinstance(vec, np.ndarray) else len(vec)
+    if n == dim:
+        return vec
+    arr = np.asarray(vec, dtype=np.float32)
+    if n > dim:
+        return arr[..., :dim]
+    out = np.zeros(arr.shape[:-1] + (dim,), dtype=np.float32)
+    out[..., :n] = arr
+    return out
+
+
+def as_list(vec) -> List[float]:
+    """Request payload (Pinecone SDK, JSON): lists pass through, arrays are converted once."""
+    if isinstance(vec, list):
+        return vec
+    return vec.tolist() if isinstance(vec, np.ndarray) else list(vec)
+
+
+class VectorMatrix:
+    """
+    N x D corpus matrix in one contiguous buffer:
+    - float32: as is (4 bytes/dim)
+    - float16: half precision (2 bytes/dim)
+    - int8: symmetric per-row scalar quantization, row ~= data[i] * scales[i] (1 byte/dim)
+    `data`/`scales` may be read-only np.memmap views of a snapshot: scoring only reads
+    them, writes build a new VectorMatrix in memory.
+    """
+
+    def __init__(self, data: np.ndarray, scales: Optional[np.ndarray] = None):
+        dtype = str(data.dtype)
+        if dtype not in DTYPES:
+            raise ValueError(f"Unsupported vector dtype: {dtype}")
+        if data.ndim != 2:
+            raise ValueError("vector matrix must be 2-D")
+        if (dtype == "int8") != (scales is not None):
+            raise ValueError("int8 matrices need per-row scales (and only they do)")
+        self.data = data
+        self.scales = scales
+
+    @classmethod
+    def empty(cls, dim: int = 0, dtype: str = "float32") -> "VectorMatrix":
+        return cls.encode(np.zeros((0, dim), dtype=np.float32), dtype)
+
+    @classmethod
+    def encode(cls, rows: np.ndarray, dtype: str = "float32") -> "VectorMatrix":
+        """float32 rows (N x D) -> storage dtype."""
+        if dtype not in DTYPES:
+            raise ValueError(f"Unsupported vector dtype: {dtype} (expected one of {', '.join(DTYPES)})")
+        rows = np.asarray(rows, dtype=np.float32)
+        if dtype == "float32":
+            return cls(np.ascontiguousarray(rows))
+        if dtype == "float16":
+            return cls(rows.astype(np.float16))
+        scales = (np.abs(rows).max(axis=1) / 127.0).astype(np.float32) if len(rows) else np.zeros(0, np.float32)
+        safe = np.where(scales > 0, scales, 1.0)[:, None]
+        data = np.clip(np.rint(rows / safe), -127, 127).astype(np.int8)
+        return cls(data, scales)
+
+    # ---------- shape ----------
+    @property
+    def dtype(self) -> str:
+        return str(self.data.dtype)
+
+    @property
+    def dim(self) -> int:
+        return int(self.data.shape[1])
+
+    def __len__(self) -> int:
+        return int(self.data.shape[0])
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.data.nbytes + (self.scales.nbytes if self.scales is not None else 0))
+
+    @property
+    def mmapped(self) -> bool:
+        return isinstance(self.data, np.memmap) or isinstance(getattr(self.data, "base", None), np.memmap)
+
+    # ---------- reads ----------
+    def _block(self, i: int, j: int) -> np.ndarray:
+        block = self.data[i:j].astype(np.float32)
+        if self.scales is not None:
+            block *= self.scales[i:j, None]
+        return block
+
+    def rows(self, idx: Optional[Sequence[int]] = None) -> np.ndarray:
+        """Dequantized float32 copy of some (or all) rows."""
+        if idx is None:
+            return self._block(0, len(self))
+        idx = np.asarray(idx, dtype=np.intp)
+        block = self.data[idx].astype(np.float32)
+        if self.scales is not None:
+            block *= self.scales[idx, None]
+        return block
+
+    def scores(self, q: np.ndarray) -> np.ndarray:
+        """(B x D) float32 queries -> (B x N) dot products, without materializing N x D floats."""
+        n = len(self)
+        if self.dtype == "float32":
+            return np.asarray(q @ self.data.T)
+        out = np.empty((q.shape[0], n), dtype=np.float32)
+        step = max(1, SCORE_BLOCK_ROWS)
+        for i in range(0, n, step):
+            j = min(n, i + step)
+            if self.scales is None:
+                out[:, i:j] = q @ self.data[i:j].astype(np.float32).T
+            else:
+                # scale after the product: (q . data_i) * s_i, one multiply per score
+                out[:, i:j] = (q @ self.data[i:j].astype(np.float32).T) * self.scales[i:j]
+        return out
+
+    # ---------- writes (return new matrices) ----------
+    def take(self, keep: Sequence[int]) -> "VectorMatrix":
+        keep = np.asarray(keep, dtype=np.intp)
+        return VectorMatrix(np.ascontiguousarray(self.data[keep]),
+                            None if self.scales is None else np.ascontiguousarray(self.scales[keep]))
+
+    def updated(self, replace: Dict[int, np.ndarray], append: Sequence[np.ndarray]) -> "VectorMatrix":
+        """Copy with rows replaced (by position) and appended; new rows are float32 and get encoded."""
+        data = np.array(self.data, copy=True)
+        scales = None if self.scales is None else np.array(self.scales, copy=True)
+        if replace:
+            pos = list(replace)
+            enc = VectorMatrix.encode(np.stack([replace[p] for p in pos]), self.dtype)
+            data[pos] = enc.data
+            if scales is not None:
+                scales[pos] = enc.scales
+        if append:
+            enc = VectorMatrix.encode(np.stack(append), self.dtype)
+            data = np.concatenate([data, enc.data])
+            if scales is not None:
+                scales = np.concatenate([scales, enc.scales])
+        return VectorMatrix(data, scales)
+
+    def astype(self, dtype: str) -> "VectorMatrix":
+        return self if dtype == self.dtype else VectorMatrix.encode(self.rows(), dtype)
+
+
+# ---------- snapshots ----------
+# A snapshot is a directory:
+#   index.json                 manifest: dtype, metric, dim, ids, metadata, file names
+#   vectors-<token>.npy        N x D in the storage dtype
+#   scales-<token>.npy         N float32 (int8 only)
+# New .npy files are written first and index.json is replaced atomically last, so a
+# reader sees either the old or the new snapshot. Replaced .npy files are unlinked;
+# processes that still map them keep a valid view until they reload.
+
+def save_snapshot(path: str, ids: Sequence[str], matrix: VectorMatrix, metadata: Sequence[Dict[str, Any]],
+                  metric: str) -> None:
+    root = Path(path)
+    root.mkdir(parents=True, exist_ok=True)
+    token = f"{time.time_ns():x}"
+    files = {"vectors": f"vectors-{token}.npy",
+             "scales": f"scales-{token}.npy" if matrix.scales is not None else None}
+    np.save(root / files["vectors"], np.ascontiguousarray(matrix.data))
+    if files["scales"]:
+        np.save(root / files["scales"], np.ascontiguousarray(matrix.scales))
+    manifest = {
+        "format": 1,
+        "dtype": matrix.dtype,
+        "metric": metric,
+        "count": len(matrix),
+        "dim": matrix.dim,
+        **files,
+        "ids": list(ids),
+        "metadata": list(metadata),
+    }
+    tmp = root / f"{MANIFEST}.tmp"
+    tmp.write_text(json.dumps(manifest), encoding="utf-8")
+    os.replace(tmp, root / MANIFEST)
+    keep = {f for f in files.values() if f}
+    for f in root.glob("*.npy"):
+        if f.name not in keep:
+            try:
+                f.unlink()
+            except OSError:
+                pass
+
+
+def load_snapshot(path: str, mmap: bool = True) -> Tuple[List[str], VectorMatrix, List[Dict[str, Any]], str]:
+    """-> (ids, matrix, metadata, metric the rows were stored for)."""
+    root = Path(path)
+    mode = "r" if mmap else None
+    for attempt in (1, 2):
+        manifest = json.loads((root / MANIFEST).read_text(encoding="utf-8"))
+        try:
+            data = np.load(root / manifest["vectors"], mmap_mode=mode, allow_pickle=False)
+            scales = (np.load(root / manifest["scales"], mmap_mode=mode, allow_pickle=False)
+                      if manifest.get("scales") else None)
+            break
+        except FileNotFoundError:
+            if attempt == 2:
+                raise
+            # another process replaced the snapshot between the two reads; take the new one
+    return list(manifest["ids"]), VectorMatrix(data, scales), list(manifest["metadata"]), manifest["metric"]
+
+
+def snapshot_exists(path: str) -> bool:
+    p = Path(path)
+    return p.exists() if p.suffix == ".npz" else (p / MANIFEST).exists()
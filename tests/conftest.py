@@ -0,0 +1,20 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# the app is imported as `app.*` from src/ (as uvicorn does in the container)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+# settings are read at import time: point every file the app writes at a scratch
+# directory (never ./data) and run offline against the Pinecone stand-in
+_scratch = Path(tempfile.mkdtemp(prefix="rag-tests-"))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_scratch / 'app.db'}")
+os.environ.setdefault("INDEX_GENERATION_FILE", str(_scratch / "index_generation"))
+os.environ.setdefault("ACTIVE_INDEX_FILE", str(_scratch / "active_index.json"))
+os.environ.setdefault("INGESTED_CORPUS_FILE", str(_scratch / "ingested_corpus.json"))
+os.environ.setdefault("LOCAL_INDEX_PATH", str(_scratch / "faq_index"))
+os.environ.setdefault("PINECONE_CLIENT", "fake")
+# hash passwords on a thread: no process pool to spawn (and tear down) per test run
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
@@ -0,0 +1,187 @@
+# tests/test_batcher.py
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core.batcher import AsyncMicroBatcher, MicroBatcher
+from app.core.resilience import DependencyTimeout, deadline_scope, remaining_ms
+
+
+def _upper(calls):
+    def fn(items):
+        calls.append(list(items))
+        return [s.upper() for s in items]
+    return fn
+
+
+# ---------- threads ----------
+def test_sync_items_in_one_window_share_a_call():
+    calls, flushes = [], []
+    b = MicroBatcher("t", _upper(calls), window_ms=50, max_size=100,
+                     on_flush=lambda n, trigger, ms: flushes.append((n, trigger)))
+    with ThreadPoolExecutor(5) as pool:
+        out = list(pool.map(b.submit, ["a", "b", "c", "d", "e"]))
+    assert out == ["A", "B", "C", "D", "E"]
+    assert len(calls) == 1 and sorted(calls[0]) == list("abcde")
+    assert flushes == [(5, "window")]
+
+
+def test_sync_full_batch_flushes_before_the_window():
+    calls, flushes = [], []
+    b = MicroBatcher("t", _upper(calls), window_ms=5000, max_size=3,
+                     on_flush=lambda n, trigger, ms: flushes.append(trigger))
+    t0 = time.monotonic()
+    with ThreadPoolExecutor(3) as pool:
+        assert sorted(pool.map(b.submit, "xyz")) == ["X", "Y", "Z"]
+    assert time.monotonic() - t0 < 2
+    assert flushes == ["full"] and b.stats()["full_flushes"] == 1
+
+
+def test_sync_error_reaches_every_caller():
+    def boom(items):
+        raise RuntimeError("down")
+
+    b = MicroBatcher("t", boom, window_ms=30, max_size=10)
+    with ThreadPoolExecutor(3) as pool:
+        futs = [pool.submit(b.submit, i) for i in range(3)]
+        for f in futs:
+            with pytest.raises(RuntimeError, match="down"):
+                f.result()
+
+
+def test_sync_follower_deadline_and_tightest_deadline_inside_the_call():
+    release, seen = threading.Event(), []
+
+    def slow(items):
+        seen.append(remaining_ms())      # the shared call runs under the follower's shorter budget
+        release.wait(2)
+        return items
+
+    b = MicroBatcher("t", slow, window_ms=30, max_size=10)
+
+    def submit(item, ms):
+        with deadline_scope(ms):
+            return b.submit(item)
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(submit, "l", 5000)
+        time.sleep(0.005)
+        with pytest.raises(DependencyTimeout):
+            pool.submit(submit, "f", 60).result()
+        release.set()
+        assert leader.result() == "l"
+    assert len(seen) == 1 and 0 < seen[0] <= 60
+
+
+def test_sync_call_without_deadlines_has_none():
+    seen = []
+    b = MicroBatcher("t", lambda items: seen.append(remaining_ms()) or items, window_ms=5, max_size=10)
+    assert b.submit("x") == "x"
+    assert seen == [None]
+
+
+def test_sync_leader_window_is_cut_by_its_deadline():
+    b = MicroBatcher("t", lambda items: items, window_ms=5000, max_size=10)
+    t0 = time.monotonic()
+    with deadline_scope(50):
+        assert b.submit("x") == "x"
+    assert time.monotonic() - t0 < 1
+
+
+# ---------- asyncio ----------
+def _aupper(calls):
+    async def fn(items):
+        calls.append(list(items))
+        await asyncio.sleep(0.01)
+        return [s.upper() for s in items]
+    return fn
+
+
+def test_async_window_and_full_flushes():
+    calls, flushes = [], []
+    b = AsyncMicroBatcher("t", _aupper(calls), window_ms=20, max_size=4,
+                          on_flush=lambda n, trigger, ms: flushes.append((n, trigger)))
+
+    async def main():
+        return await asyncio.gather(*(b.submit(c) for c in "abcdef"))
+
+    assert asyncio.run(main()) == list("ABCDEF")
+    assert calls == [list("abcd"), list("ef")]
+    assert flushes == [(4, "full"), (2, "window")]
+
+
+def test_async_error_reaches_every_caller():
+    async def boom(items):
+        raise RuntimeError("down")
+
+    b = AsyncMicroBatcher("t", boom, window_ms=5, max_size=10)
+
+    async def main():
+        return await asyncio.gather(*(b.submit(i) for i in range(3)), return_exceptions=True)
+
+    assert [type(r) for r in asyncio.run(main())] == [RuntimeError] * 3
+
+
+def test_async_follower_deadline():
+    async def slow(items):
+        await asyncio.sleep(0.1)
+        return items
+
+    b = AsyncMicroBatcher("t", slow, window_ms=5, max_size=10)
+
+    async def follower():
+        with deadline_scope(20):
+            return await b.submit("f")
+
+    async def main():
+        other = asyncio.ensure_future(b.submit("o"))
+        with pytest.raises(DependencyTimeout):
+            await follower()
+        assert await other == "o"
+
+    asyncio.run(main())
+
+
+def test_async_batch_runs_under_the_tightest_deadline():
+    seen = []
+
+    async def fn(items):
+        seen.append(remaining_ms())
+        return items
+
+    b = AsyncMicroBatcher("t", fn, window_ms=10, max_size=10)
+
+    async def submit(item, ms):
+        with deadline_scope(ms):
+            return await b.submit(item)
+
+    async def main():
+        return await asyncio.gather(submit("a", 5000), submit("b", 300), b.submit("c"))
+
+    assert asyncio.run(main()) == ["a", "b", "c"]
+    assert len(seen) == 1 and 0 < seen[0] <= 300
+
+
+def test_async_cancelled_callers_never_cancel_the_batch():
+    calls = []
+    b = AsyncMicroBatcher("t", _aupper(calls), window_ms=5, max_size=10)
+
+    async def main():
+        one = [asyncio.ensure_future(b.submit(c)) for c in "ab"]
+        await asyncio.sleep(0)
+        one[0].cancel()
+        assert await one[1] == "B"
+
+        every = [asyncio.ensure_future(b.submit(c)) for c in "cd"]
+        await asyncio.sleep(0)
+        for f in every:
+            f.cancel()
+        await asyncio.gather(*every, return_exceptions=True)
+        await asyncio.sleep(0.05)                 # the batch still ran, with nobody waiting
+        assert await b.submit("e") == "E"         # and the next caller opens a new one
+
+    asyncio.run(main())
+    assert calls == [["a", "b"], ["c", "d"], ["e"]]
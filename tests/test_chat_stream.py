@@ -0,0 +1,82 @@
+# tests/test_chat_stream.py
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.api.routes import chat
+from app.db.async_session import async_engine
+from app.db.session import SessionLocal
+from app.domain.models import Message, Session as ChatSession
+from app.domain.schemas import ChatRequest
+from app.main import app
+
+
+@pytest.fixture
+def session_id():
+    with SessionLocal() as db:
+        s = ChatSession(title="stream")
+        db.add(s)
+        db.commit()
+        return s.id
+
+
+@pytest.fixture
+def answer(monkeypatch):
+    async def astream_answer(text):
+        yield "matches", {"cached": False, "matches": []}
+        for part in ("Here ", "is ", "the answer"):
+            await asyncio.sleep(0.02)
+            yield "chunk", {"kind": "context", "text": part}
+
+    monkeypatch.setattr(chat.chat_service, "astream_answer", astream_answer)
+
+
+def _messages(session_id):
+    with SessionLocal() as db:
+        return db.scalars(select(Message).where(Message.session_id == session_id).order_by(Message.version)).all()
+
+
+def test_turn_is_persisted_when_the_client_disconnects(session_id, answer):
+    async def main():
+        stream = chat._stream_turn(ChatRequest(sessionId=session_id, message="hi"))
+        assert (await stream.__anext__()).startswith("event: matches")
+        await stream.aclose()                 # the client goes away after the first event
+        await chat.drain_stream_turns()       # what shutdown does with detached turns
+        await async_engine.dispose()
+
+    asyncio.run(main())
+    assert [(m.role, m.content, m.version) for m in _messages(session_id)] == [
+        ("user", "hi", 1), ("assistant", "Here is the answer", 2)]
+
+
+def _events(body: str):
+    # "event: <name>\ndata: <json>\n\n" frames -> [(name, data)]
+    frames = [f.split("\n", 1) for f in body.strip().split("\n\n")]
+    return [(head.removeprefix("event: "), json.loads(data.removeprefix("data: "))) for head, data in frames]
+
+
+def test_stream_emits_matches_then_chunks_then_done(session_id, answer):
+    with TestClient(app) as client:
+        r = client.post("/api/chat/stream", json={"sessionId": session_id, "message": "hi"})
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/event-stream")
+    events = _events(r.text)
+    assert [name for name, _ in events] == ["matches", "chunk", "chunk", "chunk", "done"]
+    assert "".join(d["text"] for name, d in events if name == "chunk") == "Here is the answer"
+    assistant = _messages(session_id)[-1]
+    assert events[-1] == ("done", {"messageId": assistant.id, "version": 2})
+
+
+def test_stream_ends_with_error_event_when_the_answer_fails(session_id, monkeypatch):
+    async def astream_answer(text):
+        yield "matches", {"cached": False, "matches": []}
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(chat.chat_service, "astream_answer", astream_answer)
+    with TestClient(app) as client:
+        r = client.post("/api/chat/stream", json={"sessionId": session_id, "message": "hi"})
+    assert _events(r.text) == [("matches", {"cached": False, "matches": []}),
+                               ("error", {"detail": "Chat turn failed"})]
+    assert _messages(session_id) == []           # a failed turn writes nothing
@@ -0,0 +1,67 @@
+# tests/test_db_engine.py
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+from app.core.config import Settings
+from app.db.engine import InstrumentedQueuePool, apply_profile, engine_options, pool_status
+
+
+def test_options_per_backend():
+    s = Settings(db_pool_size=3, db_max_overflow=1, sqlite_busy_timeout_ms=2500)
+    file_opts = engine_options(make_url("sqlite:///./x.db"), s)
+    assert file_opts["poolclass"] is InstrumentedQueuePool
+    assert (file_opts["pool_size"], file_opts["max_overflow"]) == (3, 1)
+    assert file_opts["connect_args"] == {"check_same_thread": False, "timeout": 2.5}
+
+    memory_opts = engine_options(make_url("sqlite://"), s)
+    assert "poolclass" not in memory_opts and "pool_size" not in memory_opts
+
+    pg_opts = engine_options(make_url("postgresql://u:p@db/app"), s)
+    assert pg_opts["pool_pre_ping"] is True and pg_opts["pool_recycle"] == s.db_pool_recycle
+    assert "connect_args" not in pg_opts
+
+
+def test_sqlite_pragmas_apply_to_every_connection(tmp_path):
+    s = Settings(sqlite_synchronous="NORMAL", sqlite_busy_timeout_ms=1234, sqlite_cache_size=-2048)
+    url = make_url(f"sqlite:///{tmp_path / 'p.db'}")
+    engine = apply_profile(create_engine(url, **engine_options(url, s)), s)
+    try:
+        def pragmas(_):
+            with engine.connect() as conn:
+                return tuple(conn.execute(text(f"PRAGMA {p}")).scalar()
+                             for p in ("journal_mode", "synchronous", "busy_timeout", "cache_size"))
+
+        with ThreadPoolExecutor(3) as pool:      # several pooled connections, not just the first
+            assert set(pool.map(pragmas, range(6))) == {("wal", 1, 1234, -2048)}
+    finally:
+        engine.dispose()
+
+
+def test_pool_counters_track_checkouts_and_waits(tmp_path):
+    s = Settings(db_pool_size=1, db_max_overflow=0, db_pool_timeout=5)
+    url = make_url(f"sqlite:///{tmp_path / 'c.db'}")
+    engine = apply_profile(create_engine(url, **engine_options(url, s)), s)
+    try:
+        held = engine.connect()
+        with ThreadPoolExecutor(1) as pool:
+            waiting = pool.submit(lambda: engine.connect().close())
+            held.close()                         # lets the waiter in
+            waiting.result(5)
+        stats = pool_status(engine)
+        assert stats["size"] == 1 and stats["checked_out"] == 0
+        assert stats["checkouts"] == 2 and stats["connects"] == 1
+    finally:
+        engine.dispose()
+
+
+def test_debug_db_reports_pools_and_effective_pragmas():
+    from app.api.routes.debug import debug_db
+
+    out = debug_db()
+    assert out["backend"] == "sqlite"
+    assert {"sync_pool", "async_pool"} <= out.keys()
+    assert out["sync_pool"]["pool_class"] == "InstrumentedQueuePool"
+    assert out["pragmas"]["journal_mode"] == "wal"
+    assert "replica" not in out                  # DATABASE_READ_URL unset
@@ -0,0 +1,63 @@
+# tests/test_history.py
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.routes import chat
+from app.db.session import SessionLocal
+from app.domain.models import Session as ChatSession
+from app.domain.schemas import ChatMessage
+from app.main import app
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def aanswer_with_rag(text):
+        return ChatMessage(role="assistant", content=f"re: {text}")
+
+    monkeypatch.setattr(chat.chat_service, "aanswer_with_rag", aanswer_with_rag)
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def session_id():
+    with SessionLocal() as db:
+        s = ChatSession(title="history")
+        db.add(s)
+        db.commit()
+        return s.id
+
+
+def _turn(client, session_id, text):
+    r = client.post("/api/chat", json={"sessionId": session_id, "message": text, "mode": "delta"})
+    assert r.status_code == 200
+    return r.json()["version"]
+
+
+def test_unchanged_conversation_answers_304(client, session_id):
+    _turn(client, session_id, "one")
+    r = client.get("/api/history", params={"sessionId": session_id})
+    assert r.status_code == 200 and r.headers["ETag"] == 'W/"v2"'
+    assert [m["content"] for m in r.json()["messages"]] == ["one", "re: one"]
+
+    again = client.get("/api/history", params={"sessionId": session_id}, headers={"If-None-Match": r.headers["ETag"]})
+    assert again.status_code == 304 and again.headers["ETag"] == 'W/"v2"' and again.content == b""
+
+    _turn(client, session_id, "two")                      # a new turn moves the version: full answer again
+    changed = client.get("/api/history", params={"sessionId": session_id}, headers={"If-None-Match": 'W/"v2"'})
+    assert changed.status_code == 200 and changed.headers["ETag"] == 'W/"v4"'
+
+
+def test_since_version_returns_only_newer_messages(client, session_id):
+    assert _turn(client, session_id, "one") == 2
+    assert _turn(client, session_id, "two") == 4
+
+    r = client.get("/api/history", params={"sessionId": session_id, "since_version": 2})
+    assert r.status_code == 200
+    assert [m["content"] for m in r.json()["messages"]] == ["two", "re: two"]
+    assert r.json()["version"] == 4
+
+    assert client.get("/api/history", params={"sessionId": session_id, "since_version": 4}).status_code == 304
+    paged = client.get("/api/history", params={"sessionId": session_id, "since_version": 0, "limit": 3}).json()
+    assert [m["content"] for m in paged["messages"]] == ["one", "re: one", "two"]
+    assert paged["version"] == 3                           # resume from the last version received
@@ -0,0 +1,64 @@
+# tests/test_index_migration.py
+import os
+
+import pytest
+
+os.environ.setdefault("PINECONE_CLIENT", "fake")
+os.environ.setdefault("PINECONE_NAMESPACE", "default")
+
+from app.services import index_migration, vector_client  # noqa: E402
+from app.services.fake_pinecone import FakeIndex, FakeIndexStore, Faults  # noqa: E402
+from app.services.index_state import IndexTarget  # noqa: E402
+from app.services.ingest_pipeline import IngestDoc  # noqa: E402
+
+DOCS = [IngestDoc(id=f"e{i}", text=f"entry {i}", metadata={}) for i in range(3)]
+TARGET = IndexTarget(host="t.svc.fake", dimension=4, name="t")
+
+
+@pytest.fixture
+def index(monkeypatch):
+    idx = FakeIndex(FakeIndexStore(4), Faults())
+    monkeypatch.setattr(vector_client, "get_index", lambda host=None: idx)
+    monkeypatch.setattr(index_migration, "MIGRATION_VERIFY_TIMEOUT_SECONDS", 0)
+    return idx
+
+
+def _job(upserted_ids):
+    job = index_migration.MigrationJob("ns", 4, "t", TARGET.host, True, len(DOCS))
+    job.upserted_ids = list(upserted_ids)
+    return job
+
+
+def _upsert(index, ids):
+    index.upsert([{"id": i, "values": [1.0, 0, 0, 0]} for i in ids], namespace="ns")
+
+
+def test_verify_passes_on_exactly_the_corpus(index):
+    _upsert(index, [d.id for d in DOCS])
+    job = _job(d.id for d in DOCS)
+    index_migration._verify(job, TARGET, DOCS)
+    assert job.verify["ok"] and job.verify["extra"] == 0
+
+
+def test_verify_fails_on_a_reused_index_with_extra_vectors(index):
+    _upsert(index, [d.id for d in DOCS] + ["stale-1", "stale-2"])
+    job = _job(d.id for d in DOCS)
+    with pytest.raises(RuntimeError, match="5 vectors"):
+        index_migration._verify(job, TARGET, DOCS)
+    assert job.verify == {**job.verify, "extra": 2, "ok": False}
+
+
+def test_verify_checks_ids_not_just_the_count(index):
+    _upsert(index, ["e0", "e1", "old"])       # right count, wrong ids
+    job = _job(d.id for d in DOCS)
+    with pytest.raises(RuntimeError, match="missing"):
+        index_migration._verify(job, TARGET, DOCS)
+    assert job.verify["missing"] == ["e2"]
+
+
+def test_verify_fails_when_this_job_did_not_upsert_every_id(index):
+    _upsert(index, [d.id for d in DOCS])      # already there from an earlier run
+    job = _job(["e0"])
+    with pytest.raises(RuntimeError, match="not upserted"):
+        index_migration._verify(job, TARGET, DOCS)
+    assert job.verify["not_upserted"] == ["e1", "e2"]
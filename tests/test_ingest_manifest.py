@@ -0,0 +1,64 @@
+# tests/test_ingest_manifest.py
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.domain.models import Base
+from app.services.ingest_manifest import plan_ingest, record_upserted
+from app.services.ingest_pipeline import IngestDoc
+
+DOCS = [IngestDoc(id=f"e{i}", text=f"entry {i}", metadata={"i": i}) for i in range(3)]
+
+
+def _db() -> Session:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return Session(engine)
+
+
+def _counts(plan):
+    return len(plan.new), len(plan.changed), len(plan.unchanged)
+
+
+def test_plan_is_incremental_per_target():
+    db = _db()
+    plan = plan_ingest(db, "ns", DOCS, "m", 1024, "pinecone:a")
+    assert _counts(plan) == (3, 0, 0)
+    record_upserted(db, "ns", plan, [d.id for d in DOCS], "m", 1024, "pinecone:a")
+
+    assert _counts(plan_ingest(db, "ns", DOCS, "m", 1024, "pinecone:a")) == (0, 0, 3)
+    # same dimension, another index (or backend): it starts empty
+    assert _counts(plan_ingest(db, "ns", DOCS, "m", 1024, "pinecone:b")) == (0, 3, 0)
+    assert _counts(plan_ingest(db, "ns", DOCS, "m", 1024, "local:./data/faq_index")) == (0, 3, 0)
+    assert _counts(plan_ingest(db, "ns", DOCS, "m", 1536, "pinecone:a")) == (0, 3, 0)
+
+    changed = DOCS[:2] + [IngestDoc(id="e2", text="edited", metadata={"i": 2})]
+    plan = plan_ingest(db, "ns", changed, "m", 1024, "pinecone:a")
+    assert [d.id for d in plan.changed] == ["e2"]
+    assert plan_ingest(db, "ns", DOCS[:1], "m", 1024, "pinecone:a").removed == ["e1", "e2"]
+
+
+def test_removed_ids_are_deleted_from_the_target_they_were_written_to(tmp_path, monkeypatch):
+    import os
+    os.environ.setdefault("PINECONE_CLIENT", "fake")
+    from app.api.routes import ingest
+    from app.services import index_state
+
+    monkeypatch.setattr(index_state, "INDEX_GENERATION_FILE", str(tmp_path / "gen"))
+    monkeypatch.setattr(index_state, "INGESTED_CORPUS_FILE", str(tmp_path / "corpus.json"))
+    other = []
+    monkeypatch.setattr(ingest.vector_client, "delete_from_target",
+                        lambda target, ids, ns: other.append((target, list(ids), ns)))
+
+    db = _db()
+    for doc, target in ((DOCS[0], "pinecone:a"), (DOCS[1], "pinecone:old"), (DOCS[2], "pinecone:a")):
+        plan = plan_ingest(db, "ns", [doc], "m", 1024, target)
+        record_upserted(db, "ns", plan, [doc.id], "m", 1024, target)
+
+    plan = plan_ingest(db, "ns", [], "m", 1024, "pinecone:a")
+    assert plan.removed_by_target() == {"pinecone:a": ["e0", "e2"], "pinecone:old": ["e1"]}
+    current = []
+    ingest._sync_delta(db, "ns", plan, 1024, "pinecone:a", upsert_fn=None, delete_fn=current.append,
+                       embed_fn=lambda texts: [])
+    assert current == [["e0", "e2"]]
+    assert other == [("pinecone:old", ["e1"], "ns")]
+    assert plan_ingest(db, "ns", [], "m", 1024, "pinecone:a").removed == []
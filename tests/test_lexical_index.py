@@ -0,0 +1,81 @@
+# tests/test_lexical_index.py
+import os
+
+os.environ.setdefault("PINECONE_CLIENT", "fake")
+os.environ.setdefault("PINECONE_NAMESPACE", "default")
+
+from app.core.resilience import deadline_scope  # noqa: E402
+from app.services import vector_client  # noqa: E402
+from app.services.chat_service import CONFIDENCE_THRESHOLD  # noqa: E402
+from app.services.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize  # noqa: E402
+
+DOCS = [
+    ("a", {"question": "How do I reset my password?", "answer": "Use the reset link.", "category": "security"}),
+    ("b", {"question": "How do I change my email?", "answer": "Open account settings.", "category": "account"}),
+    ("c", {"question": "What payment methods do you accept?", "answer": "Cards and PayPal.", "category": "billing"}),
+]
+
+
+def test_tokenize_drops_stopwords():
+    assert tokenize("How do I reset my Password?") == ["reset", "password"]
+
+
+def test_bm25_ranks_and_updates_incrementally():
+    idx = BM25Index()
+    idx.upsert(DOCS)
+    hits = idx.search("reset password", top_k=3)
+    assert [h["id"] for h in hits] == ["a"]
+    assert hits[0]["metadata"]["category"] == "security"
+
+    idx.upsert([("a", {"question": "Where is my order?", "answer": "", "category": "shipping"})])
+    assert idx.search("reset password") == []
+    idx.remove(["a", "b", "c"])
+    assert len(idx) == 0 and idx.search("order") == []
+
+
+def test_question_field_outweighs_answer():
+    idx = BM25Index()
+    idx.upsert([("q", {"question": "refund policy"}), ("ans", {"question": "returns", "answer": "refund policy"})])
+    assert [h["id"] for h in idx.search("refund")] == ["q", "ans"]
+
+
+def test_rrf_keeps_first_list_dict_and_sums_ranks():
+    vec = [{"id": "x", "score": 0.8}, {"id": "y", "score": 0.7}]
+    lex = [{"id": "y", "score": 1.0}, {"id": "z", "score": 0.5}]
+    fused = reciprocal_rank_fusion([vec, lex], k=60)
+    assert [m["id"] for m in fused] == ["y", "x", "z"]
+    assert fused[0]["score"] == 0.7                     # vector score wins for shared ids
+    assert fused[0]["rrf"] == round(1 / 62 + 1 / 61, 6)
+    assert len(reciprocal_rank_fusion([vec, lex], top_k=1)) == 1
+
+
+def test_hybrid_off_topic_query_is_not_confident():
+    q = "what is the weather like today for my password"
+    lex = vector_client._lexical(q, 5)
+    assert lex and lex[0]["score"] == 1.0               # relative: the weak top hit still scores 1.0
+    with deadline_scope(5000):
+        matches = vector_client.search(q, top_k=3, mode="hybrid")
+    assert not [m for m in matches if m["score"] >= CONFIDENCE_THRESHOLD]
+
+
+def test_hybrid_keeps_strong_lexical_only_hits():
+    vec = [{"id": "v", "score": 0.1}]
+    lex = [{"id": "l", "score": 1.0, "bm25": vector_client.HYBRID_LEXICAL_MIN_BM25 + 1}]
+    fused = vector_client._fuse(vec, lex, top_k=3, mode="hybrid")
+    assert {m["id"] for m in fused} == {"v", "l"}
+
+
+def test_index_follows_ingests_made_by_other_workers(tmp_path, monkeypatch):
+    from app.services import index_state, lexical_index as lexical
+
+    monkeypatch.setattr(index_state, "INDEX_GENERATION_FILE", str(tmp_path / "gen"))
+    monkeypatch.setattr(index_state, "INGESTED_CORPUS_FILE", str(tmp_path / "corpus.json"))
+    monkeypatch.setattr(lexical, "_synced_generation", None)
+    seeded = lexical.synced_lexical_index()
+    assert seeded.search("reset password")               # faq_seed.py until the first ingest
+
+    # what another worker's ingest leaves behind: the corpus file, then a generation bump
+    index_state.record_ingested(DOCS[1:], removed=[d for d, _ in index_state.ingested_corpus()])
+    index_state.bump_generation("test")
+    assert [h["id"] for h in lexical.synced_lexical_index().search("reset password change email")] == ["b"]
+    assert len(lexical.lexical_index) == 2
@@ -0,0 +1,54 @@
+# tests/test_metrics.py
+import json
+import subprocess
+import sys
+
+from app.core.metrics import TOMBSTONE, Registry
+
+
+def _dead_pid() -> int:
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def _worker_file(tmp_path, pid, value):
+    reg = Registry(multiproc_dir="")
+    reg.counter("jobs_total", "Jobs.").inc(value, kind="a")
+    reg.histogram("job_ms", "Job ms.", buckets=(1, 10)).observe(5)
+    (tmp_path / f"metrics_{pid}.json").write_text(json.dumps(reg.snapshot()))
+
+
+def _jobs(reg):
+    return reg.collect()["jobs_total"]["samples"][(("kind", "a"),)]
+
+
+def test_collect_merges_worker_files(tmp_path):
+    reg = Registry(multiproc_dir=str(tmp_path))
+    reg.counter("jobs_total", "Jobs.").inc(1, kind="a")
+    _worker_file(tmp_path, 1, 2)     # pid 1 is always alive
+    merged = reg.collect()
+    assert merged["jobs_total"]["samples"][(("kind", "a"),)] == 3
+    assert merged["job_ms"]["samples"][()][0] == [0, 1, 0]
+
+
+def test_dead_worker_files_are_folded_into_tombstone_once(tmp_path):
+    reg = Registry(multiproc_dir=str(tmp_path))
+    reg.counter("jobs_total", "Jobs.").inc(1, kind="a")
+    _worker_file(tmp_path, _dead_pid(), 2)
+    _worker_file(tmp_path, _dead_pid(), 4)
+
+    assert _jobs(reg) == 7
+    names = sorted(f.name for f in tmp_path.glob("metrics_*.json"))
+    assert names == [TOMBSTONE]
+    assert _jobs(reg) == 7               # not re-summed on the next scrape
+
+    _worker_file(tmp_path, _dead_pid(), 8)
+    assert _jobs(reg) == 15
+    assert reg.collect()["job_ms"]["samples"][()][0] == [0, 3, 0]
+
+
+def test_embedding_cache_is_exposed():
+    from app.services import vector_client  # noqa: F401  (registers the cache)
+    from app.core.metrics import registry
+    assert 'cache="query_embeddings"' in registry.render()
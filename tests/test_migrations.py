@@ -0,0 +1,56 @@
+# tests/test_migrations.py
+from sqlalchemy import create_engine, text
+
+from app.db.migrations import ensure_schema
+from app.domain.models import Base
+
+# sessions/messages as created before versions existed
+OLD_SCHEMA = [
+    "CREATE TABLE sessions (id VARCHAR(36) PRIMARY KEY, user_id VARCHAR(36), title VARCHAR(100))",
+    "CREATE TABLE messages (id VARCHAR(36) PRIMARY KEY, session_id VARCHAR(36) NOT NULL, "
+    "role VARCHAR(20) NOT NULL, content TEXT NOT NULL, created_at DATETIME)",
+]
+
+
+def _engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        for stmt in OLD_SCHEMA:
+            conn.execute(text(stmt))
+        conn.execute(text("INSERT INTO sessions (id) VALUES ('a'), ('b'), ('empty')"))
+        for sid, mid, at in [("a", "m2", "2024-01-01 10:00:01"), ("a", "m1", "2024-01-01 10:00:00"),
+                             ("a", "m3", "2024-01-01 10:00:01"), ("b", "m4", "2024-01-02 09:00:00")]:
+            conn.execute(text("INSERT INTO messages (id, session_id, role, content, created_at) "
+                              "VALUES (:id, :sid, 'user', 'x', :at)"), {"id": mid, "sid": sid, "at": at})
+    return engine
+
+
+def _versions(engine):
+    with engine.connect() as conn:
+        messages = dict(conn.execute(text("SELECT id, version FROM messages")).all())
+        sessions = dict(conn.execute(text("SELECT id, version FROM sessions")).all())
+    return messages, sessions
+
+
+def test_existing_messages_get_sequential_versions_per_session(tmp_path):
+    engine = _engine(tmp_path)
+    ensure_schema(engine, Base.metadata)
+    assert _versions(engine) == ({"m1": 1, "m2": 2, "m3": 3, "m4": 1}, {"a": 3, "b": 1, "empty": 0})
+
+    ensure_schema(engine, Base.metadata)          # idempotent
+    assert _versions(engine)[0] == {"m1": 1, "m2": 2, "m3": 3, "m4": 1}
+
+
+def test_databases_already_backfilled_with_zero_are_repaired(tmp_path):
+    engine = _engine(tmp_path)
+    with engine.begin() as conn:                  # what the earlier migration left behind
+        conn.execute(text("ALTER TABLE sessions ADD COLUMN version INTEGER DEFAULT 0"))
+        conn.execute(text("ALTER TABLE messages ADD COLUMN version INTEGER DEFAULT 0"))
+        conn.execute(text("UPDATE sessions SET version = 1 WHERE id = 'b'"))
+        conn.execute(text("UPDATE messages SET version = 0"))
+        conn.execute(text("INSERT INTO messages (id, session_id, role, content, created_at, version) "
+                          "VALUES ('m5', 'b', 'user', 'new', '2024-02-01 00:00:00', 1)"))
+    ensure_schema(engine, Base.metadata)
+    messages, sessions = _versions(engine)
+    assert messages == {"m1": 1, "m2": 2, "m3": 3, "m4": 1, "m5": 2}
+    assert sessions == {"a": 3, "b": 2, "empty": 0}
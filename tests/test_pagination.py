@@ -0,0 +1,151 @@
+# tests/test_pagination.py
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.jwt import create_access_token
+from app.core.pagination import InvalidCursor, PageParams, decode_cursor, encode_cursor
+from app.db.session import SessionLocal
+from app.domain.models import Message, User, Session as ChatSession
+from app.main import app
+from app.repositories import db as repo
+
+T0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+# several messages per timestamp: only the id breaks the tie
+OFFSETS = [0, 0, 0, 1, 2, 2, 3, 3, 3, 3, 4]
+
+
+@pytest.fixture
+def conversation():
+    """A session whose messages share created_at values; returns (session id, ids in page order)."""
+    with SessionLocal() as db:
+        s = ChatSession(title="paged")
+        db.add(s)
+        db.flush()
+        ids = [str(uuid.uuid4()) for _ in OFFSETS]
+        rows = [Message(id=mid, session_id=s.id, role="user", content=mid,
+                        created_at=T0 + timedelta(seconds=off), version=i + 1)
+                for i, (mid, off) in enumerate(zip(ids, OFFSETS))]
+        s.version = len(rows)
+        db.add_all(rows)
+        db.commit()
+        return s.id, [m.id for m in sorted(rows, key=lambda m: (m.created_at, m.id))]
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+def _forward(session_id, limit):
+    seen, params = [], PageParams(limit=limit)
+    with SessionLocal() as db:
+        while True:
+            page = repo.page_messages(db, params, session_id=session_id)
+            seen.append([m.id for m in page.items])
+            assert (page.prev_cursor is None) == (params.after is None)
+            if page.next_cursor is None:
+                return seen
+            params = PageParams(limit=limit, after=page.next_cursor)
+
+
+def _backward(session_id, limit):
+    seen, params = [], PageParams(limit=limit)
+    with SessionLocal() as db:
+        while True:
+            page = repo.page_messages(db, params, session_id=session_id, tail=True)
+            seen.insert(0, [m.id for m in page.items])
+            assert (page.next_cursor is None) == (params.before is None)
+            if page.prev_cursor is None:
+                return seen
+            params = PageParams(limit=limit, before=page.prev_cursor)
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 4, len(OFFSETS), 50])
+def test_paging_visits_every_message_once_in_both_directions(conversation, limit):
+    session_id, expected = conversation
+    forward, backward = _forward(session_id, limit), _backward(session_id, limit)
+    assert [i for page in forward for i in page] == expected
+    assert [i for page in backward for i in page] == expected
+    assert all(0 < len(p) <= limit for p in forward + backward)
+    assert backward[-1] == expected[-limit:]          # tail=True starts from the latest messages
+
+
+def test_cursors_of_a_middle_page_lead_to_its_neighbours(conversation):
+    session_id, expected = conversation
+    with SessionLocal() as db:
+        first = repo.page_messages(db, PageParams(limit=4), session_id=session_id)
+        middle = repo.page_messages(db, PageParams(limit=4, after=first.next_cursor), session_id=session_id)
+        back = repo.page_messages(db, PageParams(limit=4, before=middle.prev_cursor), session_id=session_id)
+    assert [m.id for m in middle.items] == expected[4:8]
+    assert [m.id for m in back.items] == [m.id for m in first.items] == expected[:4]
+
+
+def test_cursor_validation():
+    cursor = encode_cursor([T0, "abc"])
+    assert decode_cursor(cursor, 2) == [T0, "abc"]
+    for bad in ("not-a-cursor!", encode_cursor(["abc"]), encode_cursor([T0, "abc", 1])):
+        with pytest.raises(InvalidCursor):
+            decode_cursor(bad, 2)
+    with SessionLocal() as db, pytest.raises(InvalidCursor):
+        repo.page_messages(db, PageParams(after=cursor, before=cursor), session_id="any")
+
+
+def test_history_pages_backwards_through_body_cursors(client, conversation):
+    session_id, expected = conversation
+    seen, params = [], {"sessionId": session_id, "limit": 3}
+    while True:
+        body = client.get("/api/history", params=params).json()
+        seen[:0] = [m["content"] for m in body["messages"]]
+        if body["prevCursor"] is None:
+            break
+        params = {"sessionId": session_id, "limit": 3, "before": body["prevCursor"]}
+    assert seen == expected
+
+
+@pytest.mark.parametrize("query", [
+    {"after": encode_cursor([T0, "x"]), "before": encode_cursor([T0, "x"])},   # both directions
+    {"after": "%%%not-base64"},                                                  # malformed
+    {"before": encode_cursor(["only-an-id"])},                                   # wrong number of values
+])
+def test_history_rejects_bad_cursors_with_400(client, conversation, query):
+    r = client.get("/api/history", params={"sessionId": conversation[0], **query})
+    assert r.status_code == 400
+
+
+def _admin(monkeypatch):
+    emails = [f"user-{uuid.uuid4().hex[:8]}@example.com" for _ in range(5)]
+    with SessionLocal() as db:
+        users = [User(email=e, password="x") for e in emails]
+        db.add_all(users)
+        db.flush()
+        db.add_all(ChatSession(user_id=u.id) for u in users)
+        db.commit()
+        user_id, email = users[0].id, emails[0]
+    monkeypatch.setattr(settings, "admin_emails", [email])
+    return user_id, {"Authorization": f"Bearer {create_access_token({'sub': user_id})}"}
+
+
+@pytest.mark.parametrize("path", ["/api/users", "/api/sessions"])
+def test_list_endpoints_page_through_headers(client, conversation, monkeypatch, path):
+    _, headers = _admin(monkeypatch)
+    everything = [row["id"] for row in client.get(path, params={"limit": 500}, headers=headers).json()]
+    assert everything == sorted(everything) and len(everything) >= 5
+
+    seen, params = [], {"limit": 2}
+    while True:
+        r = client.get(path, params=params, headers=headers)
+        assert r.status_code == 200 and len(r.json()) <= 2
+        seen += [row["id"] for row in r.json()]
+        assert ("X-Prev-Cursor" in r.headers) == ("after" in params)
+        if "X-Next-Cursor" not in r.headers:
+            break
+        params = {"limit": 2, "after": r.headers["X-Next-Cursor"]}
+    assert seen == everything
+
+    r = client.get(path, params={"after": encode_cursor(["a", "b"])}, headers=headers)
+    assert r.status_code == 400                       # ids are a one-value key
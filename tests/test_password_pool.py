@@ -0,0 +1,60 @@
+# tests/test_password_pool.py
+import asyncio
+import threading
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import security
+from app.core.password_pool import HashingBusy, PasswordHasher, password_hasher
+from app.db.session import SessionLocal
+from app.domain.models import User
+from app.main import app
+
+
+def _email() -> str:
+    return f"{uuid.uuid4().hex[:10]}@example.com"
+
+
+def test_rejects_beyond_capacity_and_recovers(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(security, "hash_password", lambda p: release.wait(5) and f"hashed:{p}")
+    hasher = PasswordHasher(workers=0, max_queue=1)
+
+    async def main():
+        running = [asyncio.create_task(hasher.hash(p)) for p in ("a", "b")]   # worker + queue slot
+        await asyncio.sleep(0.05)
+        with pytest.raises(HashingBusy):
+            await hasher.hash("c")
+        release.set()
+        assert await asyncio.gather(*running) == ["hashed:a", "hashed:b"]
+        assert await hasher.hash("d") == "hashed:d"                          # slots are freed
+
+    asyncio.run(main())
+    assert hasher.stats() == {"submitted": 3, "rejected": 1, "inflight": 0, "workers": 0, "max_queue": 1}
+
+
+def test_saturated_hasher_answers_503(monkeypatch):
+    monkeypatch.setattr(password_hasher, "_inflight", password_hasher.capacity)
+    with TestClient(app) as client:
+        r = client.post("/api/auth/register", json={"email": _email(), "password": "pw-123456"})
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == "1"
+
+
+def test_login_rehashes_plaintext_password():
+    email = _email()
+    with SessionLocal() as db:
+        db.add(User(email=email, password="legacy-plain"))
+        db.commit()
+
+    with TestClient(app) as client:
+        r = client.post("/api/auth/login", json={"email": email, "password": "legacy-plain"})
+        assert r.status_code == 200
+        with SessionLocal() as db:
+            stored = db.query(User).filter_by(email=email).one().password
+        assert security.is_hashed(stored) and not security.needs_rehash(stored)
+        # the new hash still logs in, and a wrong password is still refused
+        assert client.post("/api/auth/login", json={"email": email, "password": "legacy-plain"}).status_code == 200
+        assert client.post("/api/auth/login", json={"email": email, "password": "nope"}).status_code == 401
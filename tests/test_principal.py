@@ -0,0 +1,43 @@
+# tests/test_principal.py
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.core.principal import Principal, principal_cache
+from app.domain.models import Base, User
+
+
+def _user_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = Session(engine)
+    user = User(email="a@x.io")
+    db.add(user)
+    db.commit()
+    principal_cache.set(user.id, Principal.from_user(user))
+    return db, user
+
+
+def test_cached_principal_is_dropped_on_commit_not_flush():
+    db, user = _user_session()
+    user.email = "b@x.io"
+    db.flush()
+    assert principal_cache.get(user.id) is not None      # not committed: old row still visible
+    db.commit()
+    assert principal_cache.get(user.id) is None
+
+
+def test_rollback_keeps_cached_principal():
+    db, user = _user_session()
+    user.email = "b@x.io"
+    db.flush()
+    db.rollback()
+    assert principal_cache.get(user.id).email == "a@x.io"
+    db.commit()
+    assert principal_cache.get(user.id) is not None
+
+
+def test_delete_drops_cached_principal():
+    db, user = _user_session()
+    db.delete(user)
+    db.commit()
+    assert principal_cache.get(user.id) is None
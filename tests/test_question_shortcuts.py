@@ -0,0 +1,106 @@
+# tests/test_question_shortcuts.py
+import pytest
+
+from app.data.faq_seed import FAQ_ENTRIES
+from app.services.question_shortcuts import QuestionShortcuts, same_content_words, shingles
+
+ENTRIES = [
+    ("sec-002", {"question": "How do I reset my password?"}, ["i forgot my password"]),
+    ("pay-001", {"question": "What payment methods do you accept?"}, []),
+]
+
+
+def _shortcuts(**kw) -> QuestionShortcuts:
+    qs = QuestionShortcuts(**kw)
+    qs.upsert(ENTRIES)
+    return qs
+
+
+def _jaccard(a: str, b: str) -> float:
+    x, y = shingles(a), shingles(b)
+    return len(x & y) / len(x | y)
+
+
+def test_exact_and_alias_hits_ignore_case_and_punctuation():
+    qs = _shortcuts()
+    hit = qs.lookup("how do i RESET my password")
+    assert (hit.entry_id, hit.path, hit.score) == ("sec-002", "exact", 1.0)
+    assert qs.lookup("I forgot my password!").path == "alias"
+
+
+def test_near_duplicate_hit_and_miss():
+    qs = _shortcuts()
+    hit = qs.lookup("how do i reset my pasword")            # typo
+    assert (hit.entry_id, hit.path) == ("sec-002", "minhash")
+    assert qs.threshold <= hit.score < 1.0
+    assert qs.lookup("where is my order") is None
+    assert qs.stats()["minhash"] == 1 and qs.stats()["miss"] == 1
+
+
+@pytest.mark.parametrize("question,near", [
+    ("How do I disable two-factor authentication (2FA)?", "sec-001"),
+    ("Which payment methods are not supported?", "pay-001"),
+    ("How do you not comply with GDPR/CCPA requests?", "reg-001"),
+    ("Can I not change my email after registering?", "acc-003"),
+])
+def test_negated_questions_never_short_circuit(question, near):
+    qs = QuestionShortcuts()
+    qs.upsert((e["id"], e, e.get("aliases", ())) for e in FAQ_ENTRIES)
+    # close in shingles (above the threshold), opposite in meaning
+    sig, other = qs.signature(question), qs.signature(qs._metadata[near]["question"])
+    assert sum(x == y for x, y in zip(sig, other)) / len(sig) >= qs.threshold
+    assert qs.lookup(question) is None
+
+
+def test_same_content_words_allows_typos_only():
+    assert same_content_words("how do i reset my password", "how can i reset my pasword")
+    assert same_content_words("which payment methods", "which paymnet methods")      # swapped letters
+    assert not same_content_words("enable 2fa", "disable 2fa")
+    assert not same_content_words("payment methods supported", "payment methods not supported")
+    assert not same_content_words("change my email", "change email address")
+
+
+def test_signature_estimates_jaccard():
+    qs = QuestionShortcuts(permutations=256, bands=16)
+    a, b = "what payment methods do you accept", "which payment methods do you take"
+    sa, sb = qs.signature(a), qs.signature(b)
+    est = sum(x == y for x, y in zip(sa, sb)) / len(sa)
+    assert abs(est - _jaccard(a, b)) < 0.1
+    assert qs.signature(a) == QuestionShortcuts(permutations=256, bands=16).signature(a)  # deterministic
+
+
+def test_upsert_replaces_and_remove_forgets():
+    qs = _shortcuts()
+    qs.upsert([("sec-002", {"question": "How do I change my email?"}, [])])
+    assert qs.lookup("how do i reset my password") is None
+    assert qs.lookup("how do i change my email").entry_id == "sec-002"
+    qs.remove(["sec-002"])
+    assert qs.lookup("how do i change my email") is None
+    assert len(qs) == 1 and not any(k[0] == "sec-002" for b in qs._buckets.values() for k in b)
+
+
+def test_bands_must_divide_permutations():
+    with pytest.raises(ValueError):
+        QuestionShortcuts(permutations=64, bands=10)
+
+
+def test_table_follows_ingests_made_by_other_workers(tmp_path, monkeypatch):
+    from app.services import index_state, question_shortcuts as shortcuts
+
+    monkeypatch.setattr(index_state, "INDEX_GENERATION_FILE", str(tmp_path / "gen"))
+    monkeypatch.setattr(index_state, "INGESTED_CORPUS_FILE", str(tmp_path / "corpus.json"))
+    monkeypatch.setattr(shortcuts, "FAQ_ALIASES_PATH", str(tmp_path / "aliases.json"))
+    monkeypatch.setattr(shortcuts, "_synced_generation", None)
+    seeded = dict(index_state.ingested_corpus())
+    entry_id, metadata = next(iter(seeded.items()))
+    assert shortcuts.synced_question_shortcuts().lookup(metadata["question"]).entry_id == entry_id
+
+    # another worker's ingest: the entry is edited, then removed
+    index_state.record_ingested([(entry_id, {**metadata, "answer": "edited"})], removed=[])
+    index_state.bump_generation("test")
+    assert shortcuts.synced_question_shortcuts().lookup(metadata["question"]).metadata["answer"] == "edited"
+
+    index_state.record_ingested([], removed=[entry_id])
+    index_state.bump_generation("test")
+    hit = shortcuts.synced_question_shortcuts().lookup(metadata["question"])
+    assert hit is None or hit.entry_id != entry_id
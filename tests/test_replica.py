@@ -0,0 +1,63 @@
+# tests/test_replica.py
+import sqlite3
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.db import replica
+from app.db.replica import SqliteReplicaCopier, is_sticky, mark_written
+from app.domain.models import Base, Message, User, Session as ChatSession
+
+
+def _engine(path):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def test_committed_writes_make_their_keys_sticky(tmp_path):
+    replica.recent_writes.clear()
+    engine = _engine(tmp_path / "primary.db")
+    with Session(engine) as s:
+        s.add(User(id="u1", email="u1@example.com", password="x"))
+        s.flush()
+        s.add(ChatSession(id="s1", user_id="u1"))
+        s.add(Message(session_id="s1", role="user", content="hi"))
+        assert not is_sticky(["sess:s1"])          # nothing is marked before the commit
+        s.commit()
+    assert is_sticky(["sess:s1"]) and is_sticky(["user:u1"])
+    assert not is_sticky(["sess:other", "user:other"])
+    engine.dispose()
+
+
+def test_rolled_back_writes_are_not_sticky(tmp_path):
+    replica.recent_writes.clear()
+    engine = _engine(tmp_path / "primary.db")
+    with Session(engine) as s:
+        s.add(ChatSession(id="s2"))
+        s.flush()
+        s.rollback()
+    assert not is_sticky(["sess:s2"])
+    mark_written("sess:s2")
+    assert is_sticky(["sess:s2"])
+    engine.dispose()
+
+
+def test_copier_snapshots_primary_onto_replica(tmp_path):
+    primary, copy = tmp_path / "primary.db", tmp_path / "replica.db"
+    engine = _engine(primary)
+    copier = SqliteReplicaCopier(str(primary), str(copy), interval=60)
+    copier.sync_once()
+    with Session(engine) as s:
+        s.add(ChatSession(id="late"))
+        s.commit()
+    with sqlite3.connect(copy) as conn:               # replica lags until the next copy
+        assert conn.execute("SELECT count(*) FROM sessions").fetchone() == (0,)
+
+    copier.sync_once()
+    replica_engine = create_engine(f"sqlite:///{copy}")
+    with Session(replica_engine) as s:
+        assert s.scalars(select(ChatSession.id)).all() == ["late"]
+    assert copier.copies == 2
+    replica_engine.dispose()
+    engine.dispose()
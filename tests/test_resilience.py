@@ -0,0 +1,140 @@
+# tests/test_resilience.py
+import asyncio
+
+import pytest
+
+from app.core.resilience import CircuitBreaker, CircuitOpen, Dependency
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_breaker(**kw):
+    clock = FakeClock()
+    return CircuitBreaker(clock=clock, **kw), clock
+
+
+def test_opens_after_threshold_and_half_opens_after_reset():
+    breaker, clock = make_breaker(failure_threshold=2, reset_seconds=10)
+    breaker.record_failure("boom")
+    assert breaker.state == "closed"
+    breaker.record_failure("boom")
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    clock.now = 9.9
+    assert breaker.state == "open"
+    clock.now = 10.0
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()      # one probe at a time
+
+
+def test_half_open_probe_outcome():
+    breaker, clock = make_breaker(failure_threshold=1, reset_seconds=5)
+    breaker.record_failure()
+    clock.now = 5
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.stats()["opened_count"] == 2
+
+    clock.now = 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_release_probe_frees_the_slot():
+    breaker, clock = make_breaker(failure_threshold=1, reset_seconds=1)
+    breaker.record_failure()
+    clock.now = 1
+    assert breaker.allow()
+    breaker.release_probe()
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+
+def _dependency(**kw):
+    breaker, clock = make_breaker(failure_threshold=1, reset_seconds=1, **kw)
+    return Dependency("test", timeout_ms=1000, max_inflight=4, breaker=breaker), clock
+
+
+def test_cancelled_half_open_probe_does_not_wedge_the_breaker():
+    dep, clock = _dependency()
+
+    async def fail():
+        raise RuntimeError("down")
+
+    async def ok():
+        return "ok"
+
+    async def main():
+        with pytest.raises(RuntimeError):
+            await dep.acall(fail)
+        assert dep.breaker.state == "open"
+        clock.now = 1
+
+        probe = asyncio.ensure_future(dep.acall(asyncio.sleep, 60))
+        await asyncio.sleep(0.01)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        assert dep.breaker.state == "half_open"
+        assert await dep.acall(ok) == "ok"
+        assert dep.breaker.state == "closed"
+        assert dep.bulkhead.inflight == 0
+
+    asyncio.run(main())
+
+
+def test_open_circuit_rejects_without_calling():
+    dep, _ = _dependency()
+    calls = []
+
+    def fail():
+        calls.append(1)
+        raise RuntimeError("down")
+
+    with pytest.raises(RuntimeError):
+        dep.call(fail)
+    with pytest.raises(CircuitOpen):
+        dep.call(fail)
+    assert len(calls) == 1
+    assert dep.bulkhead.inflight == 0
+
+
+# ---------- chat degradation ----------
+@pytest.fixture
+def chat(monkeypatch):
+    from app.services import chat_service
+
+    monkeypatch.setattr(chat_service, "SHORTCUTS_ENABLED", False)
+    monkeypatch.setattr(chat_service, "degraded_search", lambda text, top_k, mode: [])
+    return chat_service
+
+
+@pytest.mark.parametrize("error", [CircuitOpen("vector: circuit open"), ConnectionError("reset"), TimeoutError()])
+def test_chat_degrades_when_the_vector_service_is_unavailable(chat, monkeypatch, error):
+    def search(text, top_k):
+        raise error
+
+    monkeypatch.setattr(chat, "search", search)
+    reply = chat.ChatService().answer_with_rag("how do I reset my password?")
+    assert reply.content == chat.NO_MATCH_REPLY
+
+
+def test_chat_bugs_are_not_hidden_behind_a_degraded_answer(chat, monkeypatch):
+    async def asearch(text, top_k):
+        return [{"id": "faq-1"}][0]["metadata"]     # KeyError in our own code
+
+    monkeypatch.setattr(chat, "asearch", asearch)
+    with pytest.raises(KeyError):
+        asyncio.run(chat.ChatService().aanswer_with_rag("how do I reset my password?"))
@@ -0,0 +1,164 @@
+# tests/test_singleflight.py
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core.resilience import DependencyTimeout, deadline_scope
+from app.core.singleflight import AsyncSingleFlight, SingleFlight
+
+
+# ---------- threads ----------
+def _slow(calls, release: threading.Event, result="r"):
+    def fn():
+        calls.append(1)
+        release.wait(2)
+        return result
+    return fn
+
+
+def _wait_for(cond, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < end
+        time.sleep(0.001)
+
+
+def test_sync_followers_share_the_leader_result():
+    sf, calls, release = SingleFlight("t"), [], threading.Event()
+    with ThreadPoolExecutor(8) as pool:
+        futs = [pool.submit(sf.do, "k", _slow(calls, release)) for _ in range(8)]
+        _wait_for(lambda: sf.stats()["followers"] == 7)
+        release.set()
+        assert [f.result() for f in futs] == ["r"] * 8
+    assert len(calls) == 1
+    assert sf.stats() == {"inflight": 0, "leaders": 1, "followers": 7}
+
+
+def test_sync_leader_error_reaches_followers():
+    sf, release = SingleFlight("t"), threading.Event()
+
+    def boom():
+        release.wait(2)
+        raise RuntimeError("down")
+
+    with ThreadPoolExecutor(3) as pool:
+        futs = [pool.submit(sf.do, "k", boom) for _ in range(3)]
+        _wait_for(lambda: sf.stats()["followers"] == 2)
+        release.set()
+        for f in futs:
+            with pytest.raises(RuntimeError, match="down"):
+                f.result()
+    assert sf.do("k", lambda: "fresh") == "fresh"     # errors are not remembered
+
+
+def test_sync_follower_deadline_does_not_stop_the_leader():
+    sf, calls, release = SingleFlight("t"), [], threading.Event()
+
+    def follower():
+        with deadline_scope(20):
+            return sf.do("k", lambda: "never")
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(sf.do, "k", _slow(calls, release))
+        _wait_for(lambda: calls)
+        with pytest.raises(DependencyTimeout):
+            pool.submit(follower).result()
+        release.set()
+        assert leader.result() == "r"
+
+
+# ---------- asyncio ----------
+def test_async_followers_share_one_task():
+    sf, calls = AsyncSingleFlight("t"), []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return "r"
+
+    async def main():
+        return await asyncio.gather(*(sf.do("k", fn) for _ in range(10)))
+
+    assert asyncio.run(main()) == ["r"] * 10
+    assert len(calls) == 1 and sf.stats()["inflight"] == 0
+
+
+def test_async_leader_error_reaches_followers():
+    sf = AsyncSingleFlight("t")
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("down")
+
+    async def main():
+        return await asyncio.gather(*(sf.do("k", boom) for _ in range(3)), return_exceptions=True)
+
+    assert [type(r) for r in asyncio.run(main())] == [RuntimeError] * 3
+
+
+def test_async_follower_deadline():
+    sf = AsyncSingleFlight("t")
+
+    async def slow():
+        await asyncio.sleep(0.1)
+        return "r"
+
+    async def follower():
+        with deadline_scope(10):
+            return await sf.do("k", slow)
+
+    async def main():
+        leader = asyncio.ensure_future(sf.do("k", slow))
+        await asyncio.sleep(0)
+        with pytest.raises(DependencyTimeout):
+            await follower()
+        assert await leader == "r"
+
+    asyncio.run(main())
+
+
+def test_async_cancelled_waiter_does_not_cancel_the_others():
+    sf = AsyncSingleFlight("t")
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "r"
+
+    async def main():
+        a = asyncio.ensure_future(sf.do("k", slow))
+        b = asyncio.ensure_future(sf.do("k", slow))
+        await asyncio.sleep(0.01)
+        a.cancel()
+        assert await b == "r"
+        assert a.cancelled()
+
+    asyncio.run(main())
+
+
+def test_async_all_waiters_cancelled_cancels_the_call():
+    sf, started, finished = AsyncSingleFlight("t"), [], []
+
+    async def slow():
+        started.append(1)
+        await asyncio.sleep(0.2)
+        finished.append(1)
+        return "old"
+
+    async def fresh():
+        return "new"
+
+    async def main():
+        waiters = [asyncio.ensure_future(sf.do("k", slow)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        for w in waiters:
+            w.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        assert sf.stats()["inflight"] == 0
+        assert await sf.do("k", fresh) == "new"      # a later caller starts over
+        await asyncio.sleep(0.25)
+
+    asyncio.run(main())
+    assert started == [1] and finished == []
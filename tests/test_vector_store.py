@@ -0,0 +1,127 @@
+# tests/test_vector_store.py
+import numpy as np
+import pytest
+
+from app.services import vector_store
+from app.services.vector_store import (
+    VectorMatrix, load_snapshot, normalize_rows, save_snapshot, snapshot_exists,
+)
+
+
+def _corpus(n=500, d=64, seed=0):
+    return normalize_rows(np.random.default_rng(seed).standard_normal((n, d)).astype(np.float32))
+
+
+@pytest.mark.parametrize("dtype,tol", [("float32", 1e-6), ("float16", 2e-3), ("int8", 2e-2)])
+def test_quantized_scores_track_float32(dtype, tol):
+    rows = _corpus()
+    q = rows[:20] + 0.05 * _corpus(20, seed=1)
+    exact = q @ rows.T
+    m = VectorMatrix.encode(rows, dtype)
+    got = m.scores(q)
+    assert m.dtype == dtype and got.shape == exact.shape
+    assert np.abs(got - exact).max() < tol
+    assert (got.argmax(axis=1) == exact.argmax(axis=1)).all()
+    assert np.abs(m.rows() - rows).max() < tol
+
+
+def test_storage_size_per_dtype():
+    rows = _corpus(100, 64)
+    sizes = {d: VectorMatrix.encode(rows, d).nbytes for d in ("float32", "float16", "int8")}
+    assert sizes == {"float32": 100 * 64 * 4, "float16": 100 * 64 * 2, "int8": 100 * 64 + 100 * 4}
+
+
+def test_blockwise_scoring_matches_one_block(monkeypatch):
+    rows, q = _corpus(), _corpus(3, seed=2)
+    m = VectorMatrix.encode(rows, "int8")
+    whole = m.scores(q)
+    monkeypatch.setattr(vector_store, "SCORE_BLOCK_ROWS", 7)
+    assert np.allclose(m.scores(q), whole, atol=1e-6)
+
+
+def test_zero_rows_and_validation():
+    m = VectorMatrix.encode(np.zeros((2, 4), np.float32), "int8")
+    assert (m.rows() == 0).all()
+    assert VectorMatrix.empty(8, "int8").scores(np.ones((1, 8), np.float32)).shape == (1, 0)
+    with pytest.raises(ValueError):
+        VectorMatrix.encode(np.zeros((1, 4)), "bfloat16")
+    with pytest.raises(ValueError):
+        VectorMatrix(np.zeros((1, 4), np.int8))        # int8 needs scales
+
+
+def test_take_updated_astype():
+    rows = _corpus(10, 8)
+    m = VectorMatrix.encode(rows, "int8")
+    kept = m.take([0, 2, 4])
+    assert len(kept) == 3 and np.allclose(kept.rows(), m.rows([0, 2, 4]))
+
+    new = _corpus(2, 8, seed=3)
+    up = m.updated({1: new[0]}, [new[1]])
+    assert len(up) == 11 and len(m) == 10            # copies, the original is untouched
+    assert np.abs(up.rows([1, 10]) - new).max() < 2e-2
+    assert np.abs(m.astype("float16").rows() - rows).max() < 2e-2
+    assert m.astype("int8") is m
+
+
+@pytest.mark.parametrize("dtype", ["float32", "int8"])
+def test_snapshot_roundtrip_mmap_and_replace(tmp_path, dtype):
+    path = str(tmp_path / "idx")
+    rows = _corpus(30, 16)
+    m = VectorMatrix.encode(rows, dtype)
+    ids, meta = [f"e{i}" for i in range(30)], [{"i": i} for i in range(30)]
+    assert not snapshot_exists(path)
+    save_snapshot(path, ids, m, meta, "cosine")
+    assert snapshot_exists(path)
+
+    got_ids, got, got_meta, metric = load_snapshot(path, mmap=True)
+    assert (got_ids, got_meta, metric) == (ids, meta, "cosine")
+    assert got.mmapped and got.dtype == dtype
+    assert np.array_equal(got.rows(), m.rows())
+
+    # a new snapshot replaces the files; a reader holding the old map keeps working
+    save_snapshot(path, ids[:5], m.take(range(5)), meta[:5], "cosine")
+    assert len(load_snapshot(path)[1]) == 5
+    assert got.scores(rows[:1]).shape == (1, 30)
+    assert len(list((tmp_path / "idx").glob("vectors-*.npy"))) == 1
+
+
+def _rows(ids, seed):
+    vecs = _corpus(len(ids), 8, seed=seed)
+    return [{"id": i, "values": v.tolist(), "metadata": {"q": i}} for i, v in zip(ids, vecs)]
+
+
+def test_reload_picks_up_a_snapshot_saved_by_another_instance(tmp_path):
+    from app.services.vector_backends import LocalVectorBackend
+
+    path = str(tmp_path / "idx")
+    LocalVectorBackend([], np.zeros((0, 0), np.float32), [], path=path).save(path)
+    writer, reader = LocalVectorBackend.load(path), LocalVectorBackend.load(path)
+    writer.upsert(_rows(["a", "b"], seed=1))
+    reader.reload()
+    assert reader.ids == ["a", "b"] and reader.matrix.mmapped
+
+    writer.upsert(_rows(["c"], seed=2))
+    writer.delete(["a"])                         # the reader's mmapped files are unlinked now
+    assert [m["id"] for m in reader.query(writer.matrix.rows()[0], top_k=2)][:1] == ["b"]
+    reader.reload()
+    assert reader.ids == ["b", "c"]
+
+
+def test_synced_local_index_follows_another_workers_ingest():
+    from app.services import vector_client
+    from app.services.index_state import bump_generation
+    from app.services.vector_backends import LocalVectorBackend
+
+    path = vector_client.LOCAL_INDEX_PATH
+    other_worker = LocalVectorBackend.load(path)
+    other_worker.upsert(_rows(["w-1"], seed=3))
+    bump_generation("test")
+    here = vector_client.synced_local_index()
+    assert "w-1" in here.ids
+
+    other_worker.upsert(_rows(["w-2"], seed=4))   # saved, but no bump yet: nothing to re-read
+    assert "w-2" not in vector_client.synced_local_index().ids
+    bump_generation("test")
+    assert vector_client.synced_local_index() is here and "w-2" in here.ids
+    hit = here.query(other_worker.matrix.rows()[other_worker.ids.index("w-2")], top_k=1)
+    assert hit[0]["id"] == "w-2"
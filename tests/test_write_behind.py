@@ -0,0 +1,133 @@
+# tests/test_write_behind.py
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.domain.models import Base, Message, Session as ChatSession
+from app.repositories.write_behind import WriteBehindQueue
+
+
+class _Factory:
+    """sessionmaker that counts transactions and can hold the writer before its next one."""
+
+    def __init__(self, engine):
+        self._make = sessionmaker(bind=engine, autoflush=False)
+        self.opened = 0
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self, **kw) -> Session:
+        self.gate.wait(5)
+        self.opened += 1
+        return self._make(**kw)
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'wb.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    with Session(engine) as s:
+        s.add_all([ChatSession(id="s1"), ChatSession(id="s2")])
+        s.commit()
+    yield engine
+    engine.dispose()
+
+
+def _messages(engine, session_id):
+    with Session(engine) as s:
+        return s.scalars(select(Message).where(Message.session_id == session_id).order_by(Message.version)).all()
+
+
+def _turn(i):
+    return [("user", f"q{i}"), ("assistant", f"a{i}")]
+
+
+def test_concurrent_turns_share_one_transaction(db):
+    factory = _Factory(db)
+    wb = WriteBehindQueue(factory, max_batch=64, max_delay_ms=200)
+    try:
+        with ThreadPoolExecutor(8) as pool:
+            futs = [pool.submit(lambda i=i: wb.submit_turn("s1" if i % 2 else "s2", _turn(i)).result(5))
+                    for i in range(8)]
+            results = [f.result() for f in futs]
+    finally:
+        wb.stop()
+    assert factory.opened == 1
+    assert wb.stats()["batches"] == 1 and wb.stats()["turns"] == 8
+    for sid in ("s1", "s2"):
+        assert [m.version for m in _messages(db, sid)] == list(range(1, 9))
+    assert all(len(msgs) == 2 and msgs[1].version == msgs[0].version + 1 for msgs in results)
+
+
+def test_turns_of_a_session_keep_submission_order(db):
+    wb = WriteBehindQueue(_Factory(db), max_batch=3, max_delay_ms=50)
+    try:
+        futs = [wb.submit_turn("s1", _turn(i)) for i in range(7)]      # spans several batches
+        for f in futs:
+            f.result(5)
+    finally:
+        wb.stop()
+    msgs = _messages(db, "s1")
+    assert [m.content for m in msgs] == [c for i in range(7) for c in (f"q{i}", f"a{i}")]
+    assert [m.version for m in msgs] == list(range(1, 15))
+    assert [m.created_at for m in msgs] == sorted(m.created_at for m in msgs)
+
+
+def test_readers_wait_for_their_session_in_flight(db):
+    factory = _Factory(db)
+    factory.gate.clear()                      # the writer is stuck before its transaction
+    wb = WriteBehindQueue(factory, max_batch=64, max_delay_ms=0)
+    try:
+        fut = wb.submit_turn("s1", _turn(0))
+        assert wb.has_pending("s1") and not wb.has_pending("s2")
+        wb.wait_session("s2", timeout=1)      # other sessions never wait
+
+        seen = []
+        reader = threading.Thread(target=lambda: (wb.wait_session("s1", timeout=5),
+                                                  seen.append(len(_messages(db, "s1")))))
+        reader.start()
+        time.sleep(0.05)
+        assert not seen and not fut.done()
+        factory.gate.set()
+        reader.join(5)
+        assert seen == [2]                    # read-your-writes: the turn is committed
+        assert not wb.has_pending("s1")
+
+        async def poll():
+            factory.gate.clear()
+            f = wb.submit_turn("s1", _turn(1))
+            asyncio.get_running_loop().call_later(0.05, factory.gate.set)
+            await wb.await_session("s1")
+            return f.done()
+
+        assert asyncio.run(poll())
+    finally:
+        factory.gate.set()
+        wb.stop()
+
+
+def test_unknown_session_fails_only_its_own_turn(db):
+    wb = WriteBehindQueue(_Factory(db), max_batch=64, max_delay_ms=50)
+    try:
+        bad, good = wb.submit_turn("missing", _turn(0)), wb.submit_turn("s1", _turn(1))
+        with pytest.raises(LookupError):
+            bad.result(5)
+        assert [m.version for m in good.result(5)] == [1, 2]
+    finally:
+        wb.stop()
+
+
+def test_stop_flushes_everything_queued(db):
+    factory = _Factory(db)
+    wb = WriteBehindQueue(factory, max_batch=2, max_delay_ms=10_000)   # would wait 10 s for more turns
+    futs = [wb.submit_turn("s1", _turn(i)) for i in range(5)]
+    t0 = time.monotonic()
+    wb.stop()
+    assert time.monotonic() - t0 < 5
+    assert all(f.done() and f.exception() is None for f in futs)
+    assert len(_messages(db, "s1")) == 10